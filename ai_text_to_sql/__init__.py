@@ -1,5 +1,41 @@
-from .text_to_sql import TextToSQL
-from .text_to_sql_agent import TextToSQLAgent
-from .text_to_sql_chat import TextToSQLChat
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["TextToSQL", "TextToSQLAgent", "TextToSQLChat"]
+if TYPE_CHECKING:
+    from .async_text_to_sql import AsyncTextToSQL
+    from .async_text_to_sql_chat import AsyncTextToSQLChat
+    from .text_to_sql import TextToSQL
+    from .text_to_sql_agent import TextToSQLAgent
+    from .text_to_sql_chat import TextToSQLChat
+    from .text_to_sql_router import TextToSQLRouter
+
+# The public classes are imported on first access, which keeps the cold start of
+# short-lived processes that only need part of the package fast.
+_CLASS_MODULES = {
+    "AsyncTextToSQL": "async_text_to_sql",
+    "AsyncTextToSQLChat": "async_text_to_sql_chat",
+    "TextToSQL": "text_to_sql",
+    "TextToSQLAgent": "text_to_sql_agent",
+    "TextToSQLChat": "text_to_sql_chat",
+    "TextToSQLRouter": "text_to_sql_router",
+}
+
+__all__ = [
+    "AsyncTextToSQL",
+    "AsyncTextToSQLChat",
+    "TextToSQL",
+    "TextToSQLAgent",
+    "TextToSQLChat",
+    "TextToSQLRouter",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _CLASS_MODULES:
+        module = importlib.import_module(f".{_CLASS_MODULES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Text, Tuple
+
+
+def normalize_question(question: Text) -> Text:
+    """
+    Normalize a question so that trivial variations share a cache entry.
+    The question is lower-cased, runs of whitespace are collapsed and trailing
+    punctuation is removed.
+    :param question: The question to normalize.
+    :return: The normalized question.
+    """
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.!").strip().lower()
+
+
+def create_cache_key(
+    question: Text, model_parameters: Dict, schema_fingerprint: Text
+) -> Text:
+    """
+    Create the cache key for an answer.
+    :param question: The question that was converted to SQL query.
+    :param model_parameters: The parameters of the model that answered the question.
+    :param schema_fingerprint: The fingerprint of the database schema.
+    :return: The cache key.
+    """
+    payload = json.dumps(
+        [normalize_question(question), model_parameters, schema_fingerprint],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache(ABC):
+    """
+    The abstract base class for caches of the SQL queries generated for questions.
+
+    To add a new answer cache, create a class that inherits from this class and
+    implement the get() and set() abstract methods.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: Text) -> Optional[Text]:
+        """
+        Get a cached answer.
+        :param key: The cache key, as returned by create_cache_key().
+        :return: The cached SQL query, or None if there is no valid entry for the key.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: Text, sql: Text) -> None:
+        """
+        Cache an answer.
+        :param key: The cache key, as returned by create_cache_key().
+        :param sql: The SQL query to cache.
+        """
+        raise NotImplementedError
+
+    def _record(self, sql: Optional[Text]) -> Optional[Text]:
+        if sql is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return sql
+
+
+class InMemoryAnswerCache(AnswerCache):
+    """
+    An in-memory answer cache with least-recently-used eviction.
+
+    Parameters:
+    -----------
+    max_entries : int
+        The maximum number of answers to keep. This parameter is optional, and
+        defaults to 1024.
+    ttl : float
+        The number of seconds for which an answer is valid. This parameter is
+        optional, and defaults to None. If this parameter is not provided, answers
+        do not expire.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Text, Tuple[Text, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Text) -> Optional[Text]:
+        """
+        Get a cached answer.
+        :param key: The cache key, as returned by create_cache_key().
+        :return: The cached SQL query, or None if there is no valid entry for the key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self._record(None)
+
+            sql, created_at = entry
+            if self.ttl is not None and time.time() - created_at >= self.ttl:
+                del self._entries[key]
+                return self._record(None)
+
+            self._entries.move_to_end(key)
+            return self._record(sql)
+
+    def set(self, key: Text, sql: Text) -> None:
+        """
+        Cache an answer, evicting the least recently used answers if the cache is
+        full.
+        :param key: The cache key, as returned by create_cache_key().
+        :param sql: The SQL query to cache.
+        """
+        with self._lock:
+            self._entries[key] = (sql, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteAnswerCache(AnswerCache):
+    """
+    An answer cache persisted in a SQLite database file, so that answers survive
+    restarts and are shared between the processes on a host.
+
+    Parameters:
+    -----------
+    path : Text
+        The path to the SQLite database file. The file is created if it does not
+        exist.
+    max_entries : int
+        The maximum number of answers to keep. The least recently used answers are
+        evicted first. This parameter is optional, and defaults to 100000.
+    ttl : float
+        The number of seconds for which an answer is valid. This parameter is
+        optional, and defaults to None. If this parameter is not provided, answers
+        do not expire.
+    """
+
+    def __init__(
+        self, path: Text, max_entries: int = 100000, ttl: Optional[float] = None
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        # WAL lets readers in other processes proceed while an answer is written.
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, sql TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS answers_accessed_at ON answers (accessed_at)"
+        )
+
+    def get(self, key: Text) -> Optional[Text]:
+        """
+        Get a cached answer.
+        :param key: The cache key, as returned by create_cache_key().
+        :return: The cached SQL query, or None if there is no valid entry for the key.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT sql, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return self._record(None)
+
+            sql, created_at = row
+            if self.ttl is not None and now - created_at >= self.ttl:
+                self._connection.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return self._record(None)
+
+            self._connection.execute(
+                "UPDATE answers SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return self._record(sql)
+
+    def set(self, key: Text, sql: Text) -> None:
+        """
+        Cache an answer, evicting expired and least recently used answers if the
+        cache is full.
+        :param key: The cache key, as returned by create_cache_key().
+        :param sql: The SQL query to cache.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO answers (key, sql, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, sql, now, now),
+            )
+            if self.ttl is not None:
+                self._connection.execute(
+                    "DELETE FROM answers WHERE created_at <= ?", (now - self.ttl,)
+                )
+            self._connection.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        """
+        Close the connection to the SQLite database file.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+class TieredAnswerCache(AnswerCache):
+    """
+    An answer cache made up of several tiers, typically a small in-memory cache in
+    front of a persistent one.
+    Answers are looked up in each tier in order; a hit in a later tier is copied to
+    the earlier tiers. New answers are written to every tier.
+
+    Parameters:
+    -----------
+    tiers : AnswerCache
+        The caches to use, from the fastest to the slowest.
+    """
+
+    def __init__(self, *tiers: AnswerCache) -> None:
+        super().__init__()
+        self.tiers = tiers
+
+    def get(self, key: Text) -> Optional[Text]:
+        """
+        Get a cached answer from the first tier that holds it.
+        :param key: The cache key, as returned by create_cache_key().
+        :return: The cached SQL query, or None if no tier holds a valid entry.
+        """
+        for index, tier in enumerate(self.tiers):
+            sql = tier.get(key)
+            if sql is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, sql)
+                return self._record(sql)
+        return self._record(None)
+
+    def set(self, key: Text, sql: Text) -> None:
+        """
+        Cache an answer in every tier.
+        :param key: The cache key, as returned by create_cache_key().
+        :param sql: The SQL query to cache.
+        """
+        for tier in self.tiers:
+            tier.set(key, sql)
@@ -0,0 +1,297 @@
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Text,
+    Tuple,
+    TypeVar,
+)
+
+from .instrumentation import InstrumentationSpan
+from .result_cache import is_read_only_query, normalize_sql
+from .sql_template_cache import render_sql
+from .text_to_sql import BaseTextToSQL
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar("T")
+
+
+class AsyncTextToSQL(BaseTextToSQL):
+    """
+    The class for converting text to SQL query and querying the database
+    asynchronously.
+    The LLM is called with LLMConnector.aget_answer() and the database is queried with
+    DataConnector.aquery(), so that many questions can be served concurrently from a
+    single event loop.
+    The parameters are described in BaseTextToSQL.
+    """
+
+    async def acreate_prompt(
+        self,
+        text: Text,
+        database_schema: Optional[Dict] = None,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        """
+        Create the prompt for converting the given text to SQL query without blocking
+        the event loop.
+        :param text: The text to convert to SQL query.
+        :param database_schema: The database schema snapshot to use.
+                                This parameter is optional. If it is not provided, the
+                                schema is retrieved from the data connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
+        :return: The prompt for the LLM.
+        """
+        if database_schema is None:
+            database_schema = await self.data_connector.aget_database_schema()
+        if self.max_tables is not None and (
+            self._schema_index is None
+            or self._schema_index.database_schema is not database_schema
+        ):
+            # Building the index reflects the foreign keys and the comments, so it is
+            # done in a worker thread.
+            return await asyncio.to_thread(
+                self.create_prompt, text, database_schema, examples
+            )
+
+        return self.create_prompt(text, database_schema, examples)
+
+    async def acheck_query_cost(self, sql: Text) -> Text:
+        """
+        Check the estimated cost of the given SQL query before it is executed, if a
+        cost_guard is set. The query is explained in a worker thread.
+        :param sql: The SQL query to check.
+        :return: The SQL query to execute, which the cost guard may have limited.
+        """
+        if self.cost_guard is None:
+            return sql
+
+        return await asyncio.to_thread(self.check_query_cost, sql)
+
+    async def acheck_template_cost(
+        self, sql: Text, parameters: Dict[Text, Any]
+    ) -> Tuple[Text, Optional[Dict[Text, Any]]]:
+        """
+        Check the estimated cost of the given SQL template with the given values before
+        it is executed, if a cost_guard is set. The query is explained in a worker
+        thread.
+        :param sql: The SQL query of the template.
+        :param parameters: The values of the bind parameters.
+        :return: A tuple of the SQL query to execute and the values of its bind
+                 parameters. If the cost guard limited the query, the limited query
+                 is returned with the values rendered as literals.
+        """
+        if self.cost_guard is None:
+            return sql, parameters
+
+        return await asyncio.to_thread(self.check_template_cost, sql, parameters)
+
+    async def arecord_answer(self, text: Text, sql: Text) -> None:
+        """
+        Record the given text and the SQL query that answered it in the example store
+        and the template cache, if they are set. The answer is recorded in a worker
+        thread, as recording it may rebuild the index of the example store.
+        :param text: The text that was converted to SQL query.
+        :param sql: The SQL query.
+        """
+        if self.example_store is not None or self.template_cache is not None:
+            await asyncio.to_thread(self.record_answer, text, sql)
+
+    async def acoalesce(
+        self, kind: Text, key: Text, function: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        Await the function, sharing the call with the identical calls in flight in
+        other tasks if a single_flight is set.
+        :param kind: The kind of call, e.g. "query".
+        :param key: The key identifying identical calls of this kind on the database.
+        :param function: The coroutine function to await.
+        :return: A tuple of the result and whether it was shared with another call.
+        """
+        if self.single_flight is None:
+            return await function(), False
+        return await self.single_flight.ado(
+            (kind, self.data_connector.get_connector_identity(), key), function
+        )
+
+    async def acoalesce_query(
+        self,
+        kind: Text,
+        sql: Text,
+        parameters: Optional[Dict[Text, Any]],
+        function: Callable[[], Awaitable[T]],
+    ) -> Tuple[T, bool]:
+        """
+        Execute a SQL query with the coroutine function, sharing the execution with
+        the identical read-only queries in flight in other tasks if a single_flight is
+        set. Statements that may modify the database are always executed on their own.
+        :param kind: The kind of execution, e.g. "query".
+        :param sql: The SQL query.
+        :param parameters: The values of the bind parameters of the SQL query.
+        :param function: The coroutine function executing the SQL query.
+        :return: A tuple of the result and whether it was shared with another call.
+        """
+        if not is_read_only_query(sql):
+            return await function(), False
+        return await self.acoalesce(
+            kind, normalize_sql(render_sql(sql, parameters)), function
+        )
+
+    async def convert_text_to_sql(self, text: Text) -> Text:
+        """
+        Convert text to SQL query.
+        :param text: The Text to convert to SQL query.
+        :return: The converted SQL query.
+        """
+        with self.span("convert_text_to_sql") as span:
+            with self.span("schema"):
+                database_schema = await self.data_connector.aget_database_schema()
+
+            if self.single_flight is None:
+                return await self._agenerate_sql(text, database_schema, span)
+
+            sql, shared = await self.acoalesce(
+                "convert_text_to_sql",
+                self.get_answer_cache_key(text, database_schema),
+                lambda: self._agenerate_sql(text, database_schema, span),
+            )
+            span.set_attribute("shared", shared)
+            return sql
+
+    async def _agenerate_sql(
+        self, text: Text, database_schema: Dict, span: InstrumentationSpan
+    ) -> Text:
+        answer, examples, cache_key = self._find_answer(text, database_schema, span)
+        if answer is not None:
+            return answer
+
+        prompt = await self.acreate_prompt(text, database_schema, examples)
+
+        with self.span("llm") as llm_span:
+            self.llm_connector.set_last_usage(None)
+            if self.candidates > 1:
+                answers = await self.llm_connector.aget_answers(
+                    prompt, n=self.candidates
+                )
+            else:
+                answers = [await self.llm_connector.aget_answer(prompt)]
+            llm_span.set_attributes(self.llm_connector.get_last_usage())
+        candidates = [answer.strip() for answer in answers]
+        if len(candidates) > 1:
+            # The candidates are validated on the database in a worker thread.
+            sql = await asyncio.to_thread(self.select_candidate, candidates)
+        else:
+            sql = candidates[0]
+        self.logger.info(f"SQL query: {sql}")
+
+        if self.answer_cache is not None and cache_key is not None:
+            self.answer_cache.set(cache_key, sql)
+        return sql
+
+    async def convert_text_to_sql_stream(self, text: Text) -> AsyncIterator[Text]:
+        """
+        Convert text to SQL query, yielding the SQL query as it is generated by the LLM.
+        Generation stops at the end of the first complete SQL statement. A single
+        answer is streamed, regardless of the number of candidates. A cached answer is
+        yielded at once.
+        :param text: The Text to convert to SQL query.
+        :return: An asynchronous iterator over the chunks of the converted SQL query.
+        """
+        with self.span("convert_text_to_sql") as span:
+            with self.span("schema"):
+                database_schema = await self.data_connector.aget_database_schema()
+
+            answer, examples, cache_key = self._find_answer(text, database_schema, span)
+            if answer is not None:
+                with span.pause():
+                    yield answer
+                return
+
+            prompt = await self.acreate_prompt(text, database_schema, examples)
+
+            with self.span("llm") as llm_span:
+                self.llm_connector.set_last_usage(None)
+                chunks: List[Text] = []
+                async for chunk in self.llm_connector.astream_answer(prompt):
+                    if not chunks:
+                        chunk = chunk.lstrip()
+                        if not chunk:
+                            continue
+                    chunks.append(chunk)
+                    with span.pause(), llm_span.pause():
+                        yield chunk
+                llm_span.set_attributes(self.llm_connector.get_last_usage())
+            sql = "".join(chunks).strip()
+            self.logger.info(f"SQL query: {sql}")
+
+            if (
+                self.answer_cache is not None
+                and cache_key is not None
+                and self.candidates == 1
+            ):
+                self.answer_cache.set(cache_key, sql)
+
+    async def query(self, text: Text) -> List[Dict]:
+        """
+        Query the database.
+        :param text: The text to convert to SQL query and query the database.
+        :return: The query result.
+        """
+        with self.span("query"):
+            template = self.find_template(text)
+            if template is None:
+                generated_sql = await self.convert_text_to_sql(text)
+                sql, parameters = await self.acheck_query_cost(generated_sql), None
+            else:
+                sql, parameters = await self.acheck_template_cost(*template)
+            with self.span("execute") as span:
+                result, shared = await self.acoalesce_query(
+                    "query",
+                    sql,
+                    parameters,
+                    lambda: self.data_connector.aquery(sql, parameters=parameters),
+                )
+                span.set_attributes({"rows": len(result), "shared": shared})
+            if template is None:
+                await self.arecord_answer(text, generated_sql)
+            # Each caller gets its own list of the shared rows.
+            return list(result) if shared else result
+
+    async def query_df(self, text: Text) -> "pd.DataFrame":
+        """
+        Query the database and return the result as a Pandas DataFrame.
+        :param text: The text to convert to SQL query and query the database.
+        :return: A Pandas DataFrame containing the query result.
+        """
+        import pandas as pd
+
+        with self.span("query_df"):
+            template = self.find_template(text)
+            if template is None:
+                generated_sql = await self.convert_text_to_sql(text)
+                sql, parameters = await self.acheck_query_cost(generated_sql), None
+            else:
+                sql, parameters = await self.acheck_template_cost(*template)
+            with self.span("execute") as span:
+                (columns, records), shared = await self.acoalesce_query(
+                    "query_records",
+                    sql,
+                    parameters,
+                    lambda: self.data_connector.aquery_records(
+                        sql, parameters=parameters
+                    ),
+                )
+                span.set_attributes({"rows": len(records), "shared": shared})
+            if template is None:
+                await self.arecord_answer(text, generated_sql)
+            with self.span("dataframe"):
+                return pd.DataFrame.from_records(records, columns=columns)
@@ -0,0 +1,103 @@
+from typing import Text, Union
+
+from .async_text_to_sql import AsyncTextToSQL
+from .cost_guard import QueryCostGuard
+from .data_connectors.data_connector import DataConnector
+from .instrumentation import Instrumentation
+from .llm_connectors.llm_connector import LLMConnector
+from .text_to_sql_chat import TextToSQLChatMemory
+
+
+class AsyncTextToSQLChat(AsyncTextToSQL):
+    """
+    The class for converting text to SQL query and querying the database
+    asynchronously in a chat setting.
+    The database schema is reflected on the first message to build the system prompt,
+    so that creating the chat does not block the event loop.
+
+    Parameters:
+    -----------
+    llm_connector : LLMConnector
+        The LLMConnector to use for converting text to SQL query.
+    data_connector : DataConnector
+        The DataConnector to use for querying the database.
+    window_size : Union[int, None]
+        The size of the window to use when retrieving messages from memory.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, all messages will returned.
+    max_tokens : Union[int, None]
+        The maximum number of tokens in the messages sent to the LLM, including the
+        system prompt. The oldest messages are dropped first. This parameter is
+        optional, and defaults to None. If this parameter is not provided, messages are
+        not limited by tokens.
+    instrumentation : Instrumentation
+        The Instrumentation to notify of the duration and token usage of each stage
+        of the chat. This parameter is optional, and defaults to None. If this
+        parameter is not provided, the chat is not instrumented.
+    cost_guard : QueryCostGuard
+        The QueryCostGuard to check the estimated cost of each SQL query with before
+        it is executed. This parameter is optional, and defaults to None. If this
+        parameter is not provided, queries are executed without a pre-flight check.
+    """
+
+    def __init__(
+        self,
+        data_connector: DataConnector,
+        llm_connector: LLMConnector,
+        window_size: Union[int, None] = None,
+        max_tokens: Union[int, None] = None,
+        instrumentation: Union[Instrumentation, None] = None,
+        cost_guard: Union[QueryCostGuard, None] = None,
+    ) -> None:
+        super().__init__(
+            data_connector,
+            llm_connector,
+            instrumentation=instrumentation,
+            cost_guard=cost_guard,
+        )
+
+        # The system prompt is added to the memory on the first message.
+        self.memory = TextToSQLChatMemory(
+            "", window_size=window_size, max_tokens=max_tokens
+        )
+        self._system_prompt_loaded = False
+
+    async def _load_system_prompt(self) -> None:
+        """
+        Build the system prompt from the database schema and add it to the memory, if
+        it has not been built yet.
+        """
+        if self._system_prompt_loaded:
+            return
+
+        system_prompt = self.llm_connector.create_prompt(
+            "",
+            await self.data_connector.aget_database_schema(),
+            self.data_connector.get_connector_name(),
+        )
+        self.logger.info(f"System prompt: {system_prompt}")
+
+        self.memory.system_prompt = system_prompt
+        self._system_prompt_loaded = True
+
+    async def convert_text_to_sql(self, text: Text) -> Text:
+        """
+        Convert text to SQL query.
+        :param text: The Text to convert to SQL query.
+        :return: The converted SQL query.
+        """
+        with self.span("chat.convert_text_to_sql"):
+            self.memory.add_message("user", text)
+            with self.span("prompt"):
+                await self._load_system_prompt()
+                messages = self.memory.get_messages()
+
+            with self.span("llm") as llm_span:
+                self.llm_connector.set_last_usage(None)
+                sql = (await self.llm_connector.aget_answer(messages=messages)).strip()
+                llm_span.set_attributes(self.llm_connector.get_last_usage())
+            self.logger.info(f"SQL query: {sql}")
+
+            self.memory.add_message("system", sql)
+
+            return sql
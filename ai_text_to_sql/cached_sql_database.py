@@ -0,0 +1,76 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_community.utilities.sql_database import SQLDatabase
+
+from .data_connectors.data_connector import DataConnector
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """
+    A LangChain SQLDatabase that reuses the engine and the cached database schema of a
+    data connector, for the tools of the agent.
+    The tables are not reflected up front, the table names are taken from the cached
+    schema of the data connector, and the table info returned to the agent, which
+    includes sample rows, is memoized. The memoized table info is discarded when the
+    data connector reflects a new schema snapshot.
+
+    Parameters:
+    -----------
+    data_connector : DataConnector
+        The DataConnector whose engine and database schema to use.
+    sql_database_kwargs : Any
+        The other parameters of the SQLDatabase, e.g. sample_rows_in_table_info.
+    """
+
+    def __init__(self, data_connector: DataConnector, **sql_database_kwargs: Any):
+        # The table names are needed by the constructor of the SQLDatabase.
+        self.data_connector = data_connector
+        self._table_info: Dict[Tuple[Optional[Tuple[str, ...]], bool], str] = {}
+        self._database_schema: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+        super().__init__(
+            data_connector.connection,
+            lazy_table_reflection=True,
+            **sql_database_kwargs,
+        )
+
+    def get_usable_table_names(self) -> Iterable[str]:
+        """
+        Get the names of the tables the agent can use, from the cached database schema.
+        :return: The sorted names of the tables.
+        """
+        if self._include_tables:
+            return sorted(self._include_tables)
+        database_schema = self.data_connector.get_database_schema()
+        return sorted(set(database_schema) - self._ignore_tables)
+
+    def get_table_info(
+        self, table_names: Optional[List[str]] = None, get_col_comments: bool = False
+    ) -> str:
+        """
+        Get the information about the given tables, memoized until the data connector
+        reflects a new schema snapshot.
+        :param table_names: The names of the tables. This parameter is optional. If it
+                            is not provided, all the usable tables are described.
+        :param get_col_comments: Whether to include the comments of the columns.
+        :return: The CREATE TABLE statements of the tables, with sample rows.
+        """
+        key = (
+            tuple(sorted(table_names)) if table_names is not None else None,
+            get_col_comments,
+        )
+        database_schema = self.data_connector.get_database_schema()
+        with self._lock:
+            if database_schema is not self._database_schema:
+                # The schema changed, so the tables are reflected again.
+                self._table_info.clear()
+                self._metadata.clear()
+                self._database_schema = database_schema
+
+            table_info = self._table_info.get(key)
+            if table_info is None:
+                table_info = super().get_table_info(table_names, get_col_comments)
+                self._table_info[key] = table_info
+            return table_info
@@ -0,0 +1,55 @@
+import logging
+from typing import List, Text
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from .data_connectors.data_connector import DataConnector
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateSelector:
+    """
+    The class for selecting the SQL query to execute among several candidates
+    generated by the LLM.
+    Each candidate is validated by asking the database to explain it, which parses
+    and plans the query without executing it, and the first candidate that the
+    database can explain is selected.
+
+    To add a new validation, create a class that inherits from this class and
+    override the is_executable() method.
+    """
+
+    def is_executable(self, data_connector: DataConnector, sql: Text) -> bool:
+        """
+        Check whether a candidate SQL query can be executed on the database.
+        :param data_connector: The DataConnector the query will be executed with.
+        :param sql: The candidate SQL query.
+        :return: True if the database can explain the query, or if the data
+                 connector cannot explain queries.
+        """
+        try:
+            data_connector.explain(sql)
+        except NotImplementedError:
+            return True
+        except SQLAlchemyError as e:
+            logger.info(f"Rejected the candidate SQL query {sql}: {e}")
+            return False
+        return True
+
+    def select(self, data_connector: DataConnector, candidates: List[Text]) -> Text:
+        """
+        Select the SQL query to execute among the candidates.
+        :param data_connector: The DataConnector the query will be executed with.
+        :param candidates: The candidate SQL queries, in order of preference.
+        :return: The first executable candidate, or the first candidate if none of
+                 them is executable, so that it fails with the error of the database.
+        """
+        validated = set()
+        for candidate in candidates:
+            if candidate in validated:
+                continue
+            if self.is_executable(data_connector, candidate):
+                return candidate
+            validated.add(candidate)
+        return candidates[0]
@@ -0,0 +1,163 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Text
+
+# The longest value that is shown as a frequent value of a column.
+MAX_VALUE_LENGTH = 40
+
+# How many times more often than the average value of a column a value has to appear
+# in the sample to be one of its frequent values.
+FREQUENT_VALUE_RATIO = 1.25
+
+
+@dataclass
+class ColumnStatistics:
+    """
+    The statistics of a column, estimated from a sample of the rows of its table, as
+    returned by DataConnector.get_column_statistics().
+
+    Parameters:
+    -----------
+    type : Text
+        The type of the column. None if the type was not reflected.
+    distinct_values : float
+        The approximate number of distinct values in the column. None if the table is
+        empty.
+    null_fraction : float
+        The fraction of the sampled rows in which the column is null. None if the
+        table is empty.
+    frequent_values : List[Any]
+        The most frequent values of the column in the sample, the most frequent first.
+        Values that appear only once in the sample are not included.
+    sampled_rows : int
+        The number of rows the statistics were estimated from.
+    """
+
+    type: Optional[Text] = None
+    distinct_values: Optional[float] = None
+    null_fraction: Optional[float] = None
+    frequent_values: List[Any] = field(default_factory=list)
+    sampled_rows: int = 0
+
+
+def estimate_column_statistics(
+    values: Sequence[Any],
+    row_count: Optional[float] = None,
+    column_type: Optional[Text] = None,
+    frequent_values: int = 3,
+) -> ColumnStatistics:
+    """
+    Estimate the statistics of a column from a sample of its values.
+    The number of distinct values is extrapolated to the whole table with the
+    Haas-Stokes estimator, as PostgreSQL does, which scales up the values seen only
+    once in the sample. Frequent values are those that appear noticeably more often
+    than the average value. If the sample holds every row of the table, the
+    estimates are exact.
+    :param values: The sampled values of the column.
+    :param row_count: The estimated number of rows in the table. This parameter is
+                      optional. If it is not provided, the sample is assumed to hold
+                      every row of the table.
+    :param column_type: The type of the column. This parameter is optional.
+    :param frequent_values: The maximum number of frequent values to keep.
+    :return: The statistics of the column.
+    """
+    statistics = ColumnStatistics(type=column_type, sampled_rows=len(values))
+    if not values:
+        return statistics
+
+    non_null_values = [value for value in values if value is not None]
+    statistics.null_fraction = 1 - len(non_null_values) / len(values)
+    try:
+        counts = Counter(non_null_values)
+    except TypeError:
+        # The values are not hashable, e.g. JSON documents.
+        return statistics
+
+    if not counts:
+        statistics.distinct_values = 0.0
+        return statistics
+
+    sample_size = len(non_null_values)
+    population = max(row_count or 0, len(values)) * (1 - statistics.null_fraction)
+    if population <= sample_size:
+        statistics.distinct_values = float(len(counts))
+    else:
+        singletons = sum(1 for count in counts.values() if count == 1)
+        statistics.distinct_values = (
+            sample_size
+            * len(counts)
+            / (sample_size - singletons + singletons * sample_size / population)
+        )
+
+    # If there are only a few values, all those that repeat are frequent.
+    minimum_count = 2.0
+    if len(counts) > frequent_values:
+        minimum_count = max(
+            minimum_count, FREQUENT_VALUE_RATIO * sample_size / len(counts)
+        )
+    statistics.frequent_values = [
+        value
+        for value, count in counts.most_common()
+        if count >= minimum_count and _is_displayable(value)
+    ][:frequent_values]
+    return statistics
+
+
+def describe_column(column_name: Text, statistics: ColumnStatistics) -> Text:
+    """
+    Describe a column with its type and statistics, for the prompt.
+    E.g.: "Name NVARCHAR(120) [~25 distinct; 2% null; e.g. 'Rock', 'Jazz']"
+    :param column_name: The name of the column.
+    :param statistics: The statistics of the column.
+    :return: The description of the column.
+    """
+    description = column_name
+    if statistics.type:
+        description += f" {statistics.type}"
+
+    details: List[Text] = []
+    if statistics.distinct_values is not None:
+        details.append(f"~{round(statistics.distinct_values)} distinct")
+    if statistics.null_fraction:
+        details.append(f"{statistics.null_fraction:.0%} null")
+    if statistics.frequent_values:
+        details.append(
+            "e.g. "
+            + ", ".join(_format_value(value) for value in statistics.frequent_values)
+        )
+    if details:
+        description += f" [{'; '.join(details)}]"
+    return description
+
+
+def annotate_database_schema(database_schema: Dict, column_statistics: Dict) -> Dict:
+    """
+    Annotate the columns of a database schema with their types and statistics.
+    :param database_schema: The database schema.
+    :param column_statistics: The statistics of the columns of each table.
+    :return: A copy of the database schema in which the columns with statistics are
+             replaced by their descriptions.
+    """
+    return {
+        table_name: [
+            (
+                describe_column(column, column_statistics[table_name][column])
+                if column in column_statistics.get(table_name, {})
+                else column
+            )
+            for column in columns
+        ]
+        for table_name, columns in database_schema.items()
+    }
+
+
+def _is_displayable(value: Any) -> bool:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return False
+    return len(str(value)) <= MAX_VALUE_LENGTH
+
+
+def _format_value(value: Any) -> Text:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
@@ -0,0 +1,133 @@
+import logging
+import warnings
+from typing import List, Optional, Text
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from .data_connectors.data_connector import DataConnector, QueryPlan
+from .exceptions import QueryCostExceededException, QueryCostWarning
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("reject", "limit", "warn")
+
+
+class QueryCostGuard:
+    """
+    The class for checking the estimated cost of a generated SQL query before it is
+    executed.
+    The query is explained with the database's EXPLAIN statement, and the estimates of
+    the query planner are compared against the configured thresholds. Queries that
+    exceed a threshold are rejected, limited to a number of rows, or executed with a
+    warning.
+
+    Parameters:
+    -----------
+    max_rows : float
+        The maximum number of rows the query is estimated to return or read. This
+        parameter is optional, and defaults to None. If this parameter is not provided,
+        the estimated rows are not checked.
+    max_cost : float
+        The maximum estimated cost of the query, in the database's own units. This
+        parameter is optional, and defaults to None. If this parameter is not provided,
+        the estimated cost is not checked.
+    max_full_scans : int
+        The maximum number of tables that the query reads with a full scan. This
+        parameter is optional, and defaults to None. If this parameter is not provided,
+        full scans are not checked.
+    action : Text
+        What to do with a query that exceeds a threshold: 'reject' to raise a
+        QueryCostExceededException, 'limit' to limit the number of rows it returns, or
+        'warn' to issue a QueryCostWarning and execute it. This parameter is optional,
+        and defaults to 'reject'.
+    limit : int
+        The number of rows to limit queries that exceed a threshold to when the action
+        is 'limit'. This parameter is optional, and defaults to 1000.
+    """
+
+    def __init__(
+        self,
+        max_rows: Optional[float] = None,
+        max_cost: Optional[float] = None,
+        max_full_scans: Optional[int] = None,
+        action: Text = "reject",
+        limit: int = 1000,
+    ) -> None:
+        if action not in ACTIONS:
+            raise ValueError(f"The action must be one of {', '.join(ACTIONS)}.")
+
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.max_full_scans = max_full_scans
+        self.action = action
+        self.limit = limit
+
+    def get_violations(self, query_plan: QueryPlan) -> List[Text]:
+        """
+        Compare the estimates of a query plan against the thresholds.
+        :param query_plan: The query plan, as returned by DataConnector.explain().
+        :return: A description of each threshold that is exceeded.
+        """
+        violations = []
+        if (
+            self.max_rows is not None
+            and query_plan.estimated_rows is not None
+            and query_plan.estimated_rows > self.max_rows
+        ):
+            violations.append(
+                f"{query_plan.estimated_rows:.0f} estimated rows exceed the maximum "
+                f"of {self.max_rows:.0f}"
+            )
+        if (
+            self.max_cost is not None
+            and query_plan.estimated_cost is not None
+            and query_plan.estimated_cost > self.max_cost
+        ):
+            violations.append(
+                f"an estimated cost of {query_plan.estimated_cost:.2f} exceeds the "
+                f"maximum of {self.max_cost:.2f}"
+            )
+        if (
+            self.max_full_scans is not None
+            and len(query_plan.full_scans) > self.max_full_scans
+        ):
+            violations.append(
+                f"{len(query_plan.full_scans)} full scans "
+                f"({', '.join(query_plan.full_scans)}) exceed the maximum of "
+                f"{self.max_full_scans}"
+            )
+        return violations
+
+    def check(self, data_connector: DataConnector, query: Text) -> Text:
+        """
+        Check the estimated cost of a query before it is executed.
+        If the data connector cannot explain queries, or the query cannot be explained,
+        the query is returned unchanged and left to fail on execution if it is invalid.
+        :param data_connector: The DataConnector the query will be executed with.
+        :param query: The query to check.
+        :return: The query to execute, limited if it exceeds a threshold and the
+                 action is 'limit'.
+        """
+        try:
+            query_plan = data_connector.explain(query)
+        except NotImplementedError:
+            logger.debug(f"The cost of the query was not checked: {query}")
+            return query
+        except SQLAlchemyError as e:
+            logger.warning(f"The query could not be explained: {e}")
+            return query
+
+        violations = self.get_violations(query_plan)
+        if not violations:
+            return query
+
+        message = f"The query exceeds the cost thresholds: {'; '.join(violations)}."
+        if self.action == "reject":
+            raise QueryCostExceededException(f"{message} Query: {query}")
+        if self.action == "limit":
+            logger.warning(f"{message} Limiting it to {self.limit} rows.")
+            return data_connector.limit_query(query, self.limit)
+
+        warnings.warn(message, QueryCostWarning, stacklevel=2)
+        logger.warning(message)
+        return query
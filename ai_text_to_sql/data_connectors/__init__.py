@@ -1,8 +1,24 @@
-from ai_text_to_sql.data_connectors.mariadb_connector import MariaDBConnector
-from ai_text_to_sql.data_connectors.mssql_connector import MSSQLConnector
-from ai_text_to_sql.data_connectors.mysql_connector import MySQLConnector
-from ai_text_to_sql.data_connectors.postgresql_connector import PostgreSQLConnector
-from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from ai_text_to_sql.data_connectors.mariadb_connector import MariaDBConnector
+    from ai_text_to_sql.data_connectors.mssql_connector import MSSQLConnector
+    from ai_text_to_sql.data_connectors.mysql_connector import MySQLConnector
+    from ai_text_to_sql.data_connectors.postgresql_connector import (
+        PostgreSQLConnector,
+    )
+    from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+# The connectors are imported on first access, so that using one database does not
+# import the drivers and dialects of all the others.
+_CONNECTOR_MODULES = {
+    "MariaDBConnector": "mariadb_connector",
+    "MSSQLConnector": "mssql_connector",
+    "MySQLConnector": "mysql_connector",
+    "PostgreSQLConnector": "postgresql_connector",
+    "SQLiteConnector": "sqlite_connector",
+}
 
 __all__ = [
     "MariaDBConnector",
@@ -11,3 +27,14 @@ __all__ = [
     "PostgreSQLConnector",
     "SQLiteConnector",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _CONNECTOR_MODULES:
+        module = importlib.import_module(f".{_CONNECTOR_MODULES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,8 +1,95 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Text
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Text, Tuple
 
 import sqlalchemy
-from sqlalchemy import inspect, text
+from sqlalchemy import inspect, make_url, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ai_text_to_sql.column_statistics import (
+    ColumnStatistics,
+    estimate_column_statistics,
+)
+from ai_text_to_sql.exceptions import (
+    ConnectionCreationException,
+    QueryTimeoutException,
+    RowLimitExceededException,
+)
+from ai_text_to_sql.result_cache import (
+    ResultCache,
+    get_query_tables,
+    is_read_only_query,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryPlan:
+    """
+    The estimates of the query planner of the database for a query, as returned by
+    DataConnector.explain().
+
+    Parameters:
+    -----------
+    estimated_rows : float
+        The estimated number of rows the query returns or, for databases that do not
+        estimate the output, reads. None if the database did not provide an estimate.
+    estimated_cost : float
+        The estimated cost of the query, in the database's own units. None if the
+        database did not provide an estimate.
+    full_scans : List[Text]
+        The tables that are read with a full scan.
+    plan : Any
+        The raw plan returned by the database.
+    """
+
+    estimated_rows: Optional[float] = None
+    estimated_cost: Optional[float] = None
+    full_scans: List[Text] = field(default_factory=list)
+    plan: Any = None
+
+
+class ReadOnlySchema(dict):
+    """
+    A read-only snapshot of the database schema, as returned by
+    DataConnector.get_database_schema().
+    The cached snapshot is shared by every caller and caches are keyed on its
+    identity, so it cannot be modified and the columns of each table are tuples. It is
+    a dictionary otherwise, e.g. it can be serialized to JSON; use dict() to get a
+    modifiable copy.
+
+    Parameters:
+    -----------
+    database_schema : Dict
+        The columns of each table.
+    """
+
+    def __init__(self, database_schema: Dict) -> None:
+        super().__init__(
+            (table_name, tuple(columns))
+            for table_name, columns in database_schema.items()
+        )
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError(
+            "The database schema is read-only; use dict() to get a modifiable copy."
+        )
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self) -> Tuple:
+        return type(self), (dict(self),)
 
 
 class DataConnector(ABC):
@@ -16,15 +103,92 @@ class DataConnector(ABC):
     4. Implement the create_connection() abstract method.
     5. Implement the get_tables() and get_columns() methods if the database does not
        support SQLAlchemy Inspector.
-    6. Add an import statement for the new class in the __init__.py file in the
-       data_connectors directory.
+       Optionally, set the 'schema_query' attribute to a query that returns the
+       table name, column name and column type of every column in the database,
+       ordered by table and column position, to reflect the schema in a single
+       round trip.
+       Optionally, set the 'schema_fingerprint_query' attribute to a cheap query
+       whose result changes whenever the schema changes, e.g. a catalog version
+       counter, so that an expired schema snapshot is only reflected again if the
+       schema has changed.
+       Optionally, set the 'async_driver' attribute to the name of an asyncio
+       SQLAlchemy driver for the database to support asynchronous queries.
+       Optionally, implement the set_statement_timeout(), reset_statement_timeout()
+       and is_timeout_error() methods to support query timeouts.
+       Optionally, implement the estimate_row_count() and get_sample_query()
+       methods to collect column statistics from a sample of each table, e.g. with
+       TABLESAMPLE, instead of its first rows.
+    6. Add the new class and its module to the lazily imported connectors in the
+       __init__.py file in the data_connectors directory.
+
+    Parameters:
+    -----------
+    schema_cache_ttl : float
+        The number of seconds for which the reflected database schema is cached.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the schema is cached until refresh_schema() or invalidate_schema()
+        is called. If the connector can fingerprint the schema, an expired snapshot
+        is kept as long as its fingerprint has not changed, so the TTL is how often
+        the fingerprint is checked; otherwise a value of 0 disables caching.
+    timeout : float
+        The maximum number of seconds a query may run for before it is cancelled by
+        the database. This parameter is optional, and defaults to None. If this
+        parameter is not provided, queries are not timed out. It can be overridden for
+        a single query.
+    max_rows : int
+        The maximum number of rows a query may return. Queries returning more rows are
+        cancelled. This parameter is optional, and defaults to None. If this parameter
+        is not provided, the number of rows is not limited. It can be overridden for a
+        single query.
+    result_cache : ResultCache
+        The cache of the results of read-only queries, which can be shared by several
+        connectors. This parameter is optional, and defaults to None. If this
+        parameter is not provided, every query is executed on the database.
+    statistics_time_budget : float
+        The total number of seconds that may be spent collecting the statistics of
+        the columns, e.g. their approximate number of distinct values and their most
+        frequent values, from a sample of each table after the schema is reflected.
+        The statistics are collected in a background thread and cached along with
+        the schema. This parameter is optional, and defaults to None. If this
+        parameter is not provided, no statistics are collected.
     """
 
     name = "Base"
+    schema_query: Optional[Text] = None
+    schema_fingerprint_query: Optional[Text] = None
+    async_driver: Optional[Text] = None
+    # The maximum number of rows sampled from each table to collect its statistics.
+    statistics_sample_rows = 1000
+
+    def __init__(
+        self,
+        schema_cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        result_cache: Optional[ResultCache] = None,
+        statistics_time_budget: Optional[float] = None,
+    ) -> None:
+        self.schema_cache_ttl = schema_cache_ttl
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.result_cache = result_cache
+        self.statistics_time_budget = statistics_time_budget
+        self._connector_identity: Optional[Text] = None
+        self.schema_cache_hits = 0
+        self.schema_cache_misses = 0
+        self._database_schema: Optional[Dict] = None
+        self._column_types: Dict = {}
+        self._foreign_keys: Optional[Dict] = None
+        self._comments: Optional[Dict] = None
+        self._schema_fingerprint: Optional[Text] = None
+        self._schema_reflected_at = 0.0
+        self._column_statistics: Dict[Text, Dict[Text, ColumnStatistics]] = {}
+        self._statistics_thread: Optional[threading.Thread] = None
+        self._schema_lock = threading.Lock()
 
-    def __init__(self) -> None:
         self.connection = self.create_connection()
         self.inspector = self.create_inspector()
+        self._async_connection: Optional["AsyncEngine"] = None
 
     @abstractmethod
     def create_connection(self) -> Any:
@@ -71,27 +235,837 @@ class DataConnector(ABC):
     def get_database_schema(self) -> Dict:
         """
         Get the database schema as a dictionary.
+        The schema is served from the cached snapshot if it has not expired, or if its
+        fingerprint has not changed since it was reflected; otherwise the database is
+        reflected again. As long as the snapshot is served, the same dictionary is
+        returned, so caches keyed on it remain valid. The snapshot is read-only.
+        If the schema is cached without a TTL, refresh_schema() has to be called
+        after the schema is changed, e.g. by DDL statements.
+        :return: A read-only dictionary containing the database schema.
+        """
+        with self._schema_lock:
+            if self._database_schema is not None and not self._is_schema_expired():
+                self.schema_cache_hits += 1
+                return self._database_schema
+
+            fingerprint = self.schema_fingerprint()
+            if (
+                self._database_schema is not None
+                and fingerprint is not None
+                and fingerprint == self._schema_fingerprint
+            ):
+                self.schema_cache_hits += 1
+                self._schema_reflected_at = time.monotonic()
+                return self._database_schema
+
+            self.schema_cache_misses += 1
+            return self._reflect_and_cache_schema(fingerprint)
+
+    def refresh_schema(self) -> Dict:
+        """
+        Reflect the database schema again, replacing the cached snapshot.
+        :return: A read-only dictionary containing the refreshed database schema.
+        """
+        with self._schema_lock:
+            return self._reflect_and_cache_schema(self.schema_fingerprint())
+
+    def invalidate_schema(self) -> None:
+        """
+        Discard the cached database schema snapshot.
+        The schema will be reflected again the next time it is requested.
+        """
+        with self._schema_lock:
+            self._database_schema = None
+            self._column_types = {}
+            self._foreign_keys = None
+            self._comments = None
+            self._column_statistics = {}
+            self._schema_fingerprint = None
+            self._schema_reflected_at = 0.0
+
+    def schema_fingerprint(self) -> Optional[Text]:
+        """
+        Get a fingerprint of the database schema, which changes whenever the schema
+        changes, without reflecting the schema. The fingerprint is computed with the
+        schema_fingerprint_query, using the cheapest signal the database provides.
+        :return: The fingerprint, or None if the connector cannot fingerprint the
+                 schema.
+        """
+        if self.schema_fingerprint_query is None:
+            return None
+
+        try:
+            with self.connection.connect() as conn:
+                rows = conn.execute(
+                    text(self.schema_fingerprint_query),
+                    self.get_schema_query_parameters(),
+                ).fetchall()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not fingerprint the {self.name} schema: {e}")
+            return None
+
+        return hashlib.sha256(repr(rows).encode("utf-8")).hexdigest()
+
+    def get_column_types(self) -> Dict:
+        """
+        Get the types of the columns in the cached database schema.
+        Column types are only available when the schema is reflected with the
+        schema_query; tables reflected through the inspector are omitted.
+        E.g.: {"table1": {"column1": "INTEGER", "column2": "TEXT"}}
+        :return: A dictionary mapping table names to column types.
+        """
+        self.get_database_schema()
+        return self._column_types
+
+    def get_foreign_keys(self) -> Dict:
+        """
+        Get the tables referenced by foreign keys from each table in the database.
+        The foreign keys are reflected once and cached along with the database schema.
+        E.g.: {"table1": ["table2"], "table2": []}
+        :return: A dictionary mapping table names to the tables they reference.
+        """
+        self.get_database_schema()
+        with self._schema_lock:
+            if self._foreign_keys is None:
+                self._foreign_keys = self.reflect_foreign_keys()
+            return self._foreign_keys
+
+    def reflect_foreign_keys(self) -> Dict:
+        """
+        Reflect the foreign keys from the database, bypassing the cache.
+        This method can be overridden by subclasses if the database does not support
+        the inspector.
+        :return: A dictionary mapping table names to the tables they reference.
+        """
+        try:
+            multi_foreign_keys = self.inspector.get_multi_foreign_keys()
+        except (NotImplementedError, SQLAlchemyError) as e:
+            logger.warning(f"Could not reflect the {self.name} foreign keys: {e}")
+            return {}
+
+        return {
+            table_name: sorted(
+                {foreign_key["referred_table"] for foreign_key in foreign_keys}
+            )
+            for (_, table_name), foreign_keys in multi_foreign_keys.items()
+        }
+
+    def get_comments(self) -> Dict:
+        """
+        Get the comments on the tables and columns in the database.
+        The comments are reflected once and cached along with the database schema.
+        E.g.: {"table1": {"comment": "The orders.", "columns": {"column1": "In USD."}}}
+        :return: A dictionary mapping the names of the commented tables, or of the
+                 tables with commented columns, to the comment on the table, or None,
+                 and the comments on its columns.
+        """
+        self.get_database_schema()
+        with self._schema_lock:
+            if self._comments is None:
+                self._comments = self.reflect_comments()
+            return self._comments
+
+    def reflect_comments(self) -> Dict:
+        """
+        Reflect the comments on the tables and columns from the database, bypassing
+        the cache.
+        This method can be overridden by subclasses if the database does not support
+        the inspector.
+        :return: A dictionary mapping the names of the commented tables, or of the
+                 tables with commented columns, to the comment on the table, or None,
+                 and the comments on its columns.
+        """
+        comments: Dict[Text, Dict] = {}
+        try:
+            multi_table_comments = self.inspector.get_multi_table_comment()
+            multi_columns = self.inspector.get_multi_columns()
+        except NotImplementedError:
+            # The database does not support comments, e.g. SQLite.
+            return comments
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not reflect the {self.name} comments: {e}")
+            return comments
+
+        for (_, table_name), table_comment in multi_table_comments.items():
+            if table_comment.get("text"):
+                comments[table_name] = {
+                    "comment": table_comment["text"],
+                    "columns": {},
+                }
+        for (_, table_name), columns in multi_columns.items():
+            for column in columns:
+                if column.get("comment"):
+                    table_comments = comments.setdefault(
+                        table_name, {"comment": None, "columns": {}}
+                    )
+                    table_comments["columns"][column["name"]] = column["comment"]
+        return comments
+
+    def get_column_statistics(self) -> Dict:
+        """
+        Get the statistics of the columns in the cached database schema snapshot.
+        The statistics are collected in a background thread after the schema is
+        reflected, so this method neither reflects the schema nor waits for them: it
+        returns the statistics of the tables sampled so far, or an empty dictionary
+        if the connector has no statistics_time_budget. A new dictionary is returned
+        whenever the statistics of a table are added, so caches keyed on it remain
+        valid.
+        E.g.: {"table1": {"column1": ColumnStatistics(...)}}
+        :return: A dictionary mapping table names to the statistics of their columns.
+        """
+        return self._column_statistics
+
+    def collect_column_statistics(
+        self, database_schema: Dict, time_budget: Optional[float] = None
+    ) -> Dict:
+        """
+        Collect the statistics of the columns of a schema snapshot, one table at a
+        time, until the time budget is spent. Each table is sampled with the query
+        returned by get_sample_query(), under a statement timeout of the remaining
+        budget, so that no table is read in full. The statistics of each table are
+        cached as soon as they are collected, as long as the snapshot is still the
+        cached one.
+        :param database_schema: The schema snapshot, as returned by
+                                get_database_schema().
+        :param time_budget: The total number of seconds the sampling may take. This
+                            parameter is optional. If it is not provided, the
+                            statistics_time_budget of the connector is used, and if
+                            neither is set, every table is sampled.
+        :return: A dictionary mapping table names to the statistics of their columns.
+        """
+        time_budget = (
+            self.statistics_time_budget if time_budget is None else time_budget
+        )
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        column_types = self._column_types
+        try:
+            with self.connection.connect() as conn:
+                for table_name, columns in database_schema.items():
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        break
+                    if self._database_schema is not database_schema:
+                        break
+
+                    try:
+                        table_statistics = self._sample_table_statistics(
+                            conn,
+                            table_name,
+                            columns,
+                            column_types.get(table_name, {}),
+                            remaining,
+                        )
+                    except (SQLAlchemyError, QueryTimeoutException) as e:
+                        logger.warning(
+                            f"Could not collect the statistics of the {table_name} "
+                            f"table: {e}"
+                        )
+                        conn.rollback()
+                        continue
+
+                    with self._schema_lock:
+                        if self._database_schema is not database_schema:
+                            break
+                        self._column_statistics = {
+                            **self._column_statistics,
+                            table_name: table_statistics,
+                        }
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not collect the {self.name} column statistics: {e}")
+
+        return self._column_statistics
+
+    def _sample_table_statistics(
+        self,
+        conn: sqlalchemy.Connection,
+        table_name: Text,
+        columns: List[Text],
+        column_types: Dict[Text, Text],
+        timeout: Optional[float],
+    ) -> Dict[Text, ColumnStatistics]:
+        sample_rows = self.statistics_sample_rows
+        # The sample is bounded even if the connector does not support timeouts.
+        supports_timeouts = (
+            type(self).set_statement_timeout is not DataConnector.set_statement_timeout
+        )
+        with self.query_limits(conn, timeout) if supports_timeouts else nullcontext():
+            row_count = self.estimate_row_count(conn, table_name)
+            query, parameters = self.get_sample_query(table_name, columns, row_count)
+            result = conn.execute(text(query), parameters)
+            rows = result.fetchmany(sample_rows)
+            result.close()
+
+        # Small tables are read in full, so their statistics are exact.
+        if len(rows) < sample_rows and (row_count is None or row_count <= sample_rows):
+            row_count = len(rows)
+
+        return {
+            column: estimate_column_statistics(
+                [row[index] for row in rows], row_count, column_types.get(column)
+            )
+            for index, column in enumerate(columns)
+        }
+
+    def estimate_row_count(
+        self, conn: sqlalchemy.Connection, table_name: Text
+    ) -> Optional[float]:
+        """
+        Estimate the number of rows in a table without counting them, e.g. from the
+        statistics of the query planner.
+        This method can be overridden by subclasses for databases that keep such
+        estimates in their catalog.
+        :param conn: The connection to the database.
+        :param table_name: The name of the table.
+        :return: The estimated number of rows, or None if there is no estimate.
+        """
+        return None
+
+    def get_sample_query(
+        self, table_name: Text, columns: List[Text], row_count: Optional[float]
+    ) -> Tuple[Text, Dict[Text, Any]]:
+        """
+        Get a query that returns a sample of at most statistics_sample_rows rows of
+        a table, without reading the whole table.
+        This method can be overridden by subclasses for databases that can sample
+        the pages of a table, or that do not support the LIMIT clause.
+        :param table_name: The name of the table.
+        :param columns: The columns to select.
+        :param row_count: The estimated number of rows in the table, or None if
+                          there is no estimate.
+        :return: A tuple containing the query and its bind parameters.
+        """
+        return (
+            f"SELECT {self.quote_column_names(columns)} "
+            f"FROM {self.quote_table_name(table_name)} LIMIT :sample_rows",
+            {"sample_rows": self.statistics_sample_rows},
+        )
+
+    def quote_table_name(self, table_name: Text) -> Text:
+        """
+        Quote the name of a table of the reflected schema for use in a query.
+        This method can be overridden by subclasses that reflect a schema other than
+        the default one, to qualify the name with it.
+        :param table_name: The name of the table.
+        :return: The quoted name of the table.
+        """
+        return self.connection.dialect.identifier_preparer.quote(table_name)
+
+    def quote_column_names(self, columns: List[Text]) -> Text:
+        """
+        Quote the names of columns for use in a select list.
+        :param columns: The names of the columns.
+        :return: The quoted names, separated by commas.
+        """
+        preparer = self.connection.dialect.identifier_preparer
+        return ", ".join(preparer.quote(column) for column in columns)
+
+    def get_schema_cache_info(self) -> Dict:
+        """
+        Get statistics about the schema cache.
+        :return: A dictionary containing the number of hits and misses, the TTL, the
+                 schema fingerprint of the cached snapshot and its age in seconds
+                 (None if nothing is cached).
+        """
+        return {
+            "hits": self.schema_cache_hits,
+            "misses": self.schema_cache_misses,
+            "ttl": self.schema_cache_ttl,
+            "fingerprint": self._schema_fingerprint,
+            "age": (
+                time.monotonic() - self._schema_reflected_at
+                if self._database_schema is not None
+                else None
+            ),
+        }
+
+    def _is_schema_expired(self) -> bool:
+        if self.schema_cache_ttl is None:
+            return False
+        return time.monotonic() - self._schema_reflected_at >= self.schema_cache_ttl
+
+    def _reflect_and_cache_schema(self, fingerprint: Optional[Text] = None) -> Dict:
+        # The inspector memoizes its own results, so it has to be cleared for the
+        # reflection to observe changes made to the database.
+        if hasattr(self.inspector, "clear_cache"):
+            self.inspector.clear_cache()
+
+        reflected_schema, column_types = self._reflect_schema_snapshot()
+        database_schema = ReadOnlySchema(reflected_schema)
+        self._database_schema = database_schema
+        self._column_types = column_types
+        self._foreign_keys = None
+        self._comments = None
+        self._column_statistics = {}
+        # The fingerprint is taken before the reflection, so that a change made
+        # during the reflection is detected the next time the snapshot expires.
+        self._schema_fingerprint = fingerprint
+        self._schema_reflected_at = time.monotonic()
+
+        if self.statistics_time_budget is not None:
+            self._statistics_thread = threading.Thread(
+                target=self.collect_column_statistics,
+                args=(database_schema, self.statistics_time_budget),
+                name=f"{self.name} column statistics",
+                daemon=True,
+            )
+            self._statistics_thread.start()
+        return database_schema
+
+    def reflect_database_schema(self) -> Dict:
+        """
+        Reflect the database schema from the database, bypassing the cache.
+        If the connector defines a schema_query, the schema is reflected with a single
+        query; otherwise the tables and columns are retrieved one table at a time.
         :return: A dictionary containing the database schema.
         """
+        return self._reflect_schema_snapshot()[0]
+
+    def get_schema_query_parameters(self) -> Dict:
+        """
+        Get the bind parameters for the schema_query.
+        This method can be overridden by subclasses whose schema_query is
+        parameterized, e.g. by the name of the schema to reflect.
+        :return: A dictionary of bind parameters.
+        """
+        return {}
+
+    def _reflect_schema_snapshot(self) -> Tuple[Dict, Dict]:
+        if self.schema_query is not None:
+            try:
+                return self._reflect_schema_with_query(self.schema_query)
+            except SQLAlchemyError as e:
+                logger.warning(
+                    f"Could not reflect the {self.name} schema in bulk, falling back "
+                    f"to the inspector: {e}"
+                )
+
         database_schema = {}
         tables = self.get_tables()
         for table in tables:
             columns = self.get_columns(table)
             database_schema[table] = columns
 
-        return database_schema
+        return database_schema, {}
+
+    def _reflect_schema_with_query(self, schema_query: Text) -> Tuple[Dict, Dict]:
+        database_schema: Dict[Text, List[Text]] = {}
+        column_types: Dict[Text, Dict[Text, Text]] = {}
+        with self.connection.connect() as conn:
+            result = conn.execute(
+                text(schema_query), self.get_schema_query_parameters()
+            )
+            for table_name, column_name, column_type in result:
+                database_schema.setdefault(table_name, []).append(column_name)
+                column_types.setdefault(table_name, {})[column_name] = str(column_type)
+
+        return database_schema, column_types
 
-    def query(self, query: Text) -> List[Dict]:
+    def query(
+        self,
+        query: Text,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> List[Dict]:
         """
         Execute a query on the database.
         This method must be implemented by subclasses if the given implementation
         is not sufficient.
         :param query: The query to execute.
+        :param timeout: The maximum number of seconds the query may run for. This
+                        parameter is optional. If it is not provided, the timeout of
+                        the connector is used.
+        :param max_rows: The maximum number of rows the query may return. This
+                         parameter is optional. If it is not provided, the max_rows
+                         of the connector is used.
+        :param parameters: The values of the bind parameters of the query, which are
+                           given in the :name format. This parameter is optional.
         :return: The result of the query.
         """
+        cached_rows = self._get_cached_result(query, "rows", max_rows, parameters)
+        if cached_rows is not None:
+            return list(cached_rows)
+
+        with self.connection.connect() as conn:
+            rows = self._execute_query(conn, query, timeout, max_rows, parameters)
+        self._cache_result(query, "rows", tuple(rows), parameters)
+        return rows
+
+    def _execute_query(
+        self,
+        conn: sqlalchemy.Connection,
+        query: Text,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> List:
+        max_rows = self.max_rows if max_rows is None else max_rows
+        with self.query_limits(conn, timeout):
+            result = conn.execute(text(query), parameters or {})
+            if max_rows is None:
+                return list(result.fetchall())
+
+            rows = list(result.fetchmany(max_rows + 1))
+            result.close()
+        self._check_row_limit(len(rows), max_rows)
+        return rows
+
+    def query_records(
+        self,
+        query: Text,
+        batch_size: int = 10000,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Tuple[List[Text], List[Tuple]]:
+        """
+        Execute a query on the database and return the column names and the rows as
+        plain tuples.
+        The query is executed on the DBAPI cursor directly, which avoids building a
+        SQLAlchemy Row object for every row. The query is passed to the driver as is,
+        without any bind parameter processing, unless parameters are given.
+        :param query: The query to execute.
+        :param batch_size: The number of rows to fetch from the cursor at a time.
+        :param timeout: The maximum number of seconds the query may run for. This
+                        parameter is optional. If it is not provided, the timeout of
+                        the connector is used.
+        :param max_rows: The maximum number of rows the query may return. This
+                         parameter is optional. If it is not provided, the max_rows
+                         of the connector is used.
+        :param parameters: The values of the bind parameters of the query, which are
+                           given in the :name format. This parameter is optional.
+        :return: A tuple containing the column names and the rows of the result.
+        """
+        cached_records = self._get_cached_result(query, "records", max_rows, parameters)
+        if cached_records is not None:
+            return list(cached_records[0]), list(cached_records[1])
+
+        with self.connection.connect() as conn:
+            columns, records = self._fetch_records(
+                conn, query, batch_size, timeout, max_rows, parameters
+            )
+        self._cache_result(
+            query, "records", (tuple(columns), tuple(records)), parameters
+        )
+        return columns, records
+
+    def _fetch_records(
+        self,
+        conn: sqlalchemy.Connection,
+        query: Text,
+        batch_size: int = 10000,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Tuple[List[Text], List[Tuple]]:
+        max_rows = self.max_rows if max_rows is None else max_rows
+        if parameters:
+            # SQLAlchemy passes the bind parameters in the format of the driver.
+            with self.query_limits(conn, timeout):
+                result = conn.execute(text(query), parameters)
+                columns = list(result.keys())
+                if max_rows is None:
+                    records = [tuple(row) for row in result.fetchall()]
+                else:
+                    records = [tuple(row) for row in result.fetchmany(max_rows + 1)]
+                result.close()
+        else:
+            columns, records = self._fetch_cursor_records(
+                conn, query, batch_size, timeout, max_rows
+            )
+
+        if max_rows is not None:
+            self._check_row_limit(len(records), max_rows)
+        return columns, records
+
+    def _fetch_cursor_records(
+        self,
+        conn: sqlalchemy.Connection,
+        query: Text,
+        batch_size: int,
+        timeout: Optional[float],
+        max_rows: Optional[int],
+    ) -> Tuple[List[Text], List[Tuple]]:
+        with self.query_limits(conn, timeout):
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(query)
+                if cursor.description is None:
+                    return [], []
+
+                columns = [column[0] for column in cursor.description]
+                records: List[Tuple] = []
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    records.extend(rows)
+                    if max_rows is not None and len(records) > max_rows:
+                        break
+            finally:
+                cursor.close()
+        return columns, records
+
+    def query_iter(
+        self,
+        query: Text,
+        batch_size: int = 1000,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+    ) -> Iterator[List]:
+        """
+        Execute a query on the database and stream the result in batches.
+        A server-side cursor is used where the database driver supports one, so that
+        only one batch of rows is held in memory at a time. The connection is held
+        until the iterator is exhausted or closed.
+        :param query: The query to execute.
+        :param batch_size: The maximum number of rows in each batch.
+        :param timeout: The maximum number of seconds the query may run for, while
+                        the result is streamed. This parameter is optional. If it is
+                        not provided, the timeout of the connector is used.
+        :param max_rows: The maximum number of rows the query may return. The batches
+                         within the limit are yielded before the error is raised. This
+                         parameter is optional. If it is not provided, the max_rows
+                         of the connector is used.
+        :return: An iterator over lists of rows.
+        """
+        for _, rows in self._iter_batches(query, batch_size, timeout, max_rows):
+            if rows:
+                yield rows
+
+    def query_records_iter(
+        self,
+        query: Text,
+        batch_size: int = 1000,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Iterator[Tuple[List[Text], List[Tuple]]]:
+        """
+        Execute a query on the database and stream the column names and the rows, as
+        plain tuples, in batches.
+        As with query_iter(), a server-side cursor is used where the database driver
+        supports one. A result without rows yields a single batch without rows, so
+        that the column names are always available.
+        :param query: The query to execute.
+        :param batch_size: The maximum number of rows in each batch.
+        :param timeout: The maximum number of seconds the query may run for, while
+                        the result is streamed. This parameter is optional. If it is
+                        not provided, the timeout of the connector is used.
+        :param max_rows: The maximum number of rows the query may return. The batches
+                         within the limit are yielded before the error is raised. This
+                         parameter is optional. If it is not provided, the max_rows
+                         of the connector is used.
+        :param parameters: The values of the bind parameters of the query, which are
+                           given in the :name format. This parameter is optional.
+        :return: An iterator over tuples containing the column names and a list of
+                 rows.
+        """
+        for columns, rows in self._iter_batches(
+            query, batch_size, timeout, max_rows, parameters
+        ):
+            yield columns, [tuple(row) for row in rows]
+
+    def _iter_batches(
+        self,
+        query: Text,
+        batch_size: int,
+        timeout: Optional[float],
+        max_rows: Optional[int],
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Iterator[Tuple[List[Text], List]]:
+        max_rows = self.max_rows if max_rows is None else max_rows
         with self.connection.connect() as conn:
-            result = conn.execute(text(query))
-        return result.fetchall()
+            with self.query_limits(conn, timeout):
+                result = conn.execution_options(
+                    stream_results=True, yield_per=batch_size
+                ).execute(text(query), parameters or {})
+                if not result.returns_rows:
+                    yield [], []
+                    return
+
+                columns = list(result.keys())
+                row_count = 0
+                for partition in result.partitions(batch_size):
+                    row_count += len(partition)
+                    if max_rows is not None and row_count > max_rows:
+                        result.close()
+                        self._check_row_limit(row_count, max_rows)
+                    yield columns, partition
+                if row_count == 0:
+                    yield columns, []
+
+    @contextmanager
+    def query_limits(
+        self, conn: sqlalchemy.Connection, timeout: Optional[float] = None
+    ) -> Iterator[None]:
+        """
+        Apply the statement timeout to the queries executed on a connection within
+        the context, and translate the error raised by the database when the timeout
+        is hit into a QueryTimeoutException.
+        :param conn: The connection to apply the timeout to.
+        :param timeout: The maximum number of seconds a query may run for. This
+                        parameter is optional. If it is not provided, the timeout of
+                        the connector is used.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            yield
+            return
+
+        self.set_statement_timeout(conn, timeout)
+        try:
+            yield
+        except Exception as e:
+            if self.is_timeout_error(getattr(e, "orig", None) or e):
+                raise QueryTimeoutException(
+                    f"The query was cancelled because it exceeded the timeout of "
+                    f"{timeout} seconds."
+                ) from e
+            raise
+        finally:
+            try:
+                self.reset_statement_timeout(conn)
+            except Exception as e:
+                # The connection must not be returned to the pool with the timeout.
+                logger.warning(f"Could not reset the statement timeout: {e}")
+                conn.invalidate()
+
+    def set_statement_timeout(
+        self, conn: sqlalchemy.Connection, timeout: float
+    ) -> None:
+        """
+        Set the timeout of the queries executed on a connection, so that the database
+        cancels them when they run for too long.
+        This method must be implemented by subclasses to support timeouts.
+        :param conn: The connection to set the timeout of.
+        :param timeout: The maximum number of seconds a query may run for.
+        """
+        raise NotImplementedError(
+            f"The {self.name} connector does not support query timeouts."
+        )
+
+    def reset_statement_timeout(self, conn: sqlalchemy.Connection) -> None:
+        """
+        Remove the timeout set by set_statement_timeout() from a connection before it
+        is returned to the pool.
+        This method can be overridden by subclasses whose timeout outlives the
+        transaction of the query.
+        :param conn: The connection to reset the timeout of.
+        """
+
+    def is_timeout_error(self, error: BaseException) -> bool:
+        """
+        Check whether an error was raised by the database driver because a query
+        exceeded the statement timeout.
+        This method must be implemented by subclasses to support timeouts.
+        :param error: The error raised by the database driver.
+        :return: True if the query was cancelled because of the timeout.
+        """
+        return False
+
+    def get_connector_identity(self) -> Text:
+        """
+        Get a string identifying the database of the connector, which keys its results
+        in a shared result cache.
+        :return: The connection string of the database, or a string unique to the
+                 connector if it has no connection string.
+        """
+        if self._connector_identity is None:
+            try:
+                self._connector_identity = self.get_connection_string()
+            except NotImplementedError:
+                self._connector_identity = f"{self.name}:{id(self)}"
+        return self._connector_identity
+
+    def invalidate_results(self, *tables: Text) -> int:
+        """
+        Discard the cached results of the queries that read any of the given tables,
+        e.g. after writing to them.
+        :param tables: The names of the tables that changed.
+        :return: The number of results discarded.
+        """
+        if self.result_cache is None:
+            return 0
+        return self.result_cache.invalidate(*tables)
+
+    def _get_result_cache_key(
+        self, query: Text, kind: Text, parameters: Optional[Dict[Text, Any]] = None
+    ) -> Optional[Text]:
+        if self.result_cache is None:
+            return None
+        # Only the results of read-only queries are cached.
+        if not is_read_only_query(query):
+            return None
+        return self.result_cache.create_key(
+            self.get_connector_identity(), query, kind, parameters
+        )
+
+    def _get_cached_result(
+        self,
+        query: Text,
+        kind: Text,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Optional[Any]:
+        cache_key = self._get_result_cache_key(query, kind, parameters)
+        if cache_key is None or self.result_cache is None:
+            return None
+
+        result = self.result_cache.get(cache_key)
+        if result is not None:
+            max_rows = self.max_rows if max_rows is None else max_rows
+            if max_rows is not None:
+                rows = result if kind == "rows" else result[1]
+                self._check_row_limit(len(rows), max_rows)
+        return result
+
+    def _cache_result(
+        self,
+        query: Text,
+        kind: Text,
+        result: Any,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> None:
+        cache_key = self._get_result_cache_key(query, kind, parameters)
+        if cache_key is None or self.result_cache is None:
+            return
+        self.result_cache.set(cache_key, result, get_query_tables(query))
+
+    @staticmethod
+    def _check_row_limit(row_count: int, max_rows: int) -> None:
+        if row_count > max_rows:
+            raise RowLimitExceededException(
+                f"The query was cancelled because it returned more than the maximum "
+                f"of {max_rows} rows."
+            )
+
+    def explain(self, query: Text) -> QueryPlan:
+        """
+        Ask the query planner of the database for the estimates of a query, without
+        executing it.
+        This method must be implemented by subclasses to support the QueryCostGuard.
+        :param query: The query to explain.
+        :return: A QueryPlan holding the estimated rows, the estimated cost and the
+                 tables that are read with a full scan.
+        """
+        raise NotImplementedError(
+            f"The {self.name} connector does not support explaining queries."
+        )
+
+    def limit_query(self, query: Text, limit: int) -> Text:
+        """
+        Limit the number of rows a query returns.
+        This method must be overridden by subclasses for databases that do not support
+        the LIMIT clause.
+        :param query: The query to limit.
+        :param limit: The maximum number of rows to return.
+        :return: The limited query.
+        """
+        query = query.strip().rstrip(";").strip()
+        return f"SELECT * FROM ({query}) AS limited_query LIMIT {int(limit)}"
 
     def get_connection_string(self) -> Text:
         """
@@ -99,3 +1073,156 @@ class DataConnector(ABC):
         :return: The connection string of the database.
         """
         raise NotImplementedError
+
+    @property
+    def async_connection(self) -> "AsyncEngine":
+        """
+        The SQLAlchemy async engine for the database, created on first use.
+        :return: A SQLAlchemy async engine object.
+        """
+        if self._async_connection is None:
+            self._async_connection = self.create_async_connection()
+        return self._async_connection
+
+    def get_async_connection_string(self) -> Text:
+        """
+        Get the connection string of the database for the async_driver.
+        :return: The connection string of the database with the async driver.
+        """
+        url = make_url(self.get_connection_string())
+        url = url.set(drivername=f"{url.get_backend_name()}+{self.async_driver}")
+        return url.render_as_string(hide_password=False)
+
+    def create_async_connection(self) -> "AsyncEngine":
+        """
+        Create an asynchronous connection to a database.
+        This method can be overridden by subclasses that need to pass additional
+        options to the async engine.
+        :return: A SQLAlchemy async engine object for the connection to the database.
+        """
+        return self._create_async_engine(self.get_async_connection_string())
+
+    def _create_async_engine(
+        self, connection_string: Text, **kwargs: Any
+    ) -> "AsyncEngine":
+        if self.async_driver is None:
+            raise NotImplementedError(
+                f"The {self.name} connector does not support asynchronous queries."
+            )
+
+        # The asyncio extension is only imported when an async engine is needed.
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        try:
+            return create_async_engine(connection_string, **kwargs)
+        except ImportError:
+            raise ImportError(
+                f"The {self.async_driver} package is required to query the "
+                f"{self.name} database asynchronously. Please run "
+                f"'pip install {self.async_driver}' to install it."
+            )
+        except SQLAlchemyError as e:
+            raise ConnectionCreationException(
+                f"Could not create async connection to {self.name} database: {e}"
+            )
+
+    async def aget_database_schema(self) -> Dict:
+        """
+        Get the database schema as a dictionary without blocking the event loop.
+        If the schema has to be reflected, the reflection is run in a worker thread.
+        :return: A dictionary containing the database schema.
+        """
+        if self._database_schema is not None and not self._is_schema_expired():
+            return self.get_database_schema()
+        return await asyncio.to_thread(self.get_database_schema)
+
+    async def aquery(
+        self,
+        query: Text,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> List[Dict]:
+        """
+        Execute a query on the database asynchronously.
+        If the connector does not define an async_driver, the synchronous query()
+        method is run in a worker thread.
+        :param query: The query to execute.
+        :param timeout: The maximum number of seconds the query may run for. This
+                        parameter is optional. If it is not provided, the timeout of
+                        the connector is used.
+        :param max_rows: The maximum number of rows the query may return. This
+                         parameter is optional. If it is not provided, the max_rows
+                         of the connector is used.
+        :param parameters: The values of the bind parameters of the query, which are
+                           given in the :name format. This parameter is optional.
+        :return: The result of the query.
+        """
+        if self.async_driver is None:
+            return await asyncio.to_thread(
+                self.query, query, timeout, max_rows, parameters
+            )
+
+        cached_rows = self._get_cached_result(query, "rows", max_rows, parameters)
+        if cached_rows is not None:
+            return list(cached_rows)
+
+        async with self.async_connection.connect() as conn:
+            rows: List = await conn.run_sync(
+                self._execute_query, query, timeout, max_rows, parameters
+            )
+        self._cache_result(query, "rows", tuple(rows), parameters)
+        return rows
+
+    async def aquery_records(
+        self,
+        query: Text,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Tuple[List[Text], List[Tuple]]:
+        """
+        Execute a query on the database asynchronously and return the column names
+        and the rows as plain tuples.
+        If the connector does not define an async_driver, the synchronous
+        query_records() method is run in a worker thread.
+        :param query: The query to execute.
+        :param timeout: The maximum number of seconds the query may run for. This
+                        parameter is optional. If it is not provided, the timeout of
+                        the connector is used.
+        :param max_rows: The maximum number of rows the query may return. This
+                         parameter is optional. If it is not provided, the max_rows
+                         of the connector is used.
+        :param parameters: The values of the bind parameters of the query, which are
+                           given in the :name format. This parameter is optional.
+        :return: A tuple containing the column names and the rows of the result.
+        """
+        if self.async_driver is None:
+            return await asyncio.to_thread(
+                self.query_records,
+                query,
+                timeout=timeout,
+                max_rows=max_rows,
+                parameters=parameters,
+            )
+
+        cached_records = self._get_cached_result(query, "records", max_rows, parameters)
+        if cached_records is not None:
+            return list(cached_records[0]), list(cached_records[1])
+
+        async with self.async_connection.connect() as conn:
+            columns, records = await conn.run_sync(
+                self._fetch_records, query, 10000, timeout, max_rows, parameters
+            )
+        self._cache_result(
+            query, "records", (tuple(columns), tuple(records)), parameters
+        )
+        return columns, records
+
+    async def aclose(self) -> None:
+        """
+        Dispose of the async engine and close its pooled connections.
+        """
+        if self._async_connection is not None:
+            await self._async_connection.dispose()
+            self._async_connection = None
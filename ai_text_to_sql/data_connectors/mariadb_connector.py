@@ -1,7 +1,15 @@
 from typing import Optional, Text, Union
 
+from sqlalchemy import Connection
+
+from ai_text_to_sql.result_cache import ResultCache
+
 from .mysql_connector import MySQLConnector
 
+# The error code of ER_STATEMENT_TIMEOUT, raised when a statement exceeds
+# max_statement_time.
+STATEMENT_TIMEOUT_ERROR_CODE = 1969
+
 
 class MariaDBConnector(MySQLConnector):
     """
@@ -38,6 +46,25 @@ class MariaDBConnector(MySQLConnector):
         This parameter is optional, but either this parameter (in combination with the
         user, password, host and port parameters) or the connection_string parameter
         must be specified.
+    schema_cache_ttl : float
+        The number of seconds for which the reflected database schema is cached.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the schema is cached until it is refreshed or invalidated.
+    timeout : float
+        The maximum number of seconds a query may run for before it is cancelled.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, queries are not timed out.
+    max_rows : int
+        The maximum number of rows a query may return. This parameter is optional, and
+        defaults to None. If this parameter is not provided, the number of rows is not
+        limited.
+    result_cache : ResultCache
+        The cache of the results of read-only queries. This parameter is optional, and
+        defaults to None. If this parameter is not provided, results are not cached.
+    statistics_time_budget : float
+        The total number of seconds that may be spent sampling the tables to collect
+        the statistics of their columns. This parameter is optional, and defaults to
+        None. If this parameter is not provided, no statistics are collected.
     """
 
     name = "MariaDB"
@@ -50,5 +77,48 @@ class MariaDBConnector(MySQLConnector):
         host: Optional[Text] = None,
         port: Union[int, None] = None,
         database: Optional[Text] = None,
+        schema_cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        result_cache: Optional[ResultCache] = None,
+        statistics_time_budget: Optional[float] = None,
     ) -> None:
-        super().__init__(connection_string, user, password, host, port, database)
+        super().__init__(
+            connection_string,
+            user,
+            password,
+            host,
+            port,
+            database,
+            schema_cache_ttl=schema_cache_ttl,
+            timeout=timeout,
+            max_rows=max_rows,
+            result_cache=result_cache,
+            statistics_time_budget=statistics_time_budget,
+        )
+
+    def set_statement_timeout(self, conn: Connection, timeout: float) -> None:
+        """
+        Set the max_statement_time of the session of a connection to the MariaDB
+        database.
+        :param conn: The connection to set the timeout of.
+        :param timeout: The maximum number of seconds a query may run for.
+        """
+        conn.exec_driver_sql(f"SET SESSION max_statement_time = {float(timeout)}")
+
+    def reset_statement_timeout(self, conn: Connection) -> None:
+        """
+        Reset the max_statement_time of the session of a connection to the MariaDB
+        database, as it outlives the transaction of the query.
+        :param conn: The connection to reset the timeout of.
+        """
+        conn.exec_driver_sql("SET SESSION max_statement_time = DEFAULT")
+
+    def is_timeout_error(self, error: BaseException) -> bool:
+        """
+        Check whether an error was raised by MariaDB because a query exceeded the
+        max_statement_time.
+        :param error: The error raised by the database driver.
+        :return: True if the query was cancelled because of the timeout.
+        """
+        return error.args[:1] == (STATEMENT_TIMEOUT_ERROR_CODE,)
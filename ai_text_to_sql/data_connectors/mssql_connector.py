@@ -1,7 +1,9 @@
-from typing import Optional, Text, Union
+import math
+import re
+import xml.etree.ElementTree as ElementTree
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Text, Tuple, Union
 
-import pyodbc
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Connection, Engine, create_engine, make_url, text
 from sqlalchemy.exc import SQLAlchemyError
 
 from ai_text_to_sql.exceptions import (
@@ -9,8 +11,20 @@ from ai_text_to_sql.exceptions import (
     InsufficientParametersException,
     NoMSSQLDriverException,
 )
+from ai_text_to_sql.result_cache import ResultCache
 
-from .data_connector import DataConnector
+from .data_connector import DataConnector, QueryPlan
+
+SHOWPLAN_NAMESPACE = "{http://schemas.microsoft.com/sqlserver/2004/07/showplan}"
+
+# The physical operators of the plan that read a whole table or index.
+FULL_SCAN_OPERATORS = ("Table Scan", "Clustered Index Scan", "Index Scan")
+
+# The SQLSTATE of the error raised by the ODBC driver when a query times out.
+QUERY_TIMEOUT_SQLSTATE = "HYT00"
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 
 class MSSQLConnector(DataConnector):
@@ -52,9 +66,46 @@ class MSSQLConnector(DataConnector):
         The name of the schema to connect to.
         This parameter is optional. It can be provided as part of the connection_string
         parameter or as a separate parameter.
+    schema_cache_ttl : float
+        The number of seconds for which the reflected database schema is cached.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the schema is cached until it is refreshed or invalidated.
+    timeout : float
+        The maximum number of seconds a query may run for before it is cancelled.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, queries are not timed out.
+    max_rows : int
+        The maximum number of rows a query may return. This parameter is optional, and
+        defaults to None. If this parameter is not provided, the number of rows is not
+        limited.
+    result_cache : ResultCache
+        The cache of the results of read-only queries. This parameter is optional, and
+        defaults to None. If this parameter is not provided, results are not cached.
+    statistics_time_budget : float
+        The total number of seconds that may be spent sampling the tables to collect
+        the statistics of their columns. This parameter is optional, and defaults to
+        None. If this parameter is not provided, no statistics are collected.
     """
 
     name = "MSSQL"
+    async_driver: Optional[Text] = "aioodbc"
+    schema_query: Optional[Text] = (
+        "SELECT t.name, c.name, ty.name "
+        "FROM sys.tables AS t "
+        "JOIN sys.schemas AS s ON s.schema_id = t.schema_id "
+        "JOIN sys.columns AS c ON c.object_id = t.object_id "
+        "JOIN sys.types AS ty ON ty.user_type_id = c.user_type_id "
+        "WHERE s.name = COALESCE(:schema, SCHEMA_NAME()) "
+        "ORDER BY t.name, c.column_id"
+    )
+    # The modification date of a table changes whenever it is altered.
+    schema_fingerprint_query: Optional[Text] = (
+        "SELECT COUNT(*), MAX(o.modify_date), "
+        "CHECKSUM_AGG(CHECKSUM(o.object_id, o.modify_date)) "
+        "FROM sys.objects AS o "
+        "JOIN sys.schemas AS s ON s.schema_id = o.schema_id "
+        "WHERE o.type = 'U' AND s.name = COALESCE(:schema, SCHEMA_NAME())"
+    )
 
     def __init__(
         self,
@@ -65,6 +116,11 @@ class MSSQLConnector(DataConnector):
         port: Union[int, None] = None,
         database: Optional[Text] = None,
         schema: Optional[Text] = None,
+        schema_cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        result_cache: Optional[ResultCache] = None,
+        statistics_time_budget: Optional[float] = None,
     ) -> None:
         if (
             not connection_string
@@ -85,7 +141,13 @@ class MSSQLConnector(DataConnector):
         self.port = port
         self.database = database
         self.schema = schema
-        super().__init__()
+        super().__init__(
+            schema_cache_ttl=schema_cache_ttl,
+            timeout=timeout,
+            max_rows=max_rows,
+            result_cache=result_cache,
+            statistics_time_budget=statistics_time_budget,
+        )
 
     def create_connection(self) -> Engine:
         """
@@ -104,19 +166,189 @@ class MSSQLConnector(DataConnector):
             if self.schema and "schema" not in connection_string:
                 connection_string += f"?schema={self.schema}"
 
-            try:
-                driver = pyodbc.drivers()[-1]
-            except IndexError:
-                raise NoMSSQLDriverException(
-                    "No MSSQL driver found. Please install a driver for MSSQL."
-                )
-
+            driver = self.get_driver()
             return create_engine(f"{connection_string}?driver={driver}")
         except SQLAlchemyError as e:
             raise ConnectionCreationException(
                 f"Could not create connection to MSSQL database: {e}"
             )
 
+    def create_async_connection(self) -> "AsyncEngine":
+        """
+        Create an asynchronous connection to a MSSQL database.
+        :return: A SQLAlchemy async engine object for the connection to the MSSQL
+                 database.
+        """
+        driver = self.get_driver()
+        url = make_url(self.get_async_connection_string())
+        url = url.update_query_dict({"driver": driver})
+        return self._create_async_engine(url.render_as_string(hide_password=False))
+
+    def get_driver(self) -> Text:
+        """
+        Get the ODBC driver to connect to the MSSQL database with.
+        pyodbc is imported here rather than at module level, so that importing the
+        data connectors does not require the ODBC driver manager to be installed.
+        :return: The name of the most recently installed ODBC driver.
+        """
+        import pyodbc
+
+        try:
+            return pyodbc.drivers()[-1]
+        except IndexError:
+            raise NoMSSQLDriverException(
+                "No MSSQL driver found. Please install a driver for MSSQL."
+            )
+
+    def set_statement_timeout(self, conn: Connection, timeout: float) -> None:
+        """
+        Set the query timeout of a connection to the MSSQL database. When it expires,
+        the ODBC driver cancels the query on the server.
+        :param conn: The connection to set the timeout of.
+        :param timeout: The maximum number of seconds a query may run for.
+        """
+        self._get_pyodbc_connection(conn).timeout = max(math.ceil(timeout), 1)
+
+    def reset_statement_timeout(self, conn: Connection) -> None:
+        """
+        Remove the query timeout of a connection to the MSSQL database, as it outlives
+        the transaction of the query.
+        :param conn: The connection to reset the timeout of.
+        """
+        self._get_pyodbc_connection(conn).timeout = 0
+
+    def is_timeout_error(self, error: BaseException) -> bool:
+        """
+        Check whether an error was raised by the ODBC driver because a query exceeded
+        the query timeout.
+        :param error: The error raised by the database driver.
+        :return: True if the query was cancelled because of the timeout.
+        """
+        return error.args[:1] == (QUERY_TIMEOUT_SQLSTATE,)
+
+    @staticmethod
+    def _get_pyodbc_connection(conn: Connection) -> Any:
+        driver_connection = conn.connection.driver_connection
+        # aioodbc only exposes the timeout of its pyodbc connection as read-only.
+        return getattr(driver_connection, "_conn", driver_connection)
+
+    def explain(self, query: Text) -> QueryPlan:
+        """
+        Ask the query optimizer of the MSSQL database for the estimated plan of a
+        query with SHOWPLAN_XML, without executing it.
+        :param query: The query to explain.
+        :return: A QueryPlan holding the estimated rows and subtree cost of the
+                 query, and the tables that are read with a full table or index scan.
+        """
+        with self.connection.connect() as conn:
+            conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+            try:
+                plan = conn.exec_driver_sql(query).scalar()
+            finally:
+                conn.exec_driver_sql("SET SHOWPLAN_XML OFF")
+
+        root = ElementTree.fromstring(plan)
+        estimated_rows: Optional[float] = None
+        estimated_cost: Optional[float] = None
+        statement = root.find(f".//{SHOWPLAN_NAMESPACE}StmtSimple")
+        if statement is not None:
+            if statement.get("StatementEstRows"):
+                estimated_rows = float(statement.get("StatementEstRows", 0))
+            if statement.get("StatementSubTreeCost"):
+                estimated_cost = float(statement.get("StatementSubTreeCost", 0))
+
+        full_scans: List[Text] = []
+        for operator in root.iter(f"{SHOWPLAN_NAMESPACE}RelOp"):
+            if operator.get("PhysicalOp") not in FULL_SCAN_OPERATORS:
+                continue
+            table = operator.find(f".//{SHOWPLAN_NAMESPACE}Object")
+            if table is not None:
+                full_scans.append(table.get("Table", "").strip("[]"))
+
+        return QueryPlan(
+            estimated_rows=estimated_rows,
+            estimated_cost=estimated_cost,
+            full_scans=full_scans,
+            plan=plan,
+        )
+
+    def limit_query(self, query: Text, limit: int) -> Text:
+        """
+        Limit the number of rows a query returns with a TOP clause.
+        :param query: The query to limit.
+        :param limit: The maximum number of rows to return.
+        :return: The limited query.
+        """
+        query = query.strip().rstrip(";").strip()
+        # Injecting TOP into the query keeps its ORDER BY clause valid, which would
+        # not be allowed in a derived table.
+        match = re.match(r"SELECT\s+(DISTINCT\s+)?(?!TOP\b)", query, re.IGNORECASE)
+        if match:
+            return f"{match.group(0)}TOP {int(limit)} {query[match.end() :]}"
+        return f"SELECT TOP {int(limit)} * FROM ({query}) AS limited_query"
+
+    def estimate_row_count(self, conn: Connection, table_name: Text) -> Optional[float]:
+        """
+        Estimate the number of rows in a table of the MSSQL database from the row
+        counts of the partitions of its heap or clustered index in sys.partitions.
+        :param conn: The connection to the MSSQL database.
+        :param table_name: The name of the table.
+        :return: The estimated number of rows, or None if there is no estimate.
+        """
+        row_count = conn.execute(
+            text(
+                "SELECT SUM(p.rows) FROM sys.partitions AS p "
+                "WHERE p.object_id = OBJECT_ID(:table_name) AND p.index_id IN (0, 1)"
+            ),
+            {"table_name": self.quote_table_name(table_name)},
+        ).scalar()
+        return float(row_count) if row_count is not None else None
+
+    def get_sample_query(
+        self, table_name: Text, columns: List[Text], row_count: Optional[float]
+    ) -> Tuple[Text, Dict[Text, Any]]:
+        """
+        Get a query that returns a sample of the rows of a table of the MSSQL
+        database with a TOP clause. The sample of a large table is taken from random
+        pages with TABLESAMPLE SYSTEM, so that only those pages are read.
+        :param table_name: The name of the table.
+        :param columns: The columns to select.
+        :param row_count: The estimated number of rows in the table, or None if
+                          there is no estimate.
+        :return: A tuple containing the query and its bind parameters.
+        """
+        sample_rows = self.statistics_sample_rows
+        query = (
+            f"SELECT TOP (:sample_rows) {self.quote_column_names(columns)} "
+            f"FROM {self.quote_table_name(table_name)}"
+        )
+        if row_count is not None and row_count > sample_rows:
+            # Twice as many rows are sampled, as the pages of the table may not be
+            # full. TABLESAMPLE only accepts a constant.
+            sample_percent = min(200.0 * sample_rows / row_count, 100.0)
+            query += f" TABLESAMPLE SYSTEM ({sample_percent:.6f} PERCENT)"
+        return query, {"sample_rows": sample_rows}
+
+    def quote_table_name(self, table_name: Text) -> Text:
+        """
+        Quote the name of a table of the reflected schema of the MSSQL database,
+        qualified with the schema if one was given.
+        :param table_name: The name of the table.
+        :return: The quoted name of the table.
+        """
+        quoted_name = super().quote_table_name(table_name)
+        if self.schema is None:
+            return quoted_name
+        preparer = self.connection.dialect.identifier_preparer
+        return f"{preparer.quote_schema(self.schema)}.{quoted_name}"
+
+    def get_schema_query_parameters(self) -> Dict:
+        """
+        Get the bind parameters for the schema_query.
+        :return: A dictionary containing the schema to reflect.
+        """
+        return {"schema": self.schema}
+
     def get_connection_string(self) -> Text:
         """
         Returns the connection string for the MSSQL database.
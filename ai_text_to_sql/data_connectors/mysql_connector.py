@@ -1,14 +1,20 @@
-from typing import Optional, Text, Union
+import json
+from typing import Any, List, Optional, Text, Union
 
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Connection, Engine, create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
 from ai_text_to_sql.exceptions import (
     ConnectionCreationException,
     InsufficientParametersException,
 )
+from ai_text_to_sql.result_cache import ResultCache
 
-from .data_connector import DataConnector
+from .data_connector import DataConnector, QueryPlan
+
+# The error code of ER_QUERY_TIMEOUT, raised when a statement exceeds
+# MAX_EXECUTION_TIME.
+QUERY_TIMEOUT_ERROR_CODE = 3024
 
 
 class MySQLConnector(DataConnector):
@@ -46,9 +52,45 @@ class MySQLConnector(DataConnector):
         This parameter is optional, but either this parameter (in combination with the
         user, password, host and port parameters) or the connection_string parameter
         must be specified.
+    schema_cache_ttl : float
+        The number of seconds for which the reflected database schema is cached.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the schema is cached until it is refreshed or invalidated.
+    timeout : float
+        The maximum number of seconds a query may run for before it is cancelled.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, queries are not timed out.
+    max_rows : int
+        The maximum number of rows a query may return. This parameter is optional, and
+        defaults to None. If this parameter is not provided, the number of rows is not
+        limited.
+    result_cache : ResultCache
+        The cache of the results of read-only queries. This parameter is optional, and
+        defaults to None. If this parameter is not provided, results are not cached.
+    statistics_time_budget : float
+        The total number of seconds that may be spent sampling the tables to collect
+        the statistics of their columns. This parameter is optional, and defaults to
+        None. If this parameter is not provided, no statistics are collected.
     """
 
     name = "MySQL"
+    async_driver: Optional[Text] = "aiomysql"
+    schema_query: Optional[Text] = (
+        "SELECT c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE "
+        "FROM information_schema.COLUMNS AS c "
+        "JOIN information_schema.TABLES AS t "
+        "ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME "
+        "WHERE c.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE' "
+        "ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION"
+    )
+    # The update time also changes when the data changes, which only causes an
+    # unnecessary reflection.
+    schema_fingerprint_query: Optional[Text] = (
+        "SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME "
+        "FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE' "
+        "ORDER BY TABLE_NAME"
+    )
 
     def __init__(
         self,
@@ -58,6 +100,11 @@ class MySQLConnector(DataConnector):
         host: Optional[Text] = None,
         port: Union[int, None] = None,
         database: Optional[Text] = None,
+        schema_cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        result_cache: Optional[ResultCache] = None,
+        statistics_time_budget: Optional[float] = None,
     ) -> None:
         if (
             not connection_string
@@ -77,7 +124,13 @@ class MySQLConnector(DataConnector):
         self.host = host
         self.port = port
         self.database = database
-        super().__init__()
+        super().__init__(
+            schema_cache_ttl=schema_cache_ttl,
+            timeout=timeout,
+            max_rows=max_rows,
+            result_cache=result_cache,
+            statistics_time_budget=statistics_time_budget,
+        )
 
     def create_connection(self) -> Engine:
         """
@@ -97,6 +150,100 @@ class MySQLConnector(DataConnector):
                 f"Could not create connection to MySQL database: {e}"
             )
 
+    def set_statement_timeout(self, conn: Connection, timeout: float) -> None:
+        """
+        Set the MAX_EXECUTION_TIME of the session of a connection to the MySQL
+        database. MySQL only applies it to read-only SELECT statements.
+        :param conn: The connection to set the timeout of.
+        :param timeout: The maximum number of seconds a query may run for.
+        """
+        conn.exec_driver_sql(
+            f"SET SESSION MAX_EXECUTION_TIME = {max(int(timeout * 1000), 1)}"
+        )
+
+    def reset_statement_timeout(self, conn: Connection) -> None:
+        """
+        Reset the MAX_EXECUTION_TIME of the session of a connection to the MySQL
+        database, as it outlives the transaction of the query.
+        :param conn: The connection to reset the timeout of.
+        """
+        conn.exec_driver_sql("SET SESSION MAX_EXECUTION_TIME = DEFAULT")
+
+    def is_timeout_error(self, error: BaseException) -> bool:
+        """
+        Check whether an error was raised by MySQL because a query exceeded the
+        MAX_EXECUTION_TIME.
+        :param error: The error raised by the database driver.
+        :return: True if the query was cancelled because of the timeout.
+        """
+        return error.args[:1] == (QUERY_TIMEOUT_ERROR_CODE,)
+
+    def explain(self, query: Text) -> QueryPlan:
+        """
+        Ask the query planner of the MySQL database for the estimates of a query with
+        EXPLAIN FORMAT=JSON, without executing it.
+        The estimated rows are the product of the rows examined per scan of each
+        table, which is an upper bound of the rows read by the joins.
+        :param query: The query to explain.
+        :return: A QueryPlan holding the estimated rows and cost of the query, and the
+                 tables that are read with a full table or index scan.
+        """
+        with self.connection.connect() as conn:
+            plan = json.loads(
+                conn.exec_driver_sql(f"EXPLAIN FORMAT=JSON {query}").scalar() or "{}"
+            )
+
+        query_block = plan.get("query_block", {})
+        estimated_cost: Optional[float] = None
+        if "cost_info" in query_block:
+            estimated_cost = float(query_block["cost_info"]["query_cost"])
+
+        estimated_rows: Optional[float] = None
+        full_scans: List[Text] = []
+        nodes: List[Any] = [plan]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, list):
+                nodes.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+
+            if "table_name" in node:
+                if node.get("access_type") in ("ALL", "index"):
+                    full_scans.append(node["table_name"])
+                # MariaDB reports the rows examined per scan as 'rows'.
+                rows = node.get("rows_examined_per_scan", node.get("rows"))
+                if rows is not None:
+                    estimated_rows = (estimated_rows or 1.0) * max(float(rows), 1.0)
+            nodes.extend(node.values())
+
+        return QueryPlan(
+            estimated_rows=estimated_rows,
+            estimated_cost=estimated_cost,
+            full_scans=full_scans,
+            plan=plan,
+        )
+
+    def estimate_row_count(self, conn: Connection, table_name: Text) -> Optional[float]:
+        """
+        Estimate the number of rows in a table of the MySQL database from the
+        TABLE_ROWS of information_schema.TABLES, which InnoDB estimates from a sample
+        of its pages. MySQL cannot sample pages in a query, so the table is sampled
+        from its first rows.
+        :param conn: The connection to the MySQL database.
+        :param table_name: The name of the table.
+        :return: The estimated number of rows, or None if there is no estimate.
+        """
+        row_count = conn.execute(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+            ),
+            {"table_name": table_name},
+        ).scalar()
+        return float(row_count) if row_count is not None else None
+
     def get_connection_string(self) -> Text:
         """
         Get the connection string for the MySQL database.
@@ -1,6 +1,7 @@
-from typing import Optional, Text, Union
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Text, Tuple, Union
 
-from sqlalchemy import Engine, create_engine, text
+from sqlalchemy import Connection, Engine, create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import scoped_session, sessionmaker
 
@@ -8,8 +9,15 @@ from ai_text_to_sql.exceptions import (
     ConnectionCreationException,
     InsufficientParametersException,
 )
+from ai_text_to_sql.result_cache import ResultCache
 
-from .data_connector import DataConnector
+from .data_connector import DataConnector, QueryPlan
+
+# The SQLSTATE of the error raised when a statement is cancelled by the server.
+QUERY_CANCELED_SQLSTATE = "57014"
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 
 class PostgreSQLConnector(DataConnector):
@@ -51,9 +59,52 @@ class PostgreSQLConnector(DataConnector):
         The name of the schema to connect to.
         This parameter is optional. This parameter can be provided along with the
         connection_string parameter as well.
+    schema_cache_ttl : float
+        The number of seconds for which the reflected database schema is cached.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the schema is cached until it is refreshed or invalidated.
+    timeout : float
+        The maximum number of seconds a query may run for before it is cancelled.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, queries are not timed out.
+    max_rows : int
+        The maximum number of rows a query may return. This parameter is optional, and
+        defaults to None. If this parameter is not provided, the number of rows is not
+        limited.
+    result_cache : ResultCache
+        The cache of the results of read-only queries. This parameter is optional, and
+        defaults to None. If this parameter is not provided, results are not cached.
+    statistics_time_budget : float
+        The total number of seconds that may be spent sampling the tables to collect
+        the statistics of their columns. This parameter is optional, and defaults to
+        None. If this parameter is not provided, no statistics are collected.
     """
 
     name = "PostgreSQL"
+    async_driver: Optional[Text] = "asyncpg"
+    schema_query: Optional[Text] = (
+        "SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod) "
+        "FROM pg_catalog.pg_class AS c "
+        "JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace "
+        "JOIN pg_catalog.pg_attribute AS a ON a.attrelid = c.oid "
+        "WHERE c.relkind IN ('r', 'p') "
+        "AND n.nspname = COALESCE(CAST(:schema AS TEXT), current_schema()) "
+        "AND a.attnum > 0 AND NOT a.attisdropped "
+        "ORDER BY c.relname, a.attnum"
+    )
+    # The tables and their columns are hashed on the server, so that only the hash
+    # is transferred.
+    schema_fingerprint_query: Optional[Text] = (
+        "SELECT md5(string_agg("
+        "format('%s %s %s %s %s %s %s', c.oid, c.relname, c.relfilenode, a.attnum, "
+        "a.attname, a.atttypid, a.atttypmod), ',' ORDER BY c.oid, a.attnum)) "
+        "FROM pg_catalog.pg_class AS c "
+        "JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace "
+        "JOIN pg_catalog.pg_attribute AS a ON a.attrelid = c.oid "
+        "WHERE c.relkind IN ('r', 'p') "
+        "AND n.nspname = COALESCE(CAST(:schema AS TEXT), current_schema()) "
+        "AND a.attnum > 0 AND NOT a.attisdropped"
+    )
 
     def __init__(
         self,
@@ -64,6 +115,11 @@ class PostgreSQLConnector(DataConnector):
         port: Union[int, None] = None,
         database: Optional[Text] = None,
         schema: Optional[Text] = None,
+        schema_cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        result_cache: Optional[ResultCache] = None,
+        statistics_time_budget: Optional[float] = None,
     ) -> None:
         if (
             not connection_string
@@ -85,7 +141,13 @@ class PostgreSQLConnector(DataConnector):
         self.port = port
         self.database = database
         self.schema = schema
-        super().__init__()
+        super().__init__(
+            schema_cache_ttl=schema_cache_ttl,
+            timeout=timeout,
+            max_rows=max_rows,
+            result_cache=result_cache,
+            statistics_time_budget=statistics_time_budget,
+        )
 
     def create_connection(self) -> Engine:
         """
@@ -115,6 +177,136 @@ class PostgreSQLConnector(DataConnector):
                 f"Could not create connection to PostgreSQL database: {e}"
             )
 
+    def create_async_connection(self) -> "AsyncEngine":
+        """
+        Create an asynchronous connection to a PostgreSQL database.
+        If a schema is specified, it is set as the search path of every connection.
+        :return: A SQLAlchemy async engine object for the connection to the PostgreSQL
+                 database.
+        """
+        if self.schema:
+            return self._create_async_engine(
+                self.get_async_connection_string(),
+                connect_args={"server_settings": {"search_path": self.schema}},
+            )
+        return self._create_async_engine(self.get_async_connection_string())
+
+    def set_statement_timeout(self, conn: Connection, timeout: float) -> None:
+        """
+        Set the statement_timeout of the transaction of a connection to the
+        PostgreSQL database. The setting is discarded with the transaction when the
+        connection is returned to the pool.
+        :param conn: The connection to set the timeout of.
+        :param timeout: The maximum number of seconds a query may run for.
+        """
+        conn.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}"
+        )
+
+    def is_timeout_error(self, error: BaseException) -> bool:
+        """
+        Check whether an error was raised by PostgreSQL because a query was cancelled
+        by the statement_timeout.
+        :param error: The error raised by the database driver.
+        :return: True if the query was cancelled because of the timeout.
+        """
+        return getattr(error, "pgcode", None) == QUERY_CANCELED_SQLSTATE
+
+    def explain(self, query: Text) -> QueryPlan:
+        """
+        Ask the query planner of the PostgreSQL database for the estimates of a query
+        with EXPLAIN (FORMAT JSON), without executing it.
+        :param query: The query to explain.
+        :return: A QueryPlan holding the estimated rows and total cost of the query,
+                 and the tables that are read with a sequential scan.
+        """
+        with self.connection.connect() as conn:
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {query}").scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        root = plan[0]["Plan"]
+        full_scans: List[Text] = []
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Node Type") == "Seq Scan":
+                full_scans.append(node.get("Relation Name", ""))
+            nodes.extend(node.get("Plans", []))
+
+        return QueryPlan(
+            estimated_rows=root.get("Plan Rows"),
+            estimated_cost=root.get("Total Cost"),
+            full_scans=full_scans,
+            plan=plan,
+        )
+
+    def estimate_row_count(self, conn: Connection, table_name: Text) -> Optional[float]:
+        """
+        Estimate the number of rows in a table of the PostgreSQL database from the
+        reltuples of pg_class, which is maintained by VACUUM and ANALYZE.
+        :param conn: The connection to the PostgreSQL database.
+        :param table_name: The name of the table.
+        :return: The estimated number of rows, or None if the table has never been
+                 vacuumed or analyzed.
+        """
+        row_count = conn.execute(
+            text(
+                "SELECT reltuples FROM pg_catalog.pg_class "
+                "WHERE oid = CAST(:table_name AS regclass)"
+            ),
+            {"table_name": self.quote_table_name(table_name)},
+        ).scalar()
+        return float(row_count) if row_count is not None and row_count >= 0 else None
+
+    def get_sample_query(
+        self, table_name: Text, columns: List[Text], row_count: Optional[float]
+    ) -> Tuple[Text, Dict[Text, Any]]:
+        """
+        Get a query that returns a sample of the rows of a table of the PostgreSQL
+        database. The sample of a large table is taken from random pages with
+        TABLESAMPLE SYSTEM, so that only those pages are read.
+        :param table_name: The name of the table.
+        :param columns: The columns to select.
+        :param row_count: The estimated number of rows in the table, or None if
+                          there is no estimate.
+        :return: A tuple containing the query and its bind parameters.
+        """
+        sample_rows = self.statistics_sample_rows
+        if row_count is None or row_count <= sample_rows:
+            return super().get_sample_query(table_name, columns, row_count)
+
+        # Twice as many rows are sampled, as the pages of the table may not be full.
+        return (
+            f"SELECT {self.quote_column_names(columns)} "
+            f"FROM {self.quote_table_name(table_name)} "
+            f"TABLESAMPLE SYSTEM (:sample_percent) LIMIT :sample_rows",
+            {
+                "sample_percent": min(200.0 * sample_rows / row_count, 100.0),
+                "sample_rows": sample_rows,
+            },
+        )
+
+    def quote_table_name(self, table_name: Text) -> Text:
+        """
+        Quote the name of a table of the reflected schema of the PostgreSQL database,
+        qualified with the schema if one was given.
+        :param table_name: The name of the table.
+        :return: The quoted name of the table.
+        """
+        quoted_name = super().quote_table_name(table_name)
+        if self.schema is None:
+            return quoted_name
+        preparer = self.connection.dialect.identifier_preparer
+        return f"{preparer.quote_schema(self.schema)}.{quoted_name}"
+
+    def get_schema_query_parameters(self) -> Dict:
+        """
+        Get the bind parameters for the schema_query.
+        :return: A dictionary containing the schema to reflect.
+        """
+        return {"schema": self.schema}
+
     def get_connection_string(self) -> Text:
         """
         Get the connection string for the PostgreSQL database.
@@ -1,14 +1,33 @@
-from typing import Optional, Text
+import inspect
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Text, Tuple
 
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Connection, Engine, create_engine
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.util import await_only
 
 from ai_text_to_sql.exceptions import (
     ConnectionCreationException,
     InsufficientParametersException,
 )
+from ai_text_to_sql.result_cache import ResultCache
 
-from .data_connector import DataConnector
+from .data_connector import DataConnector, QueryPlan
+
+# Matches the tables referenced in a query along with their aliases, which SQLite
+# reports in its query plans instead of the table names.
+TABLE_ALIAS_PATTERN = re.compile(
+    r"(?:\bFROM|\bJOIN|,)\s+[\"`\[]?(\w+)[\"`\]]?\s+(?:AS\s+)?"
+    r"(?!(?:ON|USING|WHERE|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|GROUP|ORDER|"
+    r"LIMIT|UNION|HAVING|WINDOW|FROM)\b)(\w+)",
+    re.IGNORECASE,
+)
+
+# The number of SQLite virtual machine instructions between two checks of the
+# statement timeout.
+PROGRESS_HANDLER_INSTRUCTIONS = 1000
 
 
 class SQLiteConnector(DataConnector):
@@ -25,12 +44,47 @@ class SQLiteConnector(DataConnector):
         The path to the SQLite database file.
         This parameter is optional, but either this parameter or the connection_string
         parameter must be specified.
+    schema_cache_ttl : float
+        The number of seconds for which the reflected database schema is cached.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the schema is cached until it is refreshed or invalidated.
+    timeout : float
+        The maximum number of seconds a query may run for before it is cancelled.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, queries are not timed out.
+    max_rows : int
+        The maximum number of rows a query may return. This parameter is optional, and
+        defaults to None. If this parameter is not provided, the number of rows is not
+        limited.
+    result_cache : ResultCache
+        The cache of the results of read-only queries. This parameter is optional, and
+        defaults to None. If this parameter is not provided, results are not cached.
+    statistics_time_budget : float
+        The total number of seconds that may be spent sampling the tables to collect
+        the statistics of their columns. This parameter is optional, and defaults to
+        None. If this parameter is not provided, no statistics are collected.
     """
 
     name = "SQLite"
+    async_driver: Optional[Text] = "aiosqlite"
+    schema_query: Optional[Text] = (
+        "SELECT m.name, p.name, p.type "
+        "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+        "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~' "
+        "ORDER BY m.name, p.cid"
+    )
+    # The schema version is incremented by SQLite whenever the schema changes.
+    schema_fingerprint_query: Optional[Text] = "PRAGMA schema_version"
 
     def __init__(
-        self, connection_string: Optional[Text] = None, database: Optional[Text] = None
+        self,
+        connection_string: Optional[Text] = None,
+        database: Optional[Text] = None,
+        schema_cache_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        result_cache: Optional[ResultCache] = None,
+        statistics_time_budget: Optional[float] = None,
     ) -> None:
         if not connection_string and not database:
             raise InsufficientParametersException(
@@ -40,7 +94,13 @@ class SQLiteConnector(DataConnector):
 
         self.connection_string = connection_string
         self.database = database
-        super().__init__()
+        super().__init__(
+            schema_cache_ttl=schema_cache_ttl,
+            timeout=timeout,
+            max_rows=max_rows,
+            result_cache=result_cache,
+            statistics_time_budget=statistics_time_budget,
+        )
 
     def create_connection(self) -> Engine:
         """
@@ -67,3 +127,145 @@ class SQLiteConnector(DataConnector):
             if self.connection_string
             else f"sqlite:///{self.database}"
         )
+
+    def set_statement_timeout(self, conn: Connection, timeout: float) -> None:
+        """
+        Set the timeout of the queries executed on a connection to the SQLite
+        database. SQLite has no statement timeout, so a progress handler interrupts
+        the query once the timeout has passed.
+        :param conn: The connection to set the timeout of.
+        :param timeout: The maximum number of seconds a query may run for.
+        """
+        deadline = time.monotonic() + timeout
+        self._set_progress_handler(conn, lambda: time.monotonic() > deadline)
+
+    def reset_statement_timeout(self, conn: Connection) -> None:
+        """
+        Remove the progress handler that interrupts the queries executed on a
+        connection to the SQLite database.
+        :param conn: The connection to reset the timeout of.
+        """
+        self._set_progress_handler(conn, None)
+
+    def is_timeout_error(self, error: BaseException) -> bool:
+        """
+        Check whether an error was raised by SQLite because a query was interrupted
+        by the progress handler.
+        :param error: The error raised by the database driver.
+        :return: True if the query was cancelled because of the timeout.
+        """
+        return str(error) == "interrupted"
+
+    @staticmethod
+    def _set_progress_handler(
+        conn: Connection, handler: Optional[Callable[[], bool]]
+    ) -> None:
+        driver_connection: Any = conn.connection.driver_connection
+        result = driver_connection.set_progress_handler(
+            handler, PROGRESS_HANDLER_INSTRUCTIONS
+        )
+        if inspect.isawaitable(result):
+            # aiosqlite runs the SQLite connection in its own thread.
+            await_only(result)
+
+    def explain(self, query: Text) -> QueryPlan:
+        """
+        Ask the query planner of the SQLite database for the plan of a query with
+        EXPLAIN QUERY PLAN.
+        SQLite does not estimate costs, so the estimated rows are the product of the
+        row counts of the tables that are read with a full scan, which is an upper
+        bound of the rows read by nested loops over them. The row counts are taken
+        from the sqlite_stat1 table if the database has been analyzed, or else
+        approximated by the largest rowid.
+        :param query: The query to explain.
+        :return: A QueryPlan holding the estimated rows and the tables that are read
+                 with a full scan.
+        """
+        aliases = {
+            alias.lower(): table for table, alias in TABLE_ALIAS_PATTERN.findall(query)
+        }
+        with self.connection.connect() as conn:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query}").fetchall()
+
+            full_scans: List[Text] = []
+            for row in plan:
+                detail = row[-1]
+                if not detail.startswith("SCAN ") or detail[5:].startswith(
+                    ("(", "CONSTANT")
+                ):
+                    continue
+                name = detail[5:].split(" ")[0]
+                full_scans.append(aliases.get(name.lower(), name))
+
+            estimated_rows: Optional[float] = None
+            if full_scans:
+                row_counts = self._get_row_counts(conn, full_scans)
+                if all(table in row_counts for table in full_scans):
+                    estimated_rows = 1.0
+                    for table in full_scans:
+                        estimated_rows *= max(row_counts[table], 1)
+
+        return QueryPlan(
+            estimated_rows=estimated_rows, full_scans=full_scans, plan=plan
+        )
+
+    def estimate_row_count(self, conn: Connection, table_name: Text) -> Optional[float]:
+        """
+        Estimate the number of rows in a table of the SQLite database from the
+        sqlite_stat1 table if the database has been analyzed, or else from the
+        largest rowid, which is read from the rowid index.
+        :param conn: The connection to the SQLite database.
+        :param table_name: The name of the table.
+        :return: The estimated number of rows, or None if there is no estimate.
+        """
+        return self._get_row_counts(conn, [table_name]).get(table_name)
+
+    def get_sample_query(
+        self, table_name: Text, columns: List[Text], row_count: Optional[float]
+    ) -> Tuple[Text, Dict[Text, Any]]:
+        """
+        Get a query that returns a sample of the rows of a table of the SQLite
+        database. SQLite cannot sample pages, so the sample of a large table is a run
+        of rows starting at a random rowid, which is found with the rowid index.
+        :param table_name: The name of the table.
+        :param columns: The columns to select.
+        :param row_count: The estimated number of rows in the table, or None if
+                          there is no estimate.
+        :return: A tuple containing the query and its bind parameters.
+        """
+        sample_rows = self.statistics_sample_rows
+        if row_count is None or row_count <= sample_rows:
+            return super().get_sample_query(table_name, columns, row_count)
+
+        return (
+            f"SELECT {self.quote_column_names(columns)} "
+            f"FROM {self.quote_table_name(table_name)} "
+            f"WHERE rowid >= :start_rowid LIMIT :sample_rows",
+            {
+                "start_rowid": random.randint(0, int(row_count) - sample_rows),
+                "sample_rows": sample_rows,
+            },
+        )
+
+    def _get_row_counts(self, conn: Any, tables: List[Text]) -> Dict[Text, int]:
+        row_counts: Dict[Text, int] = {}
+        try:
+            for table, stat in conn.exec_driver_sql(
+                "SELECT tbl, stat FROM sqlite_stat1"
+            ):
+                if table in tables and stat:
+                    row_counts[table] = int(stat.split(" ")[0])
+        except SQLAlchemyError:
+            # The database has not been analyzed.
+            pass
+
+        for table in set(tables) - set(row_counts):
+            try:
+                max_rowid = conn.exec_driver_sql(
+                    f"SELECT MAX(rowid) FROM {self.quote_table_name(table)}"
+                ).scalar()
+            except SQLAlchemyError:
+                # The table is a view, a WITHOUT ROWID table or does not exist.
+                continue
+            row_counts[table] = int(max_rowid or 0)
+        return row_counts
@@ -0,0 +1,407 @@
+import json
+import os
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Text, Tuple
+
+import numpy as np
+
+from .answer_cache import normalize_question
+
+
+@dataclass
+class Example:
+    """
+    A question that was answered with a SQL query, as returned by ExampleStore.search().
+
+    Parameters:
+    -----------
+    question : Text
+        The question.
+    sql : Text
+        The SQL query that answered the question.
+    similarity : float
+        The cosine similarity, between 0 and 1, of the question to the searched one.
+    """
+
+    question: Text
+    sql: Text
+    similarity: float
+
+
+def get_ngrams(text: Text, ngram_size: int = 3) -> Dict[Text, int]:
+    """
+    Count the character n-grams of a question after normalization.
+    The question is padded with spaces, so that the first and last characters of the
+    question form n-grams of their own.
+    :param text: The question.
+    :param ngram_size: The number of characters in each n-gram.
+    :return: A dictionary mapping each n-gram to its number of occurrences.
+    """
+    padded = f" {normalize_question(text)} "
+    counts: Dict[Text, int] = {}
+    for start in range(max(len(padded) - ngram_size + 1, 1)):
+        ngram = padded[start : start + ngram_size]
+        counts[ngram] = counts.get(ngram, 0) + 1
+    return counts
+
+
+def get_numbers(text: Text) -> List[Text]:
+    """
+    Get the numbers in a question, e.g. years, limits and identifiers, which change the
+    SQL query of the question while barely changing its n-grams.
+    :param text: The question.
+    :return: The sorted list of the numbers in the question.
+    """
+    return sorted(re.findall(r"\d+(?:\.\d+)?", text))
+
+
+class ExampleStore:
+    """
+    A store of the questions that were answered with a SQL query that executed
+    successfully, used to reuse the SQL query of a paraphrased question and to supply
+    similar examples to the LLM.
+    Questions are compared by the cosine similarity of their character n-gram TF-IDF
+    vectors. The vectors are held in an inverted index of NumPy arrays, so that a
+    search only touches the postings of the n-grams of the question. New examples go
+    to a small in-memory segment that is searched along with the index, and the index
+    is rebuilt, with up-to-date IDF weights, once this segment has grown by a fraction
+    of the index, which keeps additions cheap on average. An ExampleStore holds the
+    examples of a single database.
+
+    Parameters:
+    -----------
+    path : Text
+        The path to a JSON Lines file to persist the examples to, with a 'question'
+        and a 'sql' field on each line. The file is created if it does not exist, and
+        the examples it holds are loaded. This parameter is optional, and defaults to
+        None. If this parameter is not provided, the examples are only held in memory.
+    similarity_threshold : float
+        The minimum similarity of a stored question to a new one for its SQL query to
+        be reused without calling the LLM. The SQL query is only reused if both
+        questions contain the same numbers. This parameter is optional, and defaults
+        to 0.95.
+    top_k : int
+        The number of most similar examples to include in the prompt. This parameter
+        is optional, and defaults to 3.
+    min_similarity : float
+        The minimum similarity of an example to be included in the prompt. This
+        parameter is optional, and defaults to 0.3.
+    ngram_size : int
+        The number of characters in each n-gram. This parameter is optional, and
+        defaults to 3.
+    rebuild_fraction : float
+        The size of the segment of new examples, relative to the number of indexed
+        examples, above which the index is rebuilt. This parameter is optional, and
+        defaults to 0.1.
+    max_postings : int
+        The number of postings to accumulate when searching for candidates, which
+        bounds the time taken by a search. The postings of the n-grams shared by the
+        most questions are skipped once it is reached. This parameter is optional, and
+        defaults to 20000.
+    """
+
+    # The number of candidates scored exactly for each example to return.
+    candidates_per_result = 8
+
+    def __init__(
+        self,
+        path: Optional[Text] = None,
+        similarity_threshold: float = 0.95,
+        top_k: int = 3,
+        min_similarity: float = 0.3,
+        ngram_size: int = 3,
+        rebuild_fraction: float = 0.1,
+        max_postings: int = 20000,
+    ) -> None:
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.ngram_size = ngram_size
+        self.rebuild_fraction = rebuild_fraction
+        self.max_postings = max_postings
+
+        self._examples: List[Tuple[Text, Text]] = []
+        self._example_ids: Dict[Text, int] = {}
+        self._term_ids: Dict[Text, int] = {}
+        # The n-gram counts and weights of all the examples, in the order of the
+        # examples, with the entries of each example between two consecutive offsets.
+        self._example_offsets = array("q", [0])
+        self._entry_examples = array("i")
+        self._entry_terms = array("i")
+        self._entry_counts = array("f")
+        self._entry_weights = array("f")
+
+        # The inverted index of the first _indexed examples, with the postings of
+        # each term between two consecutive offsets.
+        self._indexed = 0
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._posting_examples = np.zeros(0, dtype=np.int32)
+        self._posting_weights = np.zeros(0, dtype=np.float32)
+        # The postings of the examples added since the index was built.
+        self._new_postings: Dict[int, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+        if path is not None:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            if os.path.exists(path):
+                self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def load(self, path: Text) -> int:
+        """
+        Load the examples persisted in a JSON Lines file. Later entries override
+        earlier ones for the same question.
+        :param path: The path to the file.
+        :return: The number of examples loaded.
+        """
+        count = 0
+        with open(path, "r") as f, self._lock:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line may be truncated if a process was killed while writing.
+                    continue
+                self._add(entry["question"], entry["sql"])
+                count += 1
+            self._rebuild()
+        return count
+
+    def add(self, question: Text, sql: Text) -> bool:
+        """
+        Add an example, or replace the SQL query of a stored question.
+        :param question: The question.
+        :param sql: The SQL query that answered the question.
+        :return: True if the example was added or replaced, False if it was already
+                 stored.
+        """
+        with self._lock:
+            if not self._add(question, sql):
+                return False
+            if len(self._examples) - self._indexed > max(
+                self.rebuild_fraction * self._indexed, 64
+            ):
+                self._rebuild()
+
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"question": question, "sql": sql}) + "\n")
+        return True
+
+    def search(self, question: Text, top_k: Optional[int] = None) -> List[Example]:
+        """
+        Search for the stored questions that are the most similar to a question.
+        :param question: The question.
+        :param top_k: The maximum number of examples to return. This parameter is
+                      optional. If it is not provided, the top_k of the store is used.
+        :return: The examples, ordered by decreasing similarity. Examples that do not
+                 share any n-gram with the question are not returned.
+        """
+        top_k = top_k or self.top_k
+        with self._lock:
+            example_id = self._example_ids.get(normalize_question(question))
+            if example_id is not None and top_k == 1:
+                question, sql = self._examples[example_id]
+                return [Example(question, sql, similarity=1.0)]
+
+            query_terms, query_weights = self._vectorize(
+                get_ngrams(question, self.ngram_size)
+            )
+            candidates = self._get_candidates(query_terms, query_weights, top_k)
+            if example_id is not None and example_id not in candidates:
+                candidates = np.append(candidates, example_id)
+            if len(candidates) == 0:
+                return []
+
+            scores = self._score(candidates, query_terms, query_weights)
+            if example_id is not None:
+                scores[candidates == example_id] = 1.0
+            order = np.argsort(-scores, kind="stable")[:top_k]
+            examples = []
+            for position in order:
+                if scores[position] > 0:
+                    question, sql = self._examples[candidates[position]]
+                    similarity = min(float(scores[position]), 1.0)
+                    examples.append(Example(question, sql, similarity))
+            return examples
+
+    def find_match(self, question: Text) -> Optional[Example]:
+        """
+        Find a stored question similar enough to a question for its SQL query to be
+        reused.
+        :param question: The question.
+        :return: The most similar example if its similarity reaches the
+                 similarity_threshold and it contains the same numbers, else None.
+        """
+        examples = self.search(question, 1)
+        if (
+            examples
+            and examples[0].similarity >= self.similarity_threshold
+            and get_numbers(examples[0].question) == get_numbers(question)
+        ):
+            return examples[0]
+        return None
+
+    def get_prompt_examples(self, question: Text) -> List[Tuple[Text, Text]]:
+        """
+        Get the examples to include in the prompt for a question.
+        :param question: The question.
+        :return: A list of (question, SQL query) tuples of the top_k most similar
+                 examples whose similarity reaches min_similarity, the most similar
+                 first.
+        """
+        return [
+            (example.question, example.sql)
+            for example in self.search(question)
+            if example.similarity >= self.min_similarity
+        ]
+
+    def _add(self, question: Text, sql: Text) -> bool:
+        normalized_question = normalize_question(question)
+        example_id = self._example_ids.get(normalized_question)
+        if example_id is not None:
+            # The n-grams of the question are unchanged, so only the query is replaced.
+            if self._examples[example_id][1] == sql:
+                return False
+            self._examples[example_id] = (question, sql)
+            return True
+
+        example_id = len(self._examples)
+        self._examples.append((question, sql))
+        self._example_ids[normalized_question] = example_id
+
+        counts = get_ngrams(question, self.ngram_size)
+        terms = [
+            self._term_ids.setdefault(ngram, len(self._term_ids)) for ngram in counts
+        ]
+        self._entry_examples.extend([example_id] * len(terms))
+        self._entry_terms.extend(terms)
+        self._entry_counts.extend(counts.values())
+        self._example_offsets.append(len(self._entry_terms))
+
+        # The new example is weighted with the IDF of the current index.
+        example_terms, weights = self._vectorize(counts)
+        self._entry_weights.frombytes(weights.tobytes())
+        for term, weight in zip(example_terms, weights):
+            example_ids, term_weights = self._new_postings.setdefault(term, ([], []))
+            example_ids.append(example_id)
+            term_weights.append(float(weight))
+        return True
+
+    def _vectorize(self, counts: Dict[Text, int]) -> Tuple[List[int], np.ndarray]:
+        terms: List[int] = []
+        term_counts: List[int] = []
+        for ngram, count in counts.items():
+            term = self._term_ids.get(ngram)
+            if term is not None:
+                terms.append(term)
+                term_counts.append(count)
+
+        # Terms that are not in the index get the IDF of a term seen in no example.
+        terms_array = np.array(terms, dtype=np.int64)
+        indexed = terms_array < len(self._idf)
+        idf = np.full(len(terms), np.log(1 + self._indexed) + 1, dtype=np.float32)
+        idf[indexed] = self._idf[terms_array[indexed]]
+        weights = (1 + np.log(np.array(term_counts, dtype=np.float32))) * idf
+        norm = np.linalg.norm(weights)
+        return terms, weights / norm if norm else weights
+
+    def _get_candidates(
+        self, query_terms: List[int], query_weights: np.ndarray, top_k: int
+    ) -> np.ndarray:
+        # The postings of the rarest n-grams are accumulated first, and the n-grams
+        # shared by many questions, which weigh the least, are skipped once the budget
+        # of postings is spent. The scores of the candidates are then computed exactly.
+        terms = np.array(query_terms, dtype=np.int64)
+        indexed = terms < len(self._idf)
+        lengths = np.zeros(len(terms), dtype=np.int64)
+        lengths[indexed] = (
+            self._offsets[terms[indexed] + 1] - self._offsets[terms[indexed]]
+        )
+        for position, term in enumerate(query_terms):
+            new_postings = self._new_postings.get(term)
+            if new_postings is not None:
+                lengths[position] += len(new_postings[0])
+
+        scores = np.zeros(len(self._examples), dtype=np.float32)
+        budget = self.max_postings
+        for position in np.argsort(lengths, kind="stable"):
+            if lengths[position] > budget and budget < self.max_postings:
+                break
+            budget -= lengths[position]
+            term, query_weight = query_terms[position], query_weights[position]
+            if indexed[position]:
+                start, end = self._offsets[term], self._offsets[term + 1]
+                scores[self._posting_examples[start:end]] += (
+                    query_weight * self._posting_weights[start:end]
+                )
+            new_postings = self._new_postings.get(term)
+            if new_postings is not None:
+                example_ids, weights = new_postings
+                scores[example_ids] += query_weight * np.array(
+                    weights, dtype=np.float32
+                )
+
+        candidates = np.flatnonzero(scores > 0)
+        candidate_count = max(self.candidates_per_result * top_k, 64)
+        if len(candidates) > candidate_count:
+            candidates = candidates[
+                np.argpartition(-scores[candidates], candidate_count - 1)[
+                    :candidate_count
+                ]
+            ]
+        return candidates
+
+    def _score(
+        self, candidates: np.ndarray, query_terms: List[int], query_weights: np.ndarray
+    ) -> np.ndarray:
+        # The cosine similarities of the candidates, from their n-gram weights.
+        example_offsets = np.frombuffer(self._example_offsets, dtype=np.int64)
+        entry_terms = np.frombuffer(self._entry_terms, dtype=np.int32)
+        entry_weights = np.frombuffer(self._entry_weights, dtype=np.float32)
+        starts = example_offsets[candidates]
+        lengths = example_offsets[candidates + 1] - starts
+        rows = np.repeat(np.arange(len(candidates)), lengths)
+        entries = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths - starts, lengths
+        )
+
+        query_vector = np.zeros(len(self._term_ids), dtype=np.float32)
+        query_vector[query_terms] = query_weights
+        products = query_vector[entry_terms[entries]] * entry_weights[entries]
+        return np.bincount(rows, weights=products, minlength=len(candidates))
+
+    def _rebuild(self) -> None:
+        example_count = len(self._examples)
+        term_count = len(self._term_ids)
+        entry_examples = np.frombuffer(self._entry_examples, dtype=np.int32)
+        entry_terms = np.frombuffer(self._entry_terms, dtype=np.int32)
+        entry_counts = np.frombuffer(self._entry_counts, dtype=np.float32)
+
+        document_frequencies = np.bincount(entry_terms, minlength=term_count)
+        idf = (np.log((1 + example_count) / (1 + document_frequencies)) + 1).astype(
+            np.float32
+        )
+        weights = (1 + np.log(entry_counts)) * idf[entry_terms]
+        norms = np.sqrt(
+            np.bincount(entry_examples, weights=weights**2, minlength=example_count)
+        )
+        weights = (weights / norms[entry_examples]).astype(np.float32)
+        self._entry_weights = array("f", weights.tobytes())
+
+        order = np.argsort(entry_terms, kind="stable")
+        self._posting_examples = entry_examples[order]
+        self._posting_weights = weights[order]
+        self._offsets = np.zeros(term_count + 1, dtype=np.int64)
+        np.cumsum(document_frequencies, out=self._offsets[1:])
+        self._idf = idf
+        self._indexed = example_count
+        self._new_postings = {}
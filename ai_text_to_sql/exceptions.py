@@ -45,3 +45,63 @@ class NoOpenAIAPIKeyException(Exception):
     """
 
     pass
+
+
+class NoRecordedAnswerException(Exception):
+    """
+    Raised when the replay connector has no recorded answer for a question.
+    """
+
+    pass
+
+
+class QueryCostExceededException(Exception):
+    """
+    Raised when the estimated cost of a query exceeds the thresholds of the
+    QueryCostGuard.
+    """
+
+    pass
+
+
+class QueryCostWarning(UserWarning):
+    """
+    Issued when the estimated cost of a query exceeds the thresholds of the
+    QueryCostGuard and the query is executed anyway.
+    """
+
+    pass
+
+
+class QueryLimitExceededException(Exception):
+    """
+    Raised when a query is cancelled because it exceeded a limit of the data
+    connector.
+    """
+
+    pass
+
+
+class QueryTimeoutException(QueryLimitExceededException):
+    """
+    Raised when a query is cancelled because it exceeded the timeout.
+    """
+
+    pass
+
+
+class RowLimitExceededException(QueryLimitExceededException):
+    """
+    Raised when a query is cancelled because it returned more than the maximum number
+    of rows.
+    """
+
+    pass
+
+
+class NoRelevantDatabaseException(Exception):
+    """
+    Raised when the router cannot find a database that is relevant to a question.
+    """
+
+    pass
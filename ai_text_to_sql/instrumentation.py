@@ -0,0 +1,428 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from types import TracebackType
+from typing import Any, Deque, Dict, Iterator, Optional, Text, Tuple, Type
+
+# The default upper bounds, in seconds, of the buckets of the duration histograms.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# The numeric span attributes that are summed up by the HistogramCollector.
+COUNTED_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "total_tokens", "rows")
+
+
+class Instrumentation:
+    """
+    The base class for instrumentation hooks, which are notified when the stages of
+    the text to SQL pipeline start and end.
+    This class does nothing, and is used when no instrumentation is configured.
+
+    The pipeline records the following spans, nested in the order listed:
+    - convert_text_to_sql, query and query_df for the public methods of TextToSQL
+      and AsyncTextToSQL, and chat.convert_text_to_sql for the chats. The
+      convert_text_to_sql spans have a 'cache_hit' attribute when an answer cache is
+      used, and a 'shared' attribute when a single flight is used.
+    - template for matching the question against the SQL templates in query and
+      query_df when a template cache is used, with a 'cache_hit' attribute.
+    - schema for retrieving the database schema from the data connector.
+    - examples for searching the example store when one is used, with a 'reused'
+      attribute, and the number of 'examples' included in the prompt otherwise.
+    - prompt for pruning the schema and building the prompt or chat messages.
+    - llm for the call to the LLM, with the 'prompt_tokens', 'completion_tokens' and
+      'total_tokens' attributes if the LLM connector reports its token usage.
+    - select_candidate for validating the candidate SQL queries when several are
+      generated, with the 'candidates' and the selected 'candidate' attributes.
+    - cost_guard for the pre-flight check of the SQL query when a cost guard is
+      used, with a 'limited' attribute.
+    - execute for running the SQL query, with the 'rows' and 'shared' attributes.
+    - dataframe for building the Pandas DataFrame of the result.
+    The spans of the methods that stream their results, such as
+    convert_text_to_sql_stream() and query_df_chunks(), only time the work done to
+    produce the results, not the time the consumer spends between them, and a
+    consumer that stops early does not mark them as failed.
+
+    To add a new instrumentation, create a class that inherits from this class and
+    override the start_span() and end_span() methods.
+    """
+
+    def start_span(self, name: Text, attributes: Dict[Text, Any]) -> Any:
+        """
+        Called when a stage of the pipeline starts.
+        :param name: The name of the span.
+        :param attributes: The attributes of the span known at its start.
+        :return: An object that is passed back to end_span(), e.g. a tracing span.
+        """
+        return None
+
+    def end_span(
+        self,
+        handle: Any,
+        name: Text,
+        duration: float,
+        attributes: Dict[Text, Any],
+    ) -> None:
+        """
+        Called when a stage of the pipeline ends.
+        :param handle: The object returned by start_span().
+        :param name: The name of the span.
+        :param duration: The duration of the span in seconds.
+        :param attributes: The attributes of the span. If the stage raised an
+                           exception, its type is recorded in the 'error' attribute.
+        """
+
+
+class InstrumentationSpan:
+    """
+    A context manager that times a stage of the pipeline and reports it to an
+    Instrumentation.
+
+    Parameters:
+    -----------
+    instrumentation : Instrumentation
+        The instrumentation to report the span to.
+    name : Text
+        The name of the span.
+    attributes : Dict
+        The attributes of the span known at its start. This parameter is optional.
+    """
+
+    def __init__(
+        self,
+        instrumentation: Instrumentation,
+        name: Text,
+        attributes: Optional[Dict[Text, Any]] = None,
+    ) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+        self.attributes: Dict[Text, Any] = dict(attributes or {})
+        self._handle: Any = None
+        self._start = 0.0
+        self._paused = 0.0
+
+    def set_attribute(self, key: Text, value: Any) -> None:
+        """
+        Set an attribute of the span.
+        :param key: The name of the attribute.
+        :param value: The value of the attribute.
+        """
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Optional[Dict[Text, Any]]) -> None:
+        """
+        Set several attributes of the span.
+        :param attributes: A dictionary of attributes. None is ignored.
+        """
+        if attributes:
+            self.attributes.update(attributes)
+
+    @contextmanager
+    def pause(self) -> Iterator[None]:
+        """
+        Stop timing the span for the duration of the block, e.g. while a generator is
+        suspended at a yield, so that the time spent by its consumer is not included
+        in the duration of the span.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._paused += time.perf_counter() - start
+
+    def __enter__(self) -> "InstrumentationSpan":
+        self._handle = self.instrumentation.start_span(self.name, self.attributes)
+        self._start = time.perf_counter()
+        self._paused = 0.0
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        duration = time.perf_counter() - self._start - self._paused
+        # A generator closed by its consumer before it is exhausted is not an error.
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.attributes["error"] = exc_type.__name__
+        self.instrumentation.end_span(
+            self._handle, self.name, duration, self.attributes
+        )
+
+
+class Histogram:
+    """
+    A histogram of durations with fixed buckets, which also keeps a bounded window of
+    the most recent samples to compute percentiles.
+
+    Parameters:
+    -----------
+    buckets : Tuple[float, ...]
+        The upper bounds of the buckets, in increasing order.
+    max_samples : int
+        The maximum number of recent samples to keep for percentiles.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...], max_samples: int) -> None:
+        self.buckets = buckets
+        # The last count is for the samples above the largest bound.
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+        :param value: The value to record.
+        """
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Compute a percentile of the recent samples, by the nearest-rank method.
+        :param percent: The percentile to compute, between 0 and 100.
+        :return: The percentile, or None if no value has been recorded.
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = math.ceil(percent / 100 * len(ordered)) - 1
+        return ordered[max(0, min(len(ordered) - 1, rank))]
+
+    def to_dict(self) -> Dict[Text, Any]:
+        """
+        Summarize the histogram.
+        :return: A dictionary with the count, the sum, the mean, the p50, p95 and p99
+                 percentiles and the cumulative count of each bucket.
+        """
+        cumulative = 0
+        buckets: Dict[Text, int] = {}
+        for bound, count in zip(
+            [str(bound) for bound in self.buckets] + ["+Inf"], self.bucket_counts
+        ):
+            cumulative += count
+            buckets[bound] = cumulative
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class HistogramCollector(Instrumentation):
+    """
+    An instrumentation that aggregates the spans of the pipeline in memory.
+    The durations of the spans are recorded in a histogram per span name, the token
+    usage and row counts are summed up per span name, and the cache hits and misses
+    are counted.
+
+    Parameters:
+    -----------
+    buckets : Tuple[float, ...]
+        The upper bounds, in seconds, of the buckets of the duration histograms.
+        This parameter is optional, and defaults to DEFAULT_BUCKETS.
+    max_samples : int
+        The maximum number of recent durations to keep per span name to compute
+        percentiles. This parameter is optional, and defaults to 10000.
+    """
+
+    def __init__(
+        self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_samples: int = 10000
+    ) -> None:
+        self.buckets = tuple(buckets)
+        self.max_samples = max_samples
+        self.histograms: Dict[Text, Histogram] = {}
+        self.counters: Dict[Text, float] = {}
+        self._lock = threading.Lock()
+
+    def end_span(
+        self,
+        handle: Any,
+        name: Text,
+        duration: float,
+        attributes: Dict[Text, Any],
+    ) -> None:
+        """
+        Record the duration and the counted attributes of a span.
+        :param handle: Not used.
+        :param name: The name of the span.
+        :param duration: The duration of the span in seconds.
+        :param attributes: The attributes of the span.
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = Histogram(self.buckets, self.max_samples)
+                self.histograms[name] = histogram
+            histogram.observe(duration)
+
+            for key in COUNTED_ATTRIBUTES:
+                value = attributes.get(key)
+                if value is not None:
+                    self._increment(f"{name}.{key}", value)
+            if "cache_hit" in attributes:
+                outcome = "cache_hits" if attributes["cache_hit"] else "cache_misses"
+                self._increment(f"{name}.{outcome}", 1)
+            if "error" in attributes:
+                self._increment(f"{name}.errors", 1)
+
+    def _increment(self, key: Text, value: float) -> None:
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def get_histogram(self, name: Text) -> Optional[Histogram]:
+        """
+        Get the duration histogram of a span.
+        :param name: The name of the span.
+        :return: The histogram, or None if no span with the name has been recorded.
+        """
+        return self.histograms.get(name)
+
+    def get_summary(self) -> Dict[Text, Any]:
+        """
+        Summarize the recorded spans.
+        :return: A dictionary with the summary of the duration histogram of each span
+                 name, in seconds, and the counters.
+        """
+        with self._lock:
+            return {
+                "durations": {
+                    name: histogram.to_dict()
+                    for name, histogram in self.histograms.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def reset(self) -> None:
+        """
+        Discard all the recorded spans.
+        """
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+class OpenTelemetrySpanExporter(Instrumentation):
+    """
+    An instrumentation that exports the stages of the pipeline as OpenTelemetry spans.
+    The spans are nested, so that the stages show up as children of the
+    convert_text_to_sql, query and query_df spans, which are themselves children of
+    the span that is current when they are called.
+
+    Parameters:
+    -----------
+    tracer : opentelemetry.trace.Tracer
+        The tracer to create the spans with. This parameter is optional. If this
+        parameter is not provided, the tracer of the global tracer provider is used.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        try:
+            from opentelemetry import context, trace
+        except ImportError:
+            raise ImportError(
+                "The opentelemetry-api package is required to export spans. "
+                "Please run 'pip install opentelemetry-api' to install it."
+            )
+
+        self._context = context
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("ai_text_to_sql")
+
+    def start_span(self, name: Text, attributes: Dict[Text, Any]) -> Any:
+        """
+        Start an OpenTelemetry span and make it the current span.
+        :param name: The name of the span.
+        :param attributes: The attributes of the span known at its start.
+        :return: The span and the token to restore the previous context.
+        """
+        span = self.tracer.start_span(name, attributes=_to_span_attributes(attributes))
+        token = self._context.attach(self._trace.set_span_in_context(span))
+        return span, token
+
+    def end_span(
+        self,
+        handle: Any,
+        name: Text,
+        duration: float,
+        attributes: Dict[Text, Any],
+    ) -> None:
+        """
+        Set the attributes of the OpenTelemetry span, end it and restore the previous
+        context.
+        :param handle: The span and the token returned by start_span().
+        :param name: The name of the span.
+        :param duration: The duration of the span in seconds.
+        :param attributes: The attributes of the span.
+        """
+        span, token = handle
+        span.set_attributes(_to_span_attributes(attributes))
+        if "error" in attributes:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end()
+        self._context.detach(token)
+
+
+class CompositeInstrumentation(Instrumentation):
+    """
+    An instrumentation that forwards the spans to several instrumentations, e.g. to
+    a HistogramCollector and an OpenTelemetrySpanExporter.
+
+    Parameters:
+    -----------
+    instrumentations : Instrumentation
+        The instrumentations to forward the spans to.
+    """
+
+    def __init__(self, *instrumentations: Instrumentation) -> None:
+        self.instrumentations = instrumentations
+
+    def start_span(self, name: Text, attributes: Dict[Text, Any]) -> Any:
+        """
+        Start the span in every instrumentation.
+        :param name: The name of the span.
+        :param attributes: The attributes of the span known at its start.
+        :return: The list of the objects returned by the instrumentations.
+        """
+        return [
+            instrumentation.start_span(name, attributes)
+            for instrumentation in self.instrumentations
+        ]
+
+    def end_span(
+        self,
+        handle: Any,
+        name: Text,
+        duration: float,
+        attributes: Dict[Text, Any],
+    ) -> None:
+        """
+        End the span in every instrumentation, in the reverse order they were started.
+        :param handle: The list of the objects returned by start_span().
+        :param name: The name of the span.
+        :param duration: The duration of the span in seconds.
+        :param attributes: The attributes of the span.
+        """
+        for instrumentation, instrumentation_handle in reversed(
+            list(zip(self.instrumentations, handle))
+        ):
+            instrumentation.end_span(instrumentation_handle, name, duration, attributes)
+
+
+def _to_span_attributes(attributes: Dict[Text, Any]) -> Dict[Text, Any]:
+    # OpenTelemetry attributes are limited to primitive values.
+    return {
+        key: value
+        for key, value in attributes.items()
+        if isinstance(value, (str, bool, int, float))
+    }
@@ -1,3 +1,35 @@
-from .openai_connector import OpenAIConnector
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["OpenAIConnector"]
+if TYPE_CHECKING:
+    from .hedged_connector import HedgedConnector
+    from .openai_connector import OpenAIConnector
+    from .record_replay_connector import RecordReplayConnector
+    from .replay_connector import ReplayConnector
+
+# The connectors are imported on first access, so that importing the package does
+# not import the client library of every LLM provider.
+_CONNECTOR_MODULES = {
+    "HedgedConnector": "hedged_connector",
+    "OpenAIConnector": "openai_connector",
+    "RecordReplayConnector": "record_replay_connector",
+    "ReplayConnector": "replay_connector",
+}
+
+__all__ = [
+    "HedgedConnector",
+    "OpenAIConnector",
+    "RecordReplayConnector",
+    "ReplayConnector",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _CONNECTOR_MODULES:
+        module = importlib.import_module(f".{_CONNECTOR_MODULES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,311 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Text,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from ai_text_to_sql.instrumentation import Histogram
+from ai_text_to_sql.llm_connectors.llm_connector import LLMConnector
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+T = TypeVar("T")
+
+# The result of a call: the answer, the token usage and whether it was the hedge.
+Outcome = Tuple[Any, Optional[Dict[Text, int]], bool]
+
+
+class HedgedConnector(LLMConnector):
+    """
+    The class for cutting the tail latency of another LLM connector by hedging its
+    requests.
+    If the wrapped connector has not answered a request within the hedge delay, a
+    duplicate request is sent, and the answer that arrives first is returned. The
+    other request is cancelled if it is asynchronous. A synchronous request cannot be
+    cancelled once it has started, so it runs to completion in its worker thread and
+    its answer is ignored. By default, the hedge delay is a high percentile of the
+    latencies observed so far, so that only the slowest requests, e.g. the slowest
+    5%, are duplicated. The latency observed for each request is the time from the
+    original request to the first successful answer.
+
+    Parameters:
+    -----------
+    llm_connector : LLMConnector
+        The LLMConnector to hedge the requests of. Prompts are created and formatted
+        by this connector.
+    delay : float
+        The fixed number of seconds to wait before sending the duplicate request.
+        This parameter is optional, and defaults to None. If this parameter is not
+        provided, the delay is the given percentile of the observed latencies.
+    percentile : float
+        The percentile of the observed latencies, between 0 and 100, to use as the
+        hedge delay. This parameter is optional, and defaults to 95.
+    initial_delay : float
+        The number of seconds to wait before sending the duplicate request until
+        min_samples latencies have been observed. This parameter is optional, and
+        defaults to 2.
+    min_samples : int
+        The number of latencies to observe before the percentile is used. This
+        parameter is optional, and defaults to 20.
+    max_samples : int
+        The number of most recent latencies to compute the percentile from. This
+        parameter is optional, and defaults to 1000.
+    max_workers : int
+        The maximum number of concurrent synchronous requests, including the
+        duplicates. The requests are sent from a pool of worker threads, which is
+        shut down by close(). This parameter is optional, and defaults to 16.
+    """
+
+    def __init__(
+        self,
+        llm_connector: LLMConnector,
+        delay: Optional[float] = None,
+        percentile: float = 95,
+        initial_delay: float = 2.0,
+        min_samples: int = 20,
+        max_samples: int = 1000,
+        max_workers: int = 16,
+    ) -> None:
+        self.llm_connector = llm_connector
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.name = llm_connector.name
+        self.requests = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+
+        self._latencies = Histogram((), max_samples=max_samples)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hedged-llm"
+        )
+
+    def get_hedge_delay(self) -> float:
+        """
+        Get the number of seconds to wait before sending a duplicate request.
+        :return: The fixed delay if one is set, else the percentile of the observed
+                 latencies, or the initial delay if too few have been observed.
+        """
+        if self.delay is not None:
+            return self.delay
+
+        with self._lock:
+            if self._latencies.count < self.min_samples:
+                return self.initial_delay
+            return self._latencies.percentile(self.percentile) or self.initial_delay
+
+    def close(self) -> None:
+        """
+        Shut down the worker threads that send the synchronous requests, without
+        waiting for the requests in flight. The requests that have not started are
+        cancelled.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Calls the wrapped connector, sending a duplicate request if it is slow.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: The response (SQL query) from the first API call to complete.
+        """
+        return self._hedge(lambda: self.llm_connector.get_answer(prompt, messages))
+
+    def get_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Calls the wrapped connector for several candidate responses, sending a
+        duplicate request if it is slow.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :param n: The number of candidate responses to generate.
+        :return: The candidate responses from the first API call to complete.
+        """
+        return self._hedge(lambda: self.llm_connector.get_answers(prompt, messages, n))
+
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Calls the wrapped connector asynchronously, sending a duplicate request if it
+        is slow and cancelling the request that loses.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: The response (SQL query) from the first API call to complete.
+        """
+        return await self._ahedge(
+            lambda: self.llm_connector.aget_answer(prompt, messages)
+        )
+
+    async def aget_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Calls the wrapped connector asynchronously for several candidate responses,
+        sending a duplicate request if it is slow and cancelling the request that
+        loses.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :param n: The number of candidate responses to generate.
+        :return: The candidate responses from the first API call to complete.
+        """
+        return await self._ahedge(
+            lambda: self.llm_connector.aget_answers(prompt, messages, n)
+        )
+
+    def _hedge(self, function: Callable[[], T]) -> T:
+        def call(is_hedge: bool) -> Outcome:
+            # The worker thread does not share the context of the caller, so the
+            # usage it sets has to be carried back. It is reset first, as the thread
+            # keeps the usage of the last request it sent.
+            self.llm_connector.set_last_usage(None)
+            answer = function()
+            return answer, self.llm_connector.get_last_usage(), is_hedge
+
+        with self._lock:
+            self.requests += 1
+        start = time.perf_counter()
+        futures = [self._executor.submit(call, False)]
+        done, _ = wait(futures, timeout=self.get_hedge_delay())
+        if not done:
+            with self._lock:
+                self.hedged_requests += 1
+            futures.append(self._executor.submit(call, True))
+
+        pending: Set[Future] = set(futures)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The other request is only cancelled if it has not started.
+                    for other_future in pending:
+                        other_future.cancel()
+                    return self._use_outcome(future.result(), start)
+                error = error or future.exception()
+
+        assert error is not None
+        raise error
+
+    async def _ahedge(self, function: Callable[[], Awaitable[T]]) -> T:
+        async def call(is_hedge: bool) -> Outcome:
+            # The task runs in a copy of the context of the caller, which may hold the
+            # usage of an earlier request.
+            self.llm_connector.set_last_usage(None)
+            answer = await function()
+            return answer, self.llm_connector.get_last_usage(), is_hedge
+
+        with self._lock:
+            self.requests += 1
+        start = time.perf_counter()
+        tasks: List[asyncio.Future] = [asyncio.ensure_future(call(False))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.get_hedge_delay())
+            if not done:
+                with self._lock:
+                    self.hedged_requests += 1
+                tasks.append(asyncio.ensure_future(call(True)))
+
+            pending: Set[asyncio.Future] = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return self._use_outcome(task.result(), start)
+                    error = error or task.exception()
+
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _use_outcome(self, outcome: Outcome, start: float) -> Any:
+        answer, usage, is_hedge = outcome
+        # Only the latency of the first successful answer is observed, from the
+        # original request, so that the delay is not skewed by the requests that lost
+        # or by the shorter latencies of the hedges.
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._latencies.observe(latency)
+            if is_hedge:
+                self.hedge_wins += 1
+        self.set_last_usage(usage)
+        return answer
+
+    def get_model_parameters(self) -> Dict:
+        """
+        Get the model parameters of the wrapped connector, so that cached answers are
+        shared with it.
+        :return: A dictionary containing the model parameters.
+        """
+        return self.llm_connector.get_model_parameters()
+
+    def format_database_schema(
+        self, database_schema: Dict, connector_name: Text
+    ) -> Text:
+        """
+        Formats the database schema with the wrapped connector.
+        :param database_schema: The database schema to format.
+        :param connector_name: The name of the connector.
+        :return: A formatted string containing the database schema.
+        """
+        return self.llm_connector.format_database_schema(
+            database_schema, connector_name
+        )
+
+    def create_prompt(
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        """
+        Creates the prompt with the wrapped connector.
+        :param user_input: The user input to be converted to SQL.
+        :param database_schema: The database schema to use for the prompt.
+        :param connector_name: The name of the connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
+        :return: The prompt for the API call.
+        """
+        return self.llm_connector.create_prompt_with_examples(
+            user_input, database_schema, connector_name, examples
+        )
+
+    def to_langchain(self) -> "BaseChatModel":
+        """
+        Converts the wrapped connector to a LangChain chat model. The requests of the
+        chat model are not hedged.
+        :return: The LangChain chat model.
+        """
+        return self.llm_connector.to_langchain()
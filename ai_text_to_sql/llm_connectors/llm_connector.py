@@ -1,9 +1,104 @@
+import asyncio
+import functools
+import inspect
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Dict, List, Text, Union
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Text,
+    Tuple,
+    Type,
+    Union,
+)
 
 if TYPE_CHECKING:
     from langchain_core.language_models.chat_models import BaseChatModel
 
+# The token usage of the last LLM call. A context variable is used rather than an
+# attribute so that concurrent calls from threads and asyncio tasks do not mix up.
+_last_usage: ContextVar[Optional[Dict[Text, int]]] = ContextVar(
+    "last_usage", default=None
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _accepts_examples(connector_class: Type["LLMConnector"]) -> bool:
+    parameters = inspect.signature(connector_class.create_prompt).parameters.values()
+    return any(
+        parameter.name == "examples" or parameter.kind is parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+# The instructions that end the prompts of the TableListLLMConnector, on the line
+# after the question.
+SQL_INSTRUCTIONS = (
+    "Your response should be a clear and concise SQL statement that retrieves only "
+    "the necessary data from the relevant tables. Please ensure that your query is "
+    "optimized for performance and accuracy. Your response should only include the "
+    "SQL statement, without any additional text or enclosing characters."
+)
+
+
+class SQLStatementBuffer:
+    """
+    A buffer that receives the text of an answer as it is streamed, and detects the
+    end of the first complete SQL statement, i.e. the first semicolon outside of
+    string literals, quoted identifiers and comments.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.complete = False
+        # The character that closes the literal, identifier or comment being read.
+        self._closing: Optional[Text] = None
+
+    def feed(self, chunk: Text) -> Text:
+        """
+        Add a chunk of the answer to the buffer.
+        :param chunk: The chunk of the answer.
+        :return: The part of the chunk that belongs to the first SQL statement, without
+                 the semicolon that ends it.
+        """
+        if self.complete:
+            return ""
+
+        start = len(self.text)
+        self.text += chunk
+        index = start
+        # Two-character delimiters may be split across chunks, so the last character
+        # of the previous chunk is looked at again.
+        if start > 0 and self._closing is None and self.text[start - 1] in "-/":
+            index = start - 1
+        while index < len(self.text):
+            character = self.text[index]
+            if self._closing is not None:
+                if self.text.startswith(self._closing, index):
+                    index += len(self._closing)
+                    self._closing = None
+                    continue
+            elif character == ";":
+                self.complete = True
+                self.text = self.text[:index]
+                return self.text[start:]
+            elif character in "'\"`":
+                self._closing = character
+            elif character == "[":
+                self._closing = "]"
+            elif self.text.startswith("--", index):
+                self._closing = "\n"
+                index += 1
+            elif self.text.startswith("/*", index):
+                self._closing = "*/"
+                index += 1
+            index += 1
+        return chunk
+
 
 class LLMConnector(ABC):
     """
@@ -14,11 +109,26 @@ class LLMConnector(ABC):
     2. Create a new class in the module that inherits from the base LLMConnector class.
     3. Add the 'name' attribute to the new class to set the name of the connector.
     4. Implement the format_database_schema(), create_prompt() and get_answer()
-       abstract methods.
-    5. Add an import statement for the new class in the __init__.py file in the
-       llm_connectors directory.
+       abstract methods. The examples parameter of create_prompt() is optional;
+       connectors that do not accept it get prompts without examples. Alternatively,
+       inherit from the TableListLLMConnector class to reuse the prompts of the
+       OpenAI connector, and only implement get_answer().
+    5. Add the new class and its module to the lazily imported connectors in the
+       __init__.py file in the llm_connectors directory.
+    6. Optionally, override the aget_answer() method with a native asynchronous
+       implementation. By default, get_answer() is run in a worker thread.
+    7. Optionally, call set_last_usage() with the token usage reported by the LLM in
+       get_answer() and aget_answer(), so that it can be instrumented.
+    8. Optionally, override the get_answers() and aget_answers() methods to generate
+       several candidate answers in a single request. By default, get_answer() is
+       called once per candidate.
+    9. Optionally, override the stream_answer() and astream_answer() methods to
+       stream the answer as it is generated. By default, the whole answer is yielded
+       at once.
     """
 
+    name = "Base"
+
     @abstractmethod
     def format_database_schema(
         self, database_schema: Dict, connector_name: Text
@@ -36,21 +146,68 @@ class LLMConnector(ABC):
 
     @abstractmethod
     def create_prompt(
-        self, user_input: Text, database_schema: Dict, connector_name: Text
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
     ) -> Text:
         """
         Creates the prompt for the API call by incorporating the user input and the
         database schema.
         Use the format_database_schema method to format the database schema as required
-        and incorporate it into the prompt.
+        and incorporate it into the prompt, and the format_examples method to format
+        the examples.
         :param user_input: The user input to be converted to SQL.
         :param database_schema: The database schema to use for the prompt as a
                                 formatted string.
         :param connector_name: The name of the connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
         :return: The prompt for the API call.
         """
         raise NotImplementedError
 
+    def create_prompt_with_examples(
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        """
+        Creates the prompt with create_prompt(), passing the examples only if there are
+        any and create_prompt() accepts them, so that connectors implementing the
+        original create_prompt(user_input, database_schema, connector_name) keep
+        working. The examples are left out of the prompts of such connectors.
+        :param user_input: The user input to be converted to SQL.
+        :param database_schema: The database schema to use for the prompt.
+        :param connector_name: The name of the connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
+        :return: The prompt for the API call.
+        """
+        if examples and _accepts_examples(type(self)):
+            return self.create_prompt(
+                user_input, database_schema, connector_name, examples=examples
+            )
+        return self.create_prompt(user_input, database_schema, connector_name)
+
+    def format_examples(self, examples: Optional[List[Tuple[Text, Text]]]) -> Text:
+        """
+        Formats the examples of questions and their SQL queries for the prompt, so that
+        the LLM can follow the queries that answered similar questions.
+        :param examples: The examples, as a list of (question, SQL query) tuples.
+        :return: A formatted string containing the examples, ending with a line break,
+                 or an empty string if there are no examples.
+        """
+        if not examples:
+            return ""
+        formatted_examples = "### Similar questions, with their SQL statements:\n"
+        for question, sql in examples:
+            formatted_examples += f"# {question}\n{sql}\n"
+        return formatted_examples
+
     @abstractmethod
     def get_answer(
         self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
@@ -67,6 +224,135 @@ class LLMConnector(ABC):
         """
         raise NotImplementedError
 
+    def stream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Iterator[Text]:
+        """
+        Calls the LLM and yields the response as it is generated, up to the end of the
+        first complete SQL statement.
+        By default, the whole response of get_answer() is yielded at once.
+        :param prompt: The prompt for the API call.
+                       This parameter is optional, but either this parameter or the
+                       messages parameter must be specified.
+        :param messages: The messages to include in the API call.
+                         This parameter is optional, but either this parameter or the
+                         prompt parameter must be specified.
+        :return: An iterator over the chunks of the response (SQL query).
+        """
+        yield self.get_answer(prompt, messages)
+
+    async def astream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> AsyncIterator[Text]:
+        """
+        Calls the LLM asynchronously and yields the response as it is generated, up to
+        the end of the first complete SQL statement.
+        By default, the whole response of aget_answer() is yielded at once.
+        :param prompt: The prompt for the API call.
+                       This parameter is optional, but either this parameter or the
+                       messages parameter must be specified.
+        :param messages: The messages to include in the API call.
+                         This parameter is optional, but either this parameter or the
+                         prompt parameter must be specified.
+        :return: An asynchronous iterator over the chunks of the response (SQL query).
+        """
+        yield await self.aget_answer(prompt, messages)
+
+    def get_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Calls the LLM and returns several candidate responses.
+        By default, get_answer() is called once per candidate.
+        :param prompt: The prompt for the API call.
+                       This parameter is optional, but either this parameter or the
+                       messages parameter must be specified.
+        :param messages: The messages to include in the API call.
+                         This parameter is optional, but either this parameter or the
+                         prompt parameter must be specified.
+        :param n: The number of candidate responses to generate.
+        :return: The candidate responses (SQL queries) from the API call.
+        """
+        return [self.get_answer(prompt, messages) for _ in range(n)]
+
+    async def aget_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Calls the LLM asynchronously and returns several candidate responses.
+        By default, aget_answer() is called concurrently once per candidate.
+        :param prompt: The prompt for the API call.
+                       This parameter is optional, but either this parameter or the
+                       messages parameter must be specified.
+        :param messages: The messages to include in the API call.
+                         This parameter is optional, but either this parameter or the
+                         prompt parameter must be specified.
+        :param n: The number of candidate responses to generate.
+        :return: The candidate responses (SQL queries) from the API call.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.aget_answer(prompt, messages) for _ in range(n))
+            )
+        )
+
+    def get_model_parameters(self) -> Dict:
+        """
+        Get the parameters that determine the answers of the LLM, such as the model
+        name and the sampling parameters. These are used to key cached answers.
+        This method should be overridden by subclasses with configurable models.
+        :return: A dictionary containing the model parameters.
+        """
+        return {"name": self.name}
+
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Calls the LLM asynchronously and returns the response.
+        By default, the synchronous get_answer() method is run in a worker thread.
+        :param prompt: The prompt for the API call.
+                       This parameter is optional, but either this parameter or the
+                       messages parameter must be specified.
+        :param messages: The messages to include in the API call.
+                         This parameter is optional, but either this parameter or the
+                         prompt parameter must be specified.
+        :return: The response (SQL query) from the API call.
+        """
+
+        def get_answer_and_usage() -> Tuple[Text, Optional[Dict[Text, int]]]:
+            # The worker thread runs in a copy of the context, so the usage it sets
+            # has to be carried back.
+            return self.get_answer(prompt, messages), self.get_last_usage()
+
+        answer, usage = await asyncio.to_thread(get_answer_and_usage)
+        self.set_last_usage(usage)
+        return answer
+
+    def get_last_usage(self) -> Optional[Dict[Text, int]]:
+        """
+        Get the token usage of the last LLM call made in the current thread or
+        asyncio task.
+        :return: A dictionary with the 'prompt_tokens', 'completion_tokens' and
+                 'total_tokens', or None if the connector does not report its usage.
+        """
+        return _last_usage.get()
+
+    def set_last_usage(self, usage: Optional[Dict[Text, int]]) -> None:
+        """
+        Set the token usage of the last LLM call made in the current thread or asyncio
+        task.
+        :param usage: A dictionary with the 'prompt_tokens', 'completion_tokens' and
+                      'total_tokens', or None if the usage is unknown.
+        """
+        _last_usage.set(usage)
+
     @abstractmethod
     def to_langchain(self) -> "BaseChatModel":
         """
@@ -74,3 +360,78 @@ class LLMConnector(ABC):
         :return: The LangChain chat model.
         """
         raise NotImplementedError
+
+
+class TableListLLMConnector(LLMConnector):
+    """
+    The abstract base class for LLM connectors whose prompts list the tables of the
+    database with their columns, followed by the examples, the question and the
+    instructions for the SQL statement, e.g. the OpenAI connector.
+    Only the get_answer() abstract method has to be implemented.
+    """
+
+    # The most recently formatted database schema, by identity, with the name of the
+    # connector and the formatted schema.
+    _formatted_database_schema: Optional[Tuple[Dict, Text, Text]] = None
+
+    def format_database_schema(
+        self, database_schema: Dict, connector_name: Text
+    ) -> Text:
+        """
+        Formats the database schema for the prompt.
+        The most recently formatted schema is memoized by identity, so that prompts
+        built from the same cached schema snapshot share a single formatted prefix.
+        :param database_schema: The database schema to format.
+        :param connector_name: The name of the connector.
+        :return: A formatted string containing the database schema.
+        """
+        cached = self._formatted_database_schema
+        if (
+            cached is not None
+            and cached[0] is database_schema
+            and cached[1] == connector_name
+        ):
+            return cached[2]
+
+        formatted_database_schema = (
+            f"### {connector_name} tables, with their properties:\n#\n"
+        )
+        formatted_database_schema += "\n".join(
+            [
+                f"# {table_name} ({', '.join(columns)})"
+                for table_name, columns in database_schema.items()
+            ]
+        )
+
+        self._formatted_database_schema = (
+            database_schema,
+            connector_name,
+            formatted_database_schema,
+        )
+        return formatted_database_schema
+
+    def create_prompt(
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        """
+        Creates the prompt for the API call by incorporating the user input and the
+        database schema.
+        :param user_input: The user input to be converted to SQL.
+        :param database_schema: The database schema to use for the prompt.
+        :param connector_name: The name of the connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
+        :return: The prompt for the API call.
+        """
+        return (
+            self.format_database_schema(database_schema, connector_name)
+            + "\n"
+            + self.format_examples(examples)
+            + user_input
+            + "\n"
+            + SQL_INSTRUCTIONS
+        )
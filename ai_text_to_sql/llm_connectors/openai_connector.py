@@ -1,17 +1,29 @@
 import os
-from typing import TYPE_CHECKING, Dict, List, Text, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Text,
+    Union,
+)
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 if TYPE_CHECKING:
     from langchain_openai import ChatOpenAI
 
 
 from ai_text_to_sql.exceptions import NoOpenAIAPIKeyException
-from ai_text_to_sql.llm_connectors.llm_connector import LLMConnector
+from ai_text_to_sql.llm_connectors.llm_connector import (
+    SQLStatementBuffer,
+    TableListLLMConnector,
+)
 
 
-class OpenAIConnector(LLMConnector):
+class OpenAIConnector(TableListLLMConnector):
     """
     The class for interacting with the OpenAI API.
 
@@ -73,6 +85,19 @@ class OpenAIConnector(LLMConnector):
         self.client = OpenAI(
             api_key=self.api_key,
         )
+        self._async_client: Union[AsyncOpenAI, None] = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """
+        The asynchronous OpenAI client, created on first use.
+        :return: The AsyncOpenAI client.
+        """
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+            )
+        return self._async_client
 
     def get_answer(
         self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
@@ -82,71 +107,185 @@ class OpenAIConnector(LLMConnector):
         :param prompt: The prompt for the API call.
         :return: The response (SQL query) from the API call.
         """
-        if not prompt and not messages:
-            raise ValueError("Either prompt or messages must be provided.")
-
-        if prompt and messages:
-            raise ValueError("Only one of prompt or messages can be provided.")
-
-        if prompt:
-            messages = [{"role": "user", "content": prompt}]
-
         response = self.client.chat.completions.create(
-            model=self.model,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            top_p=self.top_p,
-            frequency_penalty=self.frequency_penalty,
-            presence_penalty=self.presence_penalty,
-            stop=self.stop,
-            messages=messages,  # type: ignore[arg-type]
+            **self._get_completion_parameters(prompt, messages)
         )
+        self.set_last_usage(self._get_usage(response))
 
         return response.choices[0].message.content or ""
 
-    def create_prompt(
-        self, user_input: Text, database_schema: Dict, connector_name: Text
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
     ) -> Text:
         """
-        Creates the prompt for the API call by incorporating the user input and the
-        database schema.
-        :param user_input: The user input to be converted to SQL.
-        :param database_schema: The database schema to use for the prompt as a
-                                formatted string.
-        :param connector_name: The name of the connector.
-        :return: The prompt for the API call.
-        """
-        return (
-            self.format_database_schema(database_schema, connector_name)
-            + "\n"
-            + user_input
-            + "\nYour response should be a clear and concise SQL statement that"
-            " retrieves only the necessary data from the relevant tables. "
-            "Please ensure that your query is optimized for performance and "
-            "accuracy. Your response should only include the SQL statement,"
-            " without any additional text or enclosing characters."
+        Calls the OpenAI Completion API asynchronously with the provided prompt.
+        :param prompt: The prompt for the API call.
+        :return: The response (SQL query) from the API call.
+        """
+        response = await self.async_client.chat.completions.create(
+            **self._get_completion_parameters(prompt, messages)
         )
+        self.set_last_usage(self._get_usage(response))
 
-    def format_database_schema(
-        self, database_schema: Dict, connector_name: Text
-    ) -> Text:
+        return response.choices[0].message.content or ""
+
+    def stream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Iterator[Text]:
         """
-        Formats the database schema for the prompt.
-        :param database_schema: The database schema to format.
-        :param connector_name: The name of the connector.
-        :return: A formatted string containing the database schema.
+        Calls the OpenAI Completion API with the provided prompt and yields the tokens
+        of the response as they arrive. The stream is closed at the end of the first
+        complete SQL statement, so that the trailing tokens are not generated.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: An iterator over the chunks of the response (SQL query).
         """
-        formatted_database_schema = (
-            f"### {connector_name} tables, with their properties:\n#\n"
+        stream = self.client.chat.completions.create(
+            stream=True,
+            stream_options={"include_usage": True},
+            **self._get_completion_parameters(prompt, messages),
         )
-        formatted_database_schema += "\n".join(
-            [
-                f"# {table_name} ({', '.join(columns)})"
-                for table_name, columns in database_schema.items()
-            ]
+        statement = SQLStatementBuffer()
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    self.set_last_usage(self._get_usage(chunk))
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    text = statement.feed(content)
+                    if text:
+                        yield text
+                    if statement.complete:
+                        break
+        finally:
+            stream.close()
+
+    async def astream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> AsyncIterator[Text]:
+        """
+        Calls the OpenAI Completion API asynchronously with the provided prompt and
+        yields the tokens of the response as they arrive. The stream is closed at the
+        end of the first complete SQL statement, so that the trailing tokens are not
+        generated.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: An asynchronous iterator over the chunks of the response (SQL query).
+        """
+        stream = await self.async_client.chat.completions.create(
+            stream=True,
+            stream_options={"include_usage": True},
+            **self._get_completion_parameters(prompt, messages),
         )
+        statement = SQLStatementBuffer()
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    self.set_last_usage(self._get_usage(chunk))
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    text = statement.feed(content)
+                    if text:
+                        yield text
+                    if statement.complete:
+                        break
+        finally:
+            await stream.close()
+
+    def get_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Calls the OpenAI Completion API with the provided prompt, asking for several
+        choices in a single request. A temperature above 0 is needed for the choices
+        to differ.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :param n: The number of candidate responses to generate.
+        :return: The candidate responses (SQL queries) from the API call.
+        """
+        response = self.client.chat.completions.create(
+            n=n, **self._get_completion_parameters(prompt, messages)
+        )
+        self.set_last_usage(self._get_usage(response))
+
+        return [choice.message.content or "" for choice in response.choices]
+
+    async def aget_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Calls the OpenAI Completion API asynchronously with the provided prompt,
+        asking for several choices in a single request. A temperature above 0 is
+        needed for the choices to differ.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :param n: The number of candidate responses to generate.
+        :return: The candidate responses (SQL queries) from the API call.
+        """
+        response = await self.async_client.chat.completions.create(
+            n=n, **self._get_completion_parameters(prompt, messages)
+        )
+        self.set_last_usage(self._get_usage(response))
+
+        return [choice.message.content or "" for choice in response.choices]
+
+    def get_model_parameters(self) -> Dict:
+        """
+        Get the parameters that determine the answers of the OpenAI API.
+        :return: A dictionary containing the model parameters.
+        """
+        return {
+            "name": self.name,
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "frequency_penalty": self.frequency_penalty,
+            "presence_penalty": self.presence_penalty,
+            "stop": self.stop,
+        }
+
+    @staticmethod
+    def _get_usage(response: Any) -> Union[Dict[Text, int], None]:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+
+    def _get_completion_parameters(
+        self, prompt: Union[Text, None], messages: Union[List[Dict], None]
+    ) -> Dict[Text, Any]:
+        if not prompt and not messages:
+            raise ValueError("Either prompt or messages must be provided.")
+
+        if prompt and messages:
+            raise ValueError("Only one of prompt or messages can be provided.")
+
+        if prompt:
+            messages = [{"role": "user", "content": prompt}]
 
-        return formatted_database_schema
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "frequency_penalty": self.frequency_penalty,
+            "presence_penalty": self.presence_penalty,
+            "stop": self.stop,
+            "messages": messages,
+        }
 
     def to_langchain(self) -> "ChatOpenAI":
         """
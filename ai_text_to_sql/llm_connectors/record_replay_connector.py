@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Text,
+    Tuple,
+    Union,
+)
+
+from ai_text_to_sql.exceptions import NoRecordedAnswerException
+from ai_text_to_sql.llm_connectors.llm_connector import LLMConnector
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+MODES = ("auto", "record", "replay")
+
+
+class RecordReplayConnector(LLMConnector):
+    """
+    The class for recording the answers of another LLM connector and replaying them
+    without calling the LLM.
+    Every request is keyed by a hash of its messages, of the model parameters of the
+    wrapped connector and of the number of answers requested. Streamed answers are
+    recorded once the stream is complete and replayed as a single chunk. Answers are
+    appended to a cassette file in the JSON Lines format, one compact line per answer,
+    so the cassette can be shared between runs, e.g. to make CI and load tests fast
+    and free, or to pre-warm new instances with the answers recorded by earlier ones.
+
+    Parameters:
+    -----------
+    llm_connector : LLMConnector
+        The LLMConnector to record the answers of. Prompts are created and formatted
+        by this connector.
+    cassette_path : Text
+        The path to the cassette file. The file is created if it does not exist, and
+        the answers it holds are loaded.
+    mode : Text
+        'auto' to replay the recorded answers and record the others, 'record' to
+        always call the LLM and record its answers, or 'replay' to only replay the
+        recorded answers and raise a NoRecordedAnswerException for the others. This
+        parameter is optional, and defaults to 'auto'.
+    """
+
+    def __init__(
+        self, llm_connector: LLMConnector, cassette_path: Text, mode: Text = "auto"
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"The mode must be one of {', '.join(MODES)}.")
+
+        self.llm_connector = llm_connector
+        self.cassette_path = cassette_path
+        self.mode = mode
+        self.name = llm_connector.name
+        self.hits = 0
+        self.misses = 0
+
+        self._answers: Dict[Text, Union[Text, List[Text]]] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(cassette_path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(cassette_path):
+            self.load_cassette(cassette_path)
+
+    def load_cassette(self, path: Text) -> int:
+        """
+        Load the answers recorded in a cassette file, e.g. to pre-warm the connector
+        with the answers recorded by another instance. Later entries override earlier
+        ones for the same request.
+        :param path: The path to the cassette file.
+        :return: The number of answers loaded.
+        """
+        answers = {}
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line may be truncated if a process was killed while writing.
+                    continue
+                answers[entry["key"]] = entry["answer"]
+
+        with self._lock:
+            self._answers.update(answers)
+        return len(answers)
+
+    def get_request_key(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+        stream: bool = False,
+    ) -> Text:
+        """
+        Get the key of a request.
+        :param prompt: The prompt of the request.
+        :param messages: The messages of the request.
+        :param n: The number of answers requested.
+        :param stream: Whether the answer is streamed.
+        :return: A hash of the messages, the model parameters and the options of the
+                 request.
+        """
+        if not prompt and not messages:
+            raise ValueError("Either prompt or messages must be provided.")
+
+        if prompt:
+            messages = [{"role": "user", "content": prompt}]
+
+        request: List[Any] = [messages, self.llm_connector.get_model_parameters()]
+        # The options are only hashed if they are set, so that the answers recorded
+        # for single requests remain valid.
+        options: Dict[Text, Any] = {}
+        if n != 1:
+            options["n"] = n
+        if stream:
+            options["stream"] = True
+        if options:
+            request.append(options)
+
+        payload = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Replays the recorded answer to the request, or calls the wrapped connector and
+        records its answer.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: The response (SQL query) from the API call.
+        """
+        key = self.get_request_key(prompt, messages)
+        answer = self._replay(key)
+        if answer is not None:
+            return answer
+
+        answer = self.llm_connector.get_answer(prompt, messages)
+        self._record(key, answer)
+        return answer
+
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Replays the recorded answer to the request, or calls the wrapped connector
+        asynchronously and records its answer.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: The response (SQL query) from the API call.
+        """
+        key = self.get_request_key(prompt, messages)
+        answer = self._replay(key)
+        if answer is not None:
+            return answer
+
+        answer = await self.llm_connector.aget_answer(prompt, messages)
+        self._record(key, answer)
+        return answer
+
+    def get_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Replays the recorded candidate answers to the request, or calls the wrapped
+        connector and records its answers.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :param n: The number of candidate answers to generate.
+        :return: The responses (SQL queries) from the API call.
+        """
+        key = self.get_request_key(prompt, messages, n=n)
+        answers = self._replay(key)
+        if answers is not None:
+            return list(answers)
+
+        answers = self.llm_connector.get_answers(prompt, messages, n=n)
+        self._record(key, answers)
+        return answers
+
+    async def aget_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        """
+        Replays the recorded candidate answers to the request, or calls the wrapped
+        connector asynchronously and records its answers.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :param n: The number of candidate answers to generate.
+        :return: The responses (SQL queries) from the API call.
+        """
+        key = self.get_request_key(prompt, messages, n=n)
+        answers = self._replay(key)
+        if answers is not None:
+            return list(answers)
+
+        answers = await self.llm_connector.aget_answers(prompt, messages, n=n)
+        self._record(key, answers)
+        return answers
+
+    def stream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Iterator[Text]:
+        """
+        Replays the recorded answer to the request as a single chunk, or streams the
+        answer of the wrapped connector and records it once the stream is complete.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: An iterator over the chunks of the response (SQL query).
+        """
+        key = self.get_request_key(prompt, messages, stream=True)
+        answer = self._replay(key)
+        if answer is not None:
+            yield answer
+            return
+
+        chunks = []
+        for chunk in self.llm_connector.stream_answer(prompt, messages):
+            chunks.append(chunk)
+            yield chunk
+        self._record(key, "".join(chunks))
+
+    async def astream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> AsyncIterator[Text]:
+        """
+        Replays the recorded answer to the request as a single chunk, or streams the
+        answer of the wrapped connector asynchronously and records it once the stream
+        is complete.
+        :param prompt: The prompt for the API call.
+        :param messages: The messages to include in the API call.
+        :return: An asynchronous iterator over the chunks of the response (SQL query).
+        """
+        key = self.get_request_key(prompt, messages, stream=True)
+        answer = self._replay(key)
+        if answer is not None:
+            yield answer
+            return
+
+        chunks = []
+        async for chunk in self.llm_connector.astream_answer(prompt, messages):
+            chunks.append(chunk)
+            yield chunk
+        self._record(key, "".join(chunks))
+
+    def _replay(self, key: Text) -> Any:
+        with self._lock:
+            answer = None if self.mode == "record" else self._answers.get(key)
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if answer is None:
+            if self.mode == "replay":
+                raise NoRecordedAnswerException(
+                    f"No answer was recorded for the request {key} in "
+                    f"{self.cassette_path}."
+                )
+            return None
+
+        # No tokens are used to replay an answer.
+        self.set_last_usage(None)
+        return answer
+
+    def _record(self, key: Text, answer: Union[Text, List[Text]]) -> None:
+        line = json.dumps(
+            {"key": key, "answer": answer, "recorded_at": time.time()},
+            separators=(",", ":"),
+        )
+        with self._lock:
+            self._answers[key] = answer
+            with open(self.cassette_path, "a") as f:
+                f.write(line + "\n")
+
+    def get_model_parameters(self) -> Dict:
+        """
+        Get the model parameters of the wrapped connector, so that cached answers are
+        shared with it.
+        :return: A dictionary containing the model parameters.
+        """
+        return self.llm_connector.get_model_parameters()
+
+    def format_database_schema(
+        self, database_schema: Dict, connector_name: Text
+    ) -> Text:
+        """
+        Formats the database schema with the wrapped connector.
+        :param database_schema: The database schema to format.
+        :param connector_name: The name of the connector.
+        :return: A formatted string containing the database schema.
+        """
+        return self.llm_connector.format_database_schema(
+            database_schema, connector_name
+        )
+
+    def create_prompt(
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        """
+        Creates the prompt with the wrapped connector.
+        :param user_input: The user input to be converted to SQL.
+        :param database_schema: The database schema to use for the prompt.
+        :param connector_name: The name of the connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
+        :return: The prompt for the API call.
+        """
+        return self.llm_connector.create_prompt_with_examples(
+            user_input, database_schema, connector_name, examples
+        )
+
+    def to_langchain(self) -> "BaseChatModel":
+        """
+        Converts the wrapped connector to a LangChain chat model. The answers of the
+        chat model are not recorded.
+        :return: The LangChain chat model.
+        """
+        return self.llm_connector.to_langchain()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Text, Union
+
+from ai_text_to_sql.answer_cache import normalize_question
+from ai_text_to_sql.exceptions import NoRecordedAnswerException
+from ai_text_to_sql.llm_connectors.llm_connector import (
+    SQL_INSTRUCTIONS,
+    TableListLLMConnector,
+)
+from ai_text_to_sql.prompt_builder import APPROXIMATE_TOKEN_PATTERN
+
+
+class ReplayConnector(TableListLLMConnector):
+    """
+    The class for replaying recorded answers to questions deterministically, without
+    calling an LLM. This is useful for benchmarking the overhead of the library and
+    for testing offline.
+    Prompts are created like the prompts of the OpenAI connector, with the same
+    TableListLLMConnector base class, so that building them costs the same. The
+    question is read back from the prompt, or from the last message in a chat, and
+    looked up in the recorded answers after normalization.
+
+    Parameters:
+    -----------
+    answers : Dict[Text, Text]
+        A dictionary mapping questions to the SQL queries to answer them with.
+    latency : float
+        The number of seconds to wait before answering, to simulate the latency of an
+        LLM. This parameter is optional, and defaults to 0.
+    default_answer : Text
+        The SQL query to answer questions that were not recorded with. This parameter
+        is optional. If this parameter is not provided, a NoRecordedAnswerException is
+        raised for questions that were not recorded.
+    """
+
+    name = "Replay"
+
+    def __init__(
+        self,
+        answers: Dict[Text, Text],
+        latency: float = 0.0,
+        default_answer: Union[Text, None] = None,
+    ) -> None:
+        self.answers = {
+            normalize_question(question): sql for question, sql in answers.items()
+        }
+        self.latency = latency
+        self.default_answer = default_answer
+
+    @classmethod
+    def from_file(cls, path: Text, **kwargs: Any) -> "ReplayConnector":
+        """
+        Create a replay connector from a file of recorded answers.
+        :param path: The path to a JSON file containing an object that maps questions
+                     to SQL queries, or to a JSON Lines file with a 'question' and a
+                     'sql' field on each line.
+        :param kwargs: The other parameters of the connector.
+        :return: The replay connector.
+        """
+        with open(path, "r") as f:
+            if path.endswith(".jsonl"):
+                answers = {}
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        answers[record["question"]] = record["sql"]
+            else:
+                answers = json.load(f)
+        return cls(answers, **kwargs)
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Replays the recorded answer to the question in the prompt or messages.
+        :param prompt: The prompt, as created by create_prompt().
+        :param messages: The messages of a chat, the last of which is the question.
+        :return: The recorded SQL query.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt, messages)
+
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        """
+        Replays the recorded answer to the question in the prompt or messages without
+        blocking the event loop.
+        :param prompt: The prompt, as created by create_prompt().
+        :param messages: The messages of a chat, the last of which is the question.
+        :return: The recorded SQL query.
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(prompt, messages)
+
+    def _answer(
+        self, prompt: Union[Text, None], messages: Union[List[Dict], None]
+    ) -> Text:
+        if not prompt and not messages:
+            raise ValueError("Either prompt or messages must be provided.")
+
+        if messages:
+            prompt = messages[-1]["content"]
+        lines = (prompt or "").splitlines()
+        if len(lines) > 1 and lines[-1] == SQL_INSTRUCTIONS:
+            lines = lines[:-1]
+        question = lines[-1] if lines else ""
+
+        sql = self.answers.get(normalize_question(question), self.default_answer)
+        if sql is None:
+            raise NoRecordedAnswerException(
+                f"No answer was recorded for the question: {question}"
+            )
+
+        prompt_tokens = len(APPROXIMATE_TOKEN_PATTERN.findall(prompt or ""))
+        completion_tokens = len(APPROXIMATE_TOKEN_PATTERN.findall(sql))
+        self.set_last_usage(
+            {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+        )
+        return sql
+
+    def to_langchain(self) -> None:  # type: ignore[override]
+        """
+        The replay connector cannot be converted to a LangChain chat model.
+        """
+        raise NotImplementedError("The replay connector cannot be used with the agent.")
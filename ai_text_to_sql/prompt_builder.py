@@ -0,0 +1,289 @@
+import functools
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from .llm_connectors.llm_connector import LLMConnector
+
+logger = logging.getLogger(__name__)
+
+APPROXIMATE_TOKEN_PATTERN = re.compile(r"[A-Za-z]{1,4}|[0-9]{1,3}|\S")
+
+# The number of tokens the chat format adds to every message, on top of its content.
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+class TokenCounter:
+    """
+    The class for counting the tokens in a piece of text locally.
+    The tiktoken tokenizer for the model is used if the tiktoken package is installed
+    and its encoding is available; otherwise, tokens are approximated with a
+    regular expression that slightly overestimates typical BPE token counts.
+    Counts are cached, so repeated fragments such as the lines of a database schema
+    are only tokenized once.
+
+    Parameters:
+    -----------
+    model : Text
+        The name of the model whose tokenizer to use. This parameter is optional, and
+        defaults to "gpt-3.5-turbo".
+    max_cache_size : int
+        The maximum number of cached counts. This parameter is optional, and defaults
+        to 65536.
+    """
+
+    def __init__(
+        self, model: Text = "gpt-3.5-turbo", max_cache_size: int = 65536
+    ) -> None:
+        self.model = model
+        self.max_cache_size = max_cache_size
+        self.encoding = self._load_encoding(model)
+        self._counts: Dict[Text, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_encoding(model: Text) -> Any:
+        try:
+            import tiktoken
+        except ImportError:
+            _log_token_approximation(
+                "the tiktoken package is not installed. Please run "
+                "'pip install ai-text-to-sql[tiktoken]' to count tokens precisely"
+            )
+            return None
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # The encoding files could not be loaded, e.g. because they are not
+            # cached and there is no network access.
+            _log_token_approximation(f"the tiktoken encoding could not be loaded: {e}")
+            return None
+
+    def count(self, text: Text, cache: bool = True) -> int:
+        """
+        Count the tokens in the given text.
+        :param text: The text to count the tokens of.
+        :param cache: Whether to cache the count. Counts of one-off texts, such as
+                      complete prompts, should not be cached.
+        :return: The number of tokens.
+        """
+        count = self._counts.get(text)
+        if count is not None:
+            return count
+
+        if self.encoding is not None:
+            count = len(self.encoding.encode(text))
+        else:
+            count = len(APPROXIMATE_TOKEN_PATTERN.findall(text))
+
+        if not cache:
+            return count
+
+        with self._lock:
+            if len(self._counts) >= self.max_cache_size:
+                self._counts.clear()
+            self._counts[text] = count
+        return count
+
+    def count_messages(self, messages: List[Dict]) -> int:
+        """
+        Count the tokens in a list of chat messages.
+        :param messages: The messages to count the tokens of.
+        :return: The number of tokens.
+        """
+        return sum(
+            self.count(message["content"]) + MESSAGE_TOKEN_OVERHEAD
+            for message in messages
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def _log_token_approximation(reason: Text) -> None:
+    # Logged once per reason, rather than once per TokenCounter.
+    logger.info(f"Approximating token counts, as {reason}.")
+
+
+class PromptBuilder:
+    """
+    The class for building prompts that fit in a token budget.
+    The user input and the instructions of the prompt are always kept. The tables of
+    the database schema are added in order of priority, i.e. in the order of the
+    schema dictionary, which is the order of relevance when the schema has been
+    pruned, until the budget is exhausted. The lowest-priority tables are dropped
+    first, and the columns of the last table that is added are truncated if it does
+    not fit as a whole.
+
+    Parameters:
+    -----------
+    llm_connector : LLMConnector
+        The LLMConnector whose prompt format to use.
+    token_budget : int
+        The maximum number of tokens in the prompt.
+    token_counter : TokenCounter
+        The TokenCounter to use. This parameter is optional. If this parameter is not
+        provided, a counter for the default model is created.
+    max_cache_size : int
+        The maximum number of cached table token counts. The least recently used
+        counts are evicted first. This parameter is optional, and defaults to 4096.
+    """
+
+    def __init__(
+        self,
+        llm_connector: LLMConnector,
+        token_budget: int,
+        token_counter: Optional[TokenCounter] = None,
+        max_cache_size: int = 4096,
+    ) -> None:
+        self.llm_connector = llm_connector
+        self.token_budget = token_budget
+        self.token_counter = token_counter or TokenCounter()
+        self.max_cache_size = max_cache_size
+        self._table_counts: OrderedDict[Tuple, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count_table_tokens(
+        self, table_name: Text, columns: List[Text], connector_name: Text
+    ) -> int:
+        """
+        Count the tokens that a table adds to the formatted database schema.
+        :param table_name: The name of the table.
+        :param columns: The columns of the table.
+        :param connector_name: The name of the data connector.
+        :return: The number of tokens.
+        """
+        key = (table_name, tuple(columns), connector_name)
+        with self._lock:
+            count = self._table_counts.get(key)
+            if count is not None:
+                self._table_counts.move_to_end(key)
+                return count
+
+        count = self.token_counter.count(
+            self.llm_connector.format_database_schema(
+                {table_name: columns}, connector_name
+            )
+        ) - self.token_counter.count(
+            self.llm_connector.format_database_schema({}, connector_name)
+        )
+        with self._lock:
+            self._table_counts[key] = count
+            while len(self._table_counts) > self.max_cache_size:
+                self._table_counts.popitem(last=False)
+        return count
+
+    def build(
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Tuple[Text, Dict]:
+        """
+        Build a prompt that fits in the token budget.
+        :param user_input: The user input to be converted to SQL.
+        :param database_schema: The database schema, ordered by priority.
+        :param connector_name: The name of the data connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples, the most similar first. The
+                         least similar examples are dropped if the prompt does not fit
+                         in the token budget without the database schema. This
+                         parameter is optional.
+        :return: A tuple containing the prompt and the token breakdown, a dictionary
+                 with the budget, the total number of tokens, the tokens of the
+                 schema and of the rest of the prompt, the number of examples, and the
+                 tables that were included, truncated and dropped.
+        """
+        examples = list(examples or [])
+        base_tokens = self.token_counter.count(
+            self.llm_connector.create_prompt_with_examples(
+                user_input, {}, connector_name, examples
+            ),
+            cache=False,
+        )
+        while base_tokens > self.token_budget and examples:
+            examples.pop()
+            base_tokens = self.token_counter.count(
+                self.llm_connector.create_prompt_with_examples(
+                    user_input, {}, connector_name, examples
+                ),
+                cache=False,
+            )
+        if base_tokens > self.token_budget:
+            raise ValueError(
+                f"The prompt requires {base_tokens} tokens without the database "
+                f"schema, which exceeds the token budget of {self.token_budget}."
+            )
+
+        remaining = self.token_budget - base_tokens
+        included: Dict[Text, List[Text]] = {}
+        truncated: List[Text] = []
+        for table_name, columns in database_schema.items():
+            # One token is reserved for the line break between tables.
+            table_tokens = (
+                self.count_table_tokens(table_name, columns, connector_name) + 1
+            )
+            if table_tokens <= remaining:
+                included[table_name] = columns
+                remaining -= table_tokens
+                continue
+
+            fitting_columns = self._fit_columns(
+                table_name, columns, connector_name, remaining
+            )
+            if fitting_columns:
+                included[table_name] = fitting_columns
+                truncated.append(table_name)
+            break
+
+        prompt = self.llm_connector.create_prompt_with_examples(
+            user_input, included, connector_name, examples
+        )
+        total_tokens = self.token_counter.count(prompt, cache=False)
+        # Table counts are measured in isolation, so drop tables until the assembled
+        # prompt fits, in case the formatting adds tokens at the boundaries.
+        while total_tokens > self.token_budget and included:
+            included.popitem()
+            prompt = self.llm_connector.create_prompt_with_examples(
+                user_input, included, connector_name, examples
+            )
+            total_tokens = self.token_counter.count(prompt, cache=False)
+
+        breakdown = {
+            "budget": self.token_budget,
+            "total": total_tokens,
+            "schema": total_tokens - base_tokens,
+            "base": base_tokens,
+            "examples": len(examples),
+            "tables_included": list(included),
+            "tables_truncated": [table for table in truncated if table in included],
+            "tables_dropped": [
+                table for table in database_schema if table not in included
+            ],
+        }
+        return prompt, breakdown
+
+    def _fit_columns(
+        self,
+        table_name: Text,
+        columns: List[Text],
+        connector_name: Text,
+        remaining: int,
+    ) -> List[Text]:
+        # Binary search for the largest prefix of the columns that fits.
+        low, high = 0, len(columns)
+        while low < high:
+            middle = (low + high + 1) // 2
+            tokens = (
+                self.count_table_tokens(table_name, columns[:middle], connector_name)
+                + 1
+            )
+            if tokens <= remaining:
+                low = middle
+            else:
+                high = middle - 1
+        return columns[:low]
@@ -0,0 +1,312 @@
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Text, Tuple
+
+# A plain or quoted identifier.
+IDENTIFIER = r"(?:\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|[\w$]+)"
+
+# Splits a query into comments, string literals, whitespace, words (keywords and
+# possibly qualified identifiers) and single characters.
+SQL_TOKEN_PATTERN = re.compile(
+    r"(?P<comment>--[^\n]*|/\*.*?\*/)"
+    r"|(?P<literal>'(?:[^']|'')*')"
+    r"|(?P<space>\s+)"
+    rf"|(?P<word>{IDENTIFIER}(?:\s*\.\s*{IDENTIFIER})*)"
+    r"|(?P<other>.)",
+    re.DOTALL,
+)
+
+SQL_KEYWORDS = frozenset(
+    (
+        "ALL AND ANY AS ASC BETWEEN BY CASE CAST CROSS DESC DISTINCT ELSE END "
+        "EXCEPT EXISTS FETCH FIRST FROM FULL GROUP HAVING ILIKE IN INNER INTERSECT "
+        "IS JOIN LAST LEFT LIKE LIMIT NATURAL NEXT NOT NULL NULLS OFFSET ON ONLY OR "
+        "ORDER OUTER OVER PARTITION RECURSIVE RIGHT ROWS SELECT THEN TOP UNION USING "
+        "VALUES WHEN WHERE WINDOW WITH"
+    ).split()
+)
+
+# The keywords of the statements and clauses that write data.
+WRITE_KEYWORDS = frozenset(("INSERT", "UPDATE", "DELETE", "MERGE", "INTO"))
+
+# The keywords that are followed by the name of a table.
+TABLE_KEYWORDS = frozenset(("FROM", "JOIN", "INTO", "UPDATE", "TABLE"))
+
+# The keywords that end a FROM clause.
+FROM_CLAUSE_END_KEYWORDS = frozenset(
+    "WHERE GROUP ORDER HAVING LIMIT OFFSET FETCH UNION INTERSECT EXCEPT WINDOW".split()
+)
+
+
+def _tokenize(sql: Text) -> List[Tuple[Text, Text]]:
+    return [
+        (match.lastgroup or "other", match.group())
+        for match in SQL_TOKEN_PATTERN.finditer(sql)
+    ]
+
+
+def normalize_sql(sql: Text) -> Text:
+    """
+    Normalize a SQL query so that queries that differ only in formatting share a
+    cache entry.
+    Comments are removed, keywords are upper-cased, whitespace is removed except for
+    a single space between two words or literals, and trailing semicolons are
+    removed. String literals and identifiers are kept as they are.
+    :param sql: The SQL query to normalize.
+    :return: The normalized SQL query.
+    """
+    parts: List[Text] = []
+    previous_kind = None
+    pending_space = False
+    for kind, token in _tokenize(sql):
+        if kind in ("comment", "space"):
+            pending_space = True
+            continue
+        if kind == "word" and token.upper() in SQL_KEYWORDS:
+            token = token.upper()
+        if (
+            pending_space
+            and previous_kind in ("word", "literal")
+            and kind in ("word", "literal")
+        ):
+            parts.append(" ")
+        parts.append(token)
+        previous_kind = kind
+        pending_space = False
+
+    return "".join(parts).rstrip(";")
+
+
+def is_read_only_query(sql: Text) -> bool:
+    """
+    Check whether a SQL query only reads data, so that its result can be cached.
+    The query must be a SELECT statement, or a WITH statement whose common table
+    expressions do not modify data, e.g. with DELETE ... RETURNING on PostgreSQL.
+    SELECT ... INTO statements, which create tables or write files, are not
+    read-only either.
+    :param sql: The SQL query to check.
+    :return: True if the query only reads data.
+    """
+    words = [token.upper() for kind, token in _tokenize(sql) if kind == "word"]
+    if not words or words[0] not in ("SELECT", "WITH"):
+        return False
+    return not any(word in WRITE_KEYWORDS for word in words)
+
+
+def get_query_tables(sql: Text) -> Set[Text]:
+    """
+    Get the names of the tables referenced by a SQL query.
+    The names are taken from the FROM and JOIN clauses, as well as the targets of
+    INSERT, UPDATE and TRUNCATE statements. Schema prefixes and quotes are removed
+    and the names are lower-cased. The names of common table expressions are
+    included as well.
+    :param sql: The SQL query to parse.
+    :return: The names of the tables.
+    """
+    tokens = [
+        token for kind, token in _tokenize(sql) if kind not in ("comment", "space")
+    ]
+    tables: Set[Text] = set()
+    expect_table = False
+    in_from_clause = False
+    # Whether each enclosing parenthesis was opened in a FROM clause.
+    enclosing_from_clauses: List[bool] = []
+    for token in tokens:
+        keyword = token.upper()
+        if expect_table:
+            expect_table = False
+            if token != "(":
+                tables.add(_unquote_table_name(token))
+                continue
+        if keyword in TABLE_KEYWORDS:
+            expect_table = True
+            in_from_clause = in_from_clause or keyword == "FROM"
+        elif keyword in FROM_CLAUSE_END_KEYWORDS:
+            in_from_clause = False
+        elif token == "(":
+            enclosing_from_clauses.append(in_from_clause)
+            in_from_clause = False
+        elif token == ")":
+            in_from_clause = (
+                enclosing_from_clauses.pop() if enclosing_from_clauses else False
+            )
+        elif token == "," and in_from_clause:
+            expect_table = True
+
+    return tables
+
+
+def _unquote_table_name(name: Text) -> Text:
+    # The schema or database that qualifies the name is dropped.
+    name = re.findall(IDENTIFIER, name)[-1]
+    return name.strip('"`[]').lower()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the number of bytes held by a query result.
+    :param value: A list of rows, or a tuple of the column names and a list of rows.
+    :return: The estimated size in bytes.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes)):
+        return size
+    if isinstance(value, Sequence):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class ResultCache:
+    """
+    An in-memory cache of query results with size-aware least-recently-used eviction.
+    Results are keyed on the normalized SQL query and the identity of the data
+    connector, so one cache can be shared by several connectors. The tables
+    referenced by each query are recorded, so that the results of the queries that
+    read a table can be invalidated when the table changes.
+
+    Parameters:
+    -----------
+    max_bytes : int
+        The maximum estimated size, in bytes, of the cached results. The least
+        recently used results are evicted first. This parameter is optional, and
+        defaults to 64 MiB.
+    max_entries : int
+        The maximum number of results to keep. This parameter is optional, and
+        defaults to 1024.
+    ttl : float
+        The number of seconds for which a result is valid. This parameter is
+        optional, and defaults to None. If this parameter is not provided, results
+        do not expire.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+
+        # Each entry holds the result, its size, the tables it reads and the time it
+        # was cached.
+        self._entries: OrderedDict[Text, Tuple[Any, int, FrozenSet[Text], float]] = (
+            OrderedDict()
+        )
+        self._keys_by_table: Dict[Text, Set[Text]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create_key(
+        connector_identity: Text,
+        sql: Text,
+        kind: Text = "rows",
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> Text:
+        """
+        Create the cache key for the result of a query.
+        :param connector_identity: A string identifying the database, e.g. its
+                                   connection string.
+        :param sql: The SQL query.
+        :param kind: The shape of the result, as different methods of the data
+                     connector return the rows of a query differently.
+        :param parameters: The values of the bind parameters of the query. This
+                           parameter is optional.
+        :return: The cache key.
+        """
+        payload = "\0".join((connector_identity, kind, normalize_sql(sql)))
+        if parameters:
+            payload += "\0" + json.dumps(parameters, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: Text) -> Optional[Any]:
+        """
+        Get a cached result.
+        :param key: The cache key, as returned by create_key().
+        :return: The cached result, or None if there is no valid entry for the key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            result, _, _, created_at = entry
+            if self.ttl is not None and time.monotonic() - created_at >= self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, key: Text, result: Any, tables: Iterable[Text]) -> None:
+        """
+        Cache a result, evicting the least recently used results if the cache is
+        full. Results larger than max_bytes are not cached.
+        :param key: The cache key, as returned by create_key().
+        :param result: The result to cache.
+        :param tables: The names of the tables the query reads.
+        """
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+
+        tables = frozenset(table.lower() for table in tables)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, tables, time.monotonic())
+            self.size += size
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+
+            while self._entries and (
+                self.size > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tables: Text) -> int:
+        """
+        Discard the cached results of the queries that read any of the given tables.
+        :param tables: The names of the tables that changed.
+        :return: The number of results discarded.
+        """
+        with self._lock:
+            keys: Set[Text] = set()
+            for table in tables:
+                keys |= self._keys_by_table.get(_unquote_table_name(table), set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+        Discard all the cached results.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self.size = 0
+
+    def _remove(self, key: Text) -> None:
+        _, size, tables, _ = self._entries.pop(key)
+        self.size -= size
+        for table in tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
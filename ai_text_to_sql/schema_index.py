@@ -0,0 +1,180 @@
+import re
+from typing import Dict, List, Optional, Text, Tuple
+
+import numpy as np
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+def tokenize(text: Text) -> List[Text]:
+    """
+    Split text and SQL identifiers into normalized terms.
+    Identifiers are split on camel case, underscores and digits, and a trailing
+    plural 's' is removed, so that 'InvoiceLines' and 'invoice line' share terms.
+    :param text: The text to tokenize.
+    :return: The list of terms.
+    """
+    terms = []
+    for token in IDENTIFIER_PATTERN.findall(text):
+        token = token.lower()
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class SchemaIndex:
+    """
+    An offline BM25 index over the tables of a database schema, used to select the
+    tables that are relevant to a question.
+    Each table is indexed as a document made up of the table name, the names of its
+    columns and the comments on the table and its columns. The index is built once
+    per schema snapshot and stored as an inverted index of NumPy arrays, so that
+    queries only touch the postings of the terms in the question.
+
+    Parameters:
+    -----------
+    database_schema : Dict
+        The database schema to index, as returned by
+        DataConnector.get_database_schema().
+    foreign_keys : Dict
+        A dictionary mapping each table to the tables it references.
+        This parameter is optional. If it is provided, the tables referenced by or
+        referencing the selected tables can be included in the results.
+    comments : Dict
+        The comments on the tables and their columns, as returned by
+        DataConnector.get_comments(). This parameter is optional. If it is provided,
+        the terms of the comments are indexed along with the names.
+    table_name_weight : int
+        The number of times the terms of a table name are counted relative to the
+        terms of its column names. This parameter is optional, and defaults to 3.
+    k1 : float
+        The BM25 term frequency saturation parameter. This parameter is optional, and
+        defaults to 1.5.
+    b : float
+        The BM25 document length normalization parameter. This parameter is optional,
+        and defaults to 0.75.
+    """
+
+    def __init__(
+        self,
+        database_schema: Dict,
+        foreign_keys: Optional[Dict] = None,
+        comments: Optional[Dict] = None,
+        table_name_weight: int = 3,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        self.database_schema = database_schema
+        self.tables = list(database_schema.keys())
+
+        self.neighbours: Dict[Text, set] = {table: set() for table in self.tables}
+        for table, referred_tables in (foreign_keys or {}).items():
+            for referred_table in referred_tables:
+                if table in self.neighbours and referred_table in self.neighbours:
+                    self.neighbours[table].add(referred_table)
+                    self.neighbours[referred_table].add(table)
+
+        term_frequencies: List[Dict[Text, int]] = []
+        for table, columns in database_schema.items():
+            frequencies: Dict[Text, int] = {}
+            for term in tokenize(table):
+                frequencies[term] = frequencies.get(term, 0) + table_name_weight
+            for column in columns:
+                for term in tokenize(column):
+                    frequencies[term] = frequencies.get(term, 0) + 1
+            table_comments = (comments or {}).get(table, {})
+            for comment in [
+                table_comments.get("comment") or "",
+                *table_comments.get("columns", {}).values(),
+            ]:
+                for term in tokenize(comment):
+                    frequencies[term] = frequencies.get(term, 0) + 1
+            term_frequencies.append(frequencies)
+
+        document_lengths = np.array(
+            [sum(frequencies.values()) for frequencies in term_frequencies],
+            dtype=np.float32,
+        )
+        average_length = float(document_lengths.mean()) if self.tables else 0.0
+
+        postings: Dict[Text, Tuple[List[int], List[int]]] = {}
+        for document, frequencies in enumerate(term_frequencies):
+            for term, frequency in frequencies.items():
+                documents, counts = postings.setdefault(term, ([], []))
+                documents.append(document)
+                counts.append(frequency)
+
+        self.postings: Dict[Text, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, (documents, counts) in postings.items():
+            document_indices = np.array(documents, dtype=np.int32)
+            frequencies_array = np.array(counts, dtype=np.float32)
+            idf = np.log(
+                1 + (len(self.tables) - len(documents) + 0.5) / (len(documents) + 0.5)
+            )
+            length_norm = k1 * (
+                1 - b + b * document_lengths[document_indices] / average_length
+            )
+            weights = (
+                idf * frequencies_array * (k1 + 1) / (frequencies_array + length_norm)
+            )
+            self.postings[term] = (document_indices, weights.astype(np.float32))
+
+    def search(self, text: Text, top_k: int) -> List[Tuple[Text, float]]:
+        """
+        Search the index for the tables that are most relevant to the given text.
+        :param text: The text to search for, typically the user's question.
+        :param top_k: The maximum number of tables to return.
+        :return: A list of (table, score) tuples, ordered by decreasing score. Tables
+                 that do not share any terms with the text are not returned.
+        """
+        scores = np.zeros(len(self.tables), dtype=np.float32)
+        for term in set(tokenize(text)):
+            if term in self.postings:
+                documents, weights = self.postings[term]
+                scores[documents] += weights
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[
+                np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            ]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.tables[document], float(scores[document])) for document in ranked]
+
+    def select_tables(
+        self, text: Text, top_k: int, include_neighbours: bool = True
+    ) -> List[Text]:
+        """
+        Select the tables that are relevant to the given text.
+        :param text: The text to search for, typically the user's question.
+        :param top_k: The maximum number of tables to select by relevance.
+        :param include_neighbours: Whether to also include the tables that are linked
+                                   to the selected tables by foreign keys.
+        :return: The selected tables, the most relevant ones first followed by their
+                 foreign key neighbours.
+        """
+        selected = [table for table, _ in self.search(text, top_k)]
+        if include_neighbours:
+            for table in list(selected):
+                for neighbour in sorted(self.neighbours[table]):
+                    if neighbour not in selected:
+                        selected.append(neighbour)
+        return selected
+
+    def prune_schema(
+        self, text: Text, top_k: int, include_neighbours: bool = True
+    ) -> Dict:
+        """
+        Prune the database schema down to the tables that are relevant to the given
+        text. If no table is relevant, the full schema is returned.
+        :param text: The text to search for, typically the user's question.
+        :param top_k: The maximum number of tables to select by relevance.
+        :param include_neighbours: Whether to also include the tables that are linked
+                                   to the selected tables by foreign keys.
+        :return: A dictionary containing the pruned database schema.
+        """
+        selected = self.select_tables(text, top_k, include_neighbours)
+        if not selected:
+            return self.database_schema
+        return {table: self.database_schema[table] for table in selected}
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    A coalescer of identical concurrent calls.
+    The first call with a given key runs the function, and the calls with the same key
+    that arrive while it is in flight wait for it and share its result, or its
+    exception, instead of running the function again. Calls are coalesced across
+    threads by do(), and across the tasks of an event loop by ado(). A SingleFlight can
+    be shared by several TextToSQL instances.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared_calls = 0
+
+        self._futures: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Call the function, unless a call with the same key is in flight in another
+        thread, in which case its result is awaited.
+        :param key: The key identifying identical calls.
+        :param function: The function to call.
+        :return: A tuple of the result and whether it was shared with another call.
+        """
+        with self._lock:
+            self.calls += 1
+            in_flight = self._futures.get(key)
+            if in_flight is not None:
+                self.shared_calls += 1
+            else:
+                future: Future = Future()
+                self._futures[key] = future
+        if in_flight is not None:
+            return in_flight.result(), True
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._futures[key]
+
+    async def ado(
+        self, key: Hashable, function: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        Await the function, unless a call with the same key is in flight in another
+        task of the event loop, in which case its result is awaited.
+        The function runs in a task of its own, so that cancelling one of the callers
+        does not cancel the others.
+        :param key: The key identifying identical calls.
+        :param function: The coroutine function to await.
+        :return: A tuple of the result and whether it was shared with another call.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(task_key)
+            shared = task is not None
+            if task is not None:
+                self.shared_calls += 1
+            else:
+                task = self._tasks[task_key] = asyncio.ensure_future(function())
+                task.add_done_callback(lambda _: self._forget(task_key))
+
+        return await asyncio.shield(task), shared
+
+    def _forget(self, task_key: Tuple[asyncio.AbstractEventLoop, Any]) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
@@ -0,0 +1,273 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Pattern, Set, Text, Tuple
+
+from .result_cache import SQL_TOKEN_PATTERN
+
+NUMBER_PATTERN = r"\d+(?:\.\d+)?"
+
+# String literals, which are skipped, and bind parameters in the :name format.
+BIND_PARAMETER_PATTERN = re.compile(r"'(?:[^']|'')*'|(?<![:\w]):(\w+)")
+
+
+def clean_question(text: Text) -> Text:
+    """
+    Clean a question for matching, by collapsing whitespace and removing the trailing
+    punctuation. Unlike normalize_question(), the case is kept, as the values in the
+    question are used as they are typed.
+    :param text: The question.
+    :return: The cleaned question.
+    """
+    return " ".join(text.split()).rstrip("?.!").rstrip()
+
+
+def render_sql(sql: Text, parameters: Optional[Dict[Text, Any]]) -> Text:
+    """
+    Render a SQL query with its bind parameters as literals, e.g. to log it or to
+    check its cost.
+    :param sql: The SQL query, with bind parameters in the :name format.
+    :param parameters: The values of the bind parameters.
+    :return: The SQL query with the bind parameters replaced by literals.
+    """
+    if not parameters:
+        return sql
+
+    def render(match: "re.Match[Text]") -> Text:
+        name = match.group(1)
+        if name is None or name not in parameters:
+            return match.group()
+        value = parameters[name]
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return str(value)
+
+    return BIND_PARAMETER_PATTERN.sub(render, sql)
+
+
+@dataclass
+class SQLTemplate:
+    """
+    A SQL query whose literals taken from a question are replaced by bind parameters,
+    with the pattern of the questions it answers.
+
+    Parameters:
+    -----------
+    pattern : Pattern
+        The regular expression matching the cleaned questions, with a group per slot.
+    sql : Text
+        The SQL query, with a bind parameter :p0, :p1, ... per slot.
+    numeric : List[bool]
+        Whether each slot holds a number, rather than a string.
+    first_word : Text
+        The lower-cased first word of the questions, or None if they start with a slot.
+    """
+
+    pattern: Pattern[Text]
+    sql: Text
+    numeric: List[bool]
+    first_word: Optional[Text]
+
+
+def create_template(question: Text, sql: Text) -> Optional[SQLTemplate]:
+    """
+    Create a template from a question and the SQL query that answered it.
+    The string and numeric literals of the SQL query that appear, as typed, exactly
+    once in the question become slots. The rest of the question must match exactly,
+    except for the case and whitespace, and a string slot matches the same number of
+    words as the value it was created from.
+    :param question: The question.
+    :param sql: The SQL query.
+    :return: The template, or None if the question has no slot, if a value appears
+             more than once in the question, or if the slots cannot be told apart.
+    """
+    cleaned_question = clean_question(question)
+
+    # The positions of each distinct literal in the SQL query.
+    literals: Dict[Tuple[bool, Text], List[Tuple[int, int]]] = {}
+    for match in SQL_TOKEN_PATTERN.finditer(sql):
+        token = match.group()
+        if match.lastgroup == "literal":
+            value = token[1:-1].replace("''", "'")
+            if value.strip():
+                literals.setdefault((False, value), []).append(match.span())
+        elif match.lastgroup == "word" and re.fullmatch(NUMBER_PATTERN, token):
+            literals.setdefault((True, token), []).append(match.span())
+
+    slots: List[Tuple[int, int, bool, Text]] = []
+    for numeric, value in literals:
+        occurrences = [
+            occurrence.span()
+            for occurrence in re.finditer(
+                rf"(?<!\w){re.escape(value)}(?!\w)", cleaned_question
+            )
+        ]
+        if len(occurrences) > 1:
+            return None
+        if occurrences:
+            slots.append((*occurrences[0], numeric, value))
+    if not slots:
+        return None
+
+    slots.sort()
+    pattern = ""
+    fixed_text = ""
+    position = 0
+    parameters: Dict[Tuple[bool, Text], Text] = {}
+    for index, (start, end, numeric, value) in enumerate(slots):
+        if start < position:
+            # The values overlap in the question.
+            return None
+        text_before = cleaned_question[position:start]
+        if index > 0 and not numeric and not slots[index - 1][2]:
+            if not text_before.strip():
+                # Two string slots in a row cannot be told apart.
+                return None
+        pattern += _escape_fixed_text(text_before)
+        fixed_text += text_before
+        if numeric:
+            pattern += f"({NUMBER_PATTERN})"
+        else:
+            pattern += r"(\S+" + r"(?:\s+\S+)" * (len(value.split()) - 1) + ")"
+        parameters[(numeric, value)] = f"p{index}"
+        position = end
+    pattern += _escape_fixed_text(cleaned_question[position:])
+    fixed_text += cleaned_question[position:]
+    if not re.search(r"\w", fixed_text):
+        # A question made of values only would match any question.
+        return None
+
+    # The literals are replaced from the end, so that the positions stay valid.
+    replacements = sorted(
+        (
+            (start, end, parameters[key])
+            for key, spans in literals.items()
+            if key in parameters
+            for start, end in spans
+        ),
+        reverse=True,
+    )
+    template_sql = sql
+    for start, end, name in replacements:
+        bind_parameter = f":{name}"
+        if re.search(r"\bTOP\s*$", template_sql[:start], re.IGNORECASE):
+            # SQL Server only accepts a parameter as the TOP value in parentheses.
+            bind_parameter = f"({bind_parameter})"
+        template_sql = template_sql[:start] + bind_parameter + template_sql[end:]
+
+    first_word = cleaned_question.split(" ", 1)[0]
+    return SQLTemplate(
+        pattern=re.compile(pattern, re.IGNORECASE),
+        sql=template_sql,
+        numeric=[numeric for _, _, numeric, _ in slots],
+        first_word=first_word.lower() if slots[0][0] >= len(first_word) else None,
+    )
+
+
+def _escape_fixed_text(text: Text) -> Text:
+    return r"\s+".join(re.escape(part) for part in text.split(" "))
+
+
+class SQLTemplateCache:
+    """
+    A cache of SQL templates, which answers the questions that only differ from an
+    answered question by the values they mention, e.g. "Top 5 Rock tracks" and
+    "Top 10 Jazz tracks", without calling the LLM.
+    A template is created from a question and the SQL query that answered it, by
+    replacing the literals of the SQL query that appear in the question with bind
+    parameters. A question matching the pattern of a template is answered with the
+    SQL query of the template and the values found in the question as parameters, so
+    that the database can also reuse the plan of the query. The least recently used
+    templates are evicted once max_templates is reached. A SQLTemplateCache holds the
+    templates of a single database.
+
+    Parameters:
+    -----------
+    max_templates : int
+        The maximum number of templates to keep. This parameter is optional, and
+        defaults to 1024.
+    """
+
+    def __init__(self, max_templates: int = 1024) -> None:
+        self.max_templates = max_templates
+        self.hits = 0
+        self.misses = 0
+
+        self._templates: "OrderedDict[Text, SQLTemplate]" = OrderedDict()
+        # The patterns of the templates by the first word of their questions, so that
+        # a question is only matched against the templates that can match it. The
+        # templates of questions that start with a slot are kept under None.
+        self._patterns_by_word: Dict[Optional[Text], Set[Text]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def add(self, question: Text, sql: Text) -> bool:
+        """
+        Create a template from a question and the SQL query that answered it, and add
+        it to the cache. Only SQL queries that executed successfully should be added.
+        :param question: The question.
+        :param sql: The SQL query.
+        :return: True if a template was created, False otherwise.
+        """
+        template = create_template(question, sql)
+        if template is None:
+            return False
+
+        key = template.pattern.pattern
+        with self._lock:
+            if key in self._templates:
+                self._templates.move_to_end(key)
+            else:
+                self._patterns_by_word.setdefault(template.first_word, set()).add(key)
+            self._templates[key] = template
+            while len(self._templates) > self.max_templates:
+                evicted_key, evicted = self._templates.popitem(last=False)
+                self._patterns_by_word[evicted.first_word].discard(evicted_key)
+        return True
+
+    def match(self, question: Text) -> Optional[Tuple[Text, Dict[Text, Any]]]:
+        """
+        Match a question against the templates.
+        :param question: The question.
+        :return: A tuple of the SQL query of the matching template and the values of
+                 its bind parameters, or None if no template matches.
+        """
+        cleaned_question = clean_question(question)
+        words = cleaned_question.split(" ", 1)
+        with self._lock:
+            keys = self._patterns_by_word.get(words[0].lower(), set()) | (
+                self._patterns_by_word.get(None, set())
+            )
+            for key in keys:
+                template = self._templates[key]
+                match = template.pattern.fullmatch(cleaned_question)
+                if match is None:
+                    continue
+
+                parameters: Dict[Text, Any] = {}
+                for index, (value, numeric) in enumerate(
+                    zip(match.groups(), template.numeric)
+                ):
+                    if numeric:
+                        parameters[f"p{index}"] = (
+                            float(value) if "." in value else int(value)
+                        )
+                    else:
+                        parameters[f"p{index}"] = value
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template.sql, parameters
+
+            self.misses += 1
+            return None
+
+    def clear(self) -> None:
+        """
+        Discard all the templates, e.g. after the database schema changed.
+        """
+        with self._lock:
+            self._templates.clear()
+            self._patterns_by_word.clear()
@@ -1,20 +1,76 @@
+import hashlib
+import json
 import logging.config
-from typing import Dict, List, Text
-
-import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Text,
+    Tuple,
+    TypeVar,
+)
 
+from .answer_cache import AnswerCache, create_cache_key
+from .candidate_selector import CandidateSelector
+from .column_statistics import annotate_database_schema
 from .config_parser import ConfigParser
 from .data_connectors.data_connector import DataConnector
+from .instrumentation import Instrumentation, InstrumentationSpan
 from .llm_connectors.llm_connector import LLMConnector
+from .prompt_builder import PromptBuilder, TokenCounter
+from .result_cache import is_read_only_query, normalize_sql
+from .sql_template_cache import render_sql
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .cost_guard import QueryCostGuard
+    from .example_store import ExampleStore
+    from .schema_index import SchemaIndex
+    from .single_flight import SingleFlight
+    from .sql_template_cache import SQLTemplateCache
 
 logging_config_parser = ConfigParser()
 logging.config.dictConfig(logging_config_parser.get_config_dict())
 logger = logging.getLogger()
 
+T = TypeVar("T")
+
 
-class TextToSQL:
+@dataclass
+class BatchResult:
     """
-    The class for converting text to SQL query and querying the database.
+    The result of converting or querying a single text in a batch.
+
+    Parameters:
+    -----------
+    index : int
+        The position of the text in the batch.
+    text : Text
+        The text that was converted.
+    result : Any
+        The SQL query or the query result. None if an error occurred.
+    error : Exception
+        The error raised while processing the text. None if it succeeded.
+    """
+
+    index: int
+    text: Text
+    result: Any = None
+    error: Optional[Exception] = None
+
+
+class BaseTextToSQL:
+    """
+    The base class for converting text to SQL query, holding the logic that is shared
+    by the synchronous and asynchronous APIs.
 
     Parameters:
     -----------
@@ -22,45 +78,691 @@ class TextToSQL:
         The LLMConnector to use for converting text to SQL query.
     data_connector : DataConnector
         The DataConnector to use for querying the database.
+    max_tables : int
+        The maximum number of tables, selected by relevance to the question, to
+        include in the prompt. Tables linked to the selected tables by foreign keys are
+        included as well. This parameter is optional, and defaults to None. If this
+        parameter is not provided, the full database schema is included in the prompt.
+    answer_cache : AnswerCache
+        The cache of the SQL queries generated for questions. Answers are keyed on the
+        normalized question, the model parameters and a fingerprint of the database
+        schema. This parameter is optional, and defaults to None. If this parameter is
+        not provided, the LLM is called for every question.
+    token_budget : int
+        The maximum number of tokens in the prompt. The lowest-priority tables of the
+        database schema are dropped to fit the prompt in the budget. This parameter is
+        optional, and defaults to None. If this parameter is not provided, the prompt
+        is not limited.
+    token_counter : TokenCounter
+        The TokenCounter to use for counting the tokens in the prompt when a
+        token_budget is set. This parameter is optional. If this parameter is not
+        provided, a counter for the default model is created.
+    instrumentation : Instrumentation
+        The Instrumentation to notify of the duration, token usage, row counts and
+        cache hits of each stage of the pipeline, e.g. a HistogramCollector. This
+        parameter is optional, and defaults to None. If this parameter is not
+        provided, the pipeline is not instrumented.
+    cost_guard : QueryCostGuard
+        The QueryCostGuard to check the estimated cost of each SQL query with before
+        it is executed. This parameter is optional, and defaults to None. If this
+        parameter is not provided, queries are executed without a pre-flight check.
+    candidates : int
+        The number of candidate SQL queries to ask the LLM for. The first candidate
+        that the candidate_selector validates is used. This parameter is optional,
+        and defaults to 1.
+    candidate_selector : CandidateSelector
+        The CandidateSelector to select the SQL query among the candidates with. This
+        parameter is optional. If this parameter is not provided, the first candidate
+        that the database can explain is selected.
+    single_flight : SingleFlight
+        The SingleFlight to coalesce concurrent identical requests with, which can be
+        shared by several instances. Concurrent conversions of the same normalized
+        question share one LLM call, and concurrent executions of the same normalized
+        read-only SQL query on the same database share one execution. This parameter
+        is optional, and defaults to None. If this parameter is not provided, every
+        request is served on its own.
+    example_store : ExampleStore
+        The ExampleStore to record the questions answered by successful queries in.
+        The SQL query of a stored question similar enough to a new one is reused
+        without calling the LLM, and the most similar stored questions are otherwise
+        included in the prompt as examples. This parameter is optional, and defaults
+        to None. If this parameter is not provided, questions are answered without
+        examples.
+    template_cache : SQLTemplateCache
+        The SQLTemplateCache to create SQL templates in from the questions answered by
+        successful queries. A question that only differs from an answered question by
+        the values it mentions is answered by query() and query_df() with the SQL
+        template and the values as bind parameters, without calling the LLM. This
+        parameter is optional, and defaults to None. If this parameter is not
+        provided, the LLM is called for every new question.
     """
 
-    def __init__(self, data_connector: DataConnector, llm_connector: LLMConnector):
+    def __init__(
+        self,
+        data_connector: DataConnector,
+        llm_connector: LLMConnector,
+        max_tables: Optional[int] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        token_budget: Optional[int] = None,
+        token_counter: Optional[TokenCounter] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        cost_guard: Optional["QueryCostGuard"] = None,
+        candidates: int = 1,
+        candidate_selector: Optional[CandidateSelector] = None,
+        single_flight: Optional["SingleFlight"] = None,
+        example_store: Optional["ExampleStore"] = None,
+        template_cache: Optional["SQLTemplateCache"] = None,
+    ):
         self.data_connector = data_connector
         self.llm_connector = llm_connector
+        self.max_tables = max_tables
+        self.answer_cache = answer_cache
+        self.prompt_builder = (
+            PromptBuilder(llm_connector, token_budget, token_counter)
+            if token_budget is not None
+            else None
+        )
+
+        self.instrumentation = instrumentation or Instrumentation()
+        self.cost_guard = cost_guard
+        self.candidates = candidates
+        self.candidate_selector = candidate_selector or CandidateSelector()
+        self.single_flight = single_flight
+        self.example_store = example_store
+        self.template_cache = template_cache
+
+        self._local = threading.local()
+
+        self._schema_index: Optional["SchemaIndex"] = None
+        self._schema_fingerprint: Optional[Tuple[Dict, Text]] = None
+        self._annotated_schema: Optional[Tuple[Dict, Dict, Dict]] = None
 
         self.logger = logger
 
+    def get_database_schema(
+        self, text: Text, database_schema: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Get the database schema to include in the prompt for the given text.
+        If max_tables is set, the schema is pruned to the tables relevant to the text.
+        :param text: The text to convert to SQL query.
+        :param database_schema: The database schema snapshot to use.
+                                This parameter is optional. If it is not provided, the
+                                schema is retrieved from the data connector.
+        :return: A dictionary containing the database schema.
+        """
+        if database_schema is None:
+            database_schema = self.data_connector.get_database_schema()
+        if self.max_tables is not None:
+            # The index is rebuilt only when the connector reflects a new snapshot.
+            schema_index = self._schema_index
+            if (
+                schema_index is None
+                or schema_index.database_schema is not database_schema
+            ):
+                from .schema_index import SchemaIndex
+
+                schema_index = SchemaIndex(
+                    database_schema,
+                    self.data_connector.get_foreign_keys(),
+                    self.data_connector.get_comments(),
+                )
+                self._schema_index = schema_index
+
+            database_schema = schema_index.prune_schema(text, self.max_tables)
+
+        return self.annotate_database_schema(database_schema)
+
+    def annotate_database_schema(self, database_schema: Dict) -> Dict:
+        """
+        Annotate the columns of the database schema with their types and statistics,
+        e.g. their approximate number of distinct values and their most frequent
+        values, if the data connector has collected any.
+        The annotated schema is reused as long as neither the schema nor the
+        statistics change, so caches keyed on the schema remain valid.
+        :param database_schema: The database schema.
+        :return: The annotated database schema, or the given schema if there are no
+                 statistics.
+        """
+        column_statistics = self.data_connector.get_column_statistics()
+        if not column_statistics:
+            return database_schema
+
+        annotated_schema = self._annotated_schema
+        if (
+            annotated_schema is None
+            or annotated_schema[0] is not database_schema
+            or annotated_schema[1] is not column_statistics
+        ):
+            annotated_schema = (
+                database_schema,
+                column_statistics,
+                annotate_database_schema(database_schema, column_statistics),
+            )
+            self._annotated_schema = annotated_schema
+        return annotated_schema[2]
+
+    def create_prompt(
+        self,
+        text: Text,
+        database_schema: Optional[Dict] = None,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        """
+        Create the prompt for converting the given text to SQL query.
+        :param text: The text to convert to SQL query.
+        :param database_schema: The database schema snapshot to use.
+                                This parameter is optional. If it is not provided, the
+                                schema is retrieved from the data connector.
+        :param examples: The similar questions that were answered before, as a list of
+                         (question, SQL query) tuples. This parameter is optional.
+        :return: The prompt for the LLM.
+        """
+        with self.span("prompt"):
+            database_schema = self.get_database_schema(text, database_schema)
+            connector_name = self.data_connector.get_connector_name()
+            if self.prompt_builder is None:
+                prompt = self.llm_connector.create_prompt_with_examples(
+                    text, database_schema, connector_name, examples
+                )
+            else:
+                prompt, token_breakdown = self.prompt_builder.build(
+                    text, database_schema, connector_name, examples
+                )
+                self._local.token_breakdown = token_breakdown
+                self.logger.info(f"Prompt token breakdown: {token_breakdown}")
+
+        self.logger.info(f"Prompt: {prompt}")
+        return prompt
+
+    def find_examples(
+        self, text: Text
+    ) -> Tuple[Optional[Text], Optional[List[Tuple[Text, Text]]]]:
+        """
+        Search the example store, if an example_store is set, for the questions similar
+        to the given text.
+        :param text: The text to convert to SQL query.
+        :return: A tuple of the SQL query of a stored question similar enough to be
+                 reused, or None, and of the examples to include in the prompt
+                 otherwise, as a list of (question, SQL query) tuples.
+        """
+        if self.example_store is None:
+            return None, None
+
+        with self.span("examples") as span:
+            match = self.example_store.find_match(text)
+            span.set_attribute("reused", match is not None)
+            if match is not None:
+                return match.sql, None
+            examples = self.example_store.get_prompt_examples(text)
+            span.set_attribute("examples", len(examples))
+        return None, examples
+
+    def _find_answer(
+        self, text: Text, database_schema: Dict, span: InstrumentationSpan
+    ) -> Tuple[Optional[Text], Optional[List[Tuple[Text, Text]]], Optional[Text]]:
+        # Returns the cached or reused SQL query for the text, or else the examples to
+        # include in the prompt, along with the answer cache key.
+        cache_key = None
+        if self.answer_cache is not None:
+            cache_key = self.get_answer_cache_key(text, database_schema)
+            cached_sql = self.answer_cache.get(cache_key)
+            span.set_attribute("cache_hit", cached_sql is not None)
+            if cached_sql is not None:
+                self.logger.info(f"SQL query (cached): {cached_sql}")
+                return cached_sql, None, cache_key
+
+        reused_sql, examples = self.find_examples(text)
+        if reused_sql is not None:
+            self.logger.info(f"SQL query (reused): {reused_sql}")
+            return reused_sql, None, cache_key
+        return None, examples, cache_key
+
+    def find_template(self, text: Text) -> Optional[Tuple[Text, Dict[Text, Any]]]:
+        """
+        Match the given text against the SQL templates, if a template_cache is set.
+        :param text: The text to convert to SQL query.
+        :return: A tuple of the SQL query of the matching template and the values of
+                 its bind parameters, or None if no template matches.
+        """
+        if self.template_cache is None:
+            return None
+
+        with self.span("template") as span:
+            template = self.template_cache.match(text)
+            span.set_attribute("cache_hit", template is not None)
+        if template is not None:
+            self.logger.info(f"SQL query (template): {render_sql(*template)}")
+        return template
+
+    def check_template_cost(
+        self, sql: Text, parameters: Dict[Text, Any]
+    ) -> Tuple[Text, Optional[Dict[Text, Any]]]:
+        """
+        Check the estimated cost of the given SQL template with the given values before
+        it is executed, if a cost_guard is set.
+        :param sql: The SQL query of the template.
+        :param parameters: The values of the bind parameters.
+        :return: A tuple of the SQL query to execute and the values of its bind
+                 parameters. If the cost guard limited the query, the limited query
+                 is returned with the values rendered as literals.
+        """
+        if self.cost_guard is None:
+            return sql, parameters
+
+        rendered_sql = render_sql(sql, parameters)
+        checked_sql = self.check_query_cost(rendered_sql)
+        if checked_sql != rendered_sql:
+            return checked_sql, None
+        return sql, parameters
+
+    def record_answer(self, text: Text, sql: Text) -> None:
+        """
+        Record the given text and the SQL query that answered it in the example store
+        and the template cache, if they are set. Only SQL queries that executed
+        successfully should be recorded.
+        :param text: The text that was converted to SQL query.
+        :param sql: The SQL query.
+        """
+        if self.example_store is not None:
+            self.example_store.add(text, sql)
+        if self.template_cache is not None:
+            self.template_cache.add(text, sql)
+
+    def span(
+        self, name: Text, attributes: Optional[Dict[Text, Any]] = None
+    ) -> InstrumentationSpan:
+        """
+        Create a span that times a stage of the pipeline and reports it to the
+        instrumentation.
+        :param name: The name of the span.
+        :param attributes: The attributes of the span known at its start.
+        :return: An InstrumentationSpan, to be used as a context manager.
+        """
+        return InstrumentationSpan(self.instrumentation, name, attributes)
+
+    def check_query_cost(self, sql: Text) -> Text:
+        """
+        Check the estimated cost of the given SQL query before it is executed, if a
+        cost_guard is set.
+        :param sql: The SQL query to check.
+        :return: The SQL query to execute, which the cost guard may have limited.
+        """
+        if self.cost_guard is None:
+            return sql
+
+        with self.span("cost_guard") as span:
+            checked_sql = self.cost_guard.check(self.data_connector, sql)
+            span.set_attribute("limited", checked_sql != sql)
+        if checked_sql != sql:
+            self.logger.info(f"SQL query (limited): {checked_sql}")
+        return checked_sql
+
+    def select_candidate(self, candidates: List[Text]) -> Text:
+        """
+        Select the SQL query to execute among the candidates generated by the LLM.
+        :param candidates: The candidate SQL queries.
+        :return: The selected SQL query.
+        """
+        if len(candidates) == 1:
+            return candidates[0]
+
+        with self.span("select_candidate", {"candidates": len(candidates)}) as span:
+            sql = self.candidate_selector.select(self.data_connector, candidates)
+            span.set_attribute("candidate", candidates.index(sql))
+        return sql
+
+    def coalesce(
+        self, kind: Text, key: Text, function: Callable[[], T]
+    ) -> Tuple[T, bool]:
+        """
+        Call the function, sharing the call with the identical calls in flight in
+        other threads if a single_flight is set.
+        :param kind: The kind of call, e.g. "query".
+        :param key: The key identifying identical calls of this kind on the database.
+        :param function: The function to call.
+        :return: A tuple of the result and whether it was shared with another call.
+        """
+        if self.single_flight is None:
+            return function(), False
+        return self.single_flight.do(
+            (kind, self.data_connector.get_connector_identity(), key), function
+        )
+
+    def coalesce_query(
+        self,
+        kind: Text,
+        sql: Text,
+        parameters: Optional[Dict[Text, Any]],
+        function: Callable[[], T],
+    ) -> Tuple[T, bool]:
+        """
+        Execute a SQL query with the function, sharing the execution with the
+        identical read-only queries in flight in other threads if a single_flight is
+        set. Statements that may modify the database are always executed on their own.
+        :param kind: The kind of execution, e.g. "query".
+        :param sql: The SQL query.
+        :param parameters: The values of the bind parameters of the SQL query.
+        :param function: The function executing the SQL query.
+        :return: A tuple of the result and whether it was shared with another call.
+        """
+        if not is_read_only_query(sql):
+            return function(), False
+        return self.coalesce(kind, normalize_sql(render_sql(sql, parameters)), function)
+
+    def get_last_token_breakdown(self) -> Optional[Dict]:
+        """
+        Get the token breakdown of the last prompt built in the current thread.
+        A breakdown is only recorded when a token_budget is set.
+        :return: A dictionary with the token budget, the total number of tokens, the
+                 tokens of the schema and of the rest of the prompt, and the tables
+                 that were included, truncated and dropped.
+        """
+        return getattr(self._local, "token_breakdown", None)
+
+    def get_schema_fingerprint(self, database_schema: Dict) -> Text:
+        """
+        Get a fingerprint of the given database schema snapshot.
+        The fingerprint of the most recent snapshot is memoized by identity.
+        :param database_schema: The database schema snapshot.
+        :return: A hash of the database schema.
+        """
+        cached = self._schema_fingerprint
+        if cached is not None and cached[0] is database_schema:
+            return cached[1]
+
+        fingerprint = hashlib.sha256(
+            json.dumps(database_schema, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        self._schema_fingerprint = (database_schema, fingerprint)
+        return fingerprint
+
+    def get_answer_cache_key(
+        self, text: Text, database_schema: Optional[Dict] = None
+    ) -> Text:
+        """
+        Get the key of the cached answer for the given text.
+        :param text: The text to convert to SQL query.
+        :param database_schema: The database schema snapshot to use.
+                                This parameter is optional. If it is not provided, the
+                                schema is retrieved from the data connector.
+        :return: The answer cache key.
+        """
+        if database_schema is None:
+            database_schema = self.data_connector.get_database_schema()
+
+        model_parameters = dict(self.llm_connector.get_model_parameters())
+        model_parameters["max_tables"] = self.max_tables
+        if self.candidates > 1:
+            model_parameters["candidates"] = self.candidates
+        return create_cache_key(
+            text, model_parameters, self.get_schema_fingerprint(database_schema)
+        )
+
+
+class TextToSQL(BaseTextToSQL):
+    """
+    The class for converting text to SQL query and querying the database.
+    The parameters are described in BaseTextToSQL.
+    """
+
     def convert_text_to_sql(self, text: Text) -> Text:
         """
         Convert text to SQL query.
         :param text: The Text to convert to SQL query.
         :return: The converted SQL query.
         """
-        prompt = self.llm_connector.create_prompt(
-            text,
-            self.data_connector.get_database_schema(),
-            self.data_connector.get_connector_name(),
-        )
-        self.logger.info(f"Prompt: {prompt}")
+        return self._convert_text_to_sql(text)
+
+    def _convert_text_to_sql(
+        self, text: Text, database_schema: Optional[Dict] = None
+    ) -> Text:
+        with self.span("convert_text_to_sql") as span:
+            if database_schema is None:
+                with self.span("schema"):
+                    database_schema = self.data_connector.get_database_schema()
+            schema: Dict = database_schema
+
+            if self.single_flight is None:
+                return self._generate_sql(text, schema, span)
+
+            sql, shared = self.coalesce(
+                "convert_text_to_sql",
+                self.get_answer_cache_key(text, schema),
+                lambda: self._generate_sql(text, schema, span),
+            )
+            span.set_attribute("shared", shared)
+            return sql
 
-        sql = self.llm_connector.get_answer(prompt).strip()
+    def _generate_sql(
+        self, text: Text, database_schema: Dict, span: InstrumentationSpan
+    ) -> Text:
+        answer, examples, cache_key = self._find_answer(text, database_schema, span)
+        if answer is not None:
+            return answer
+
+        prompt = self.create_prompt(text, database_schema, examples)
+
+        with self.span("llm") as llm_span:
+            self.llm_connector.set_last_usage(None)
+            if self.candidates > 1:
+                answers = self.llm_connector.get_answers(prompt, n=self.candidates)
+            else:
+                answers = [self.llm_connector.get_answer(prompt)]
+            llm_span.set_attributes(self.llm_connector.get_last_usage())
+        sql = self.select_candidate([answer.strip() for answer in answers])
         self.logger.info(f"SQL query: {sql}")
+
+        if self.answer_cache is not None and cache_key is not None:
+            self.answer_cache.set(cache_key, sql)
         return sql
 
+    def convert_text_to_sql_stream(self, text: Text) -> Iterator[Text]:
+        """
+        Convert text to SQL query, yielding the SQL query as it is generated by the LLM.
+        Generation stops at the end of the first complete SQL statement. A single
+        answer is streamed, regardless of the number of candidates. A cached answer is
+        yielded at once.
+        :param text: The Text to convert to SQL query.
+        :return: An iterator over the chunks of the converted SQL query.
+        """
+        with self.span("convert_text_to_sql") as span:
+            with self.span("schema"):
+                database_schema = self.data_connector.get_database_schema()
+
+            answer, examples, cache_key = self._find_answer(text, database_schema, span)
+            if answer is not None:
+                with span.pause():
+                    yield answer
+                return
+
+            prompt = self.create_prompt(text, database_schema, examples)
+
+            with self.span("llm") as llm_span:
+                self.llm_connector.set_last_usage(None)
+                chunks: List[Text] = []
+                for chunk in self.llm_connector.stream_answer(prompt):
+                    if not chunks:
+                        chunk = chunk.lstrip()
+                        if not chunk:
+                            continue
+                    chunks.append(chunk)
+                    with span.pause(), llm_span.pause():
+                        yield chunk
+                llm_span.set_attributes(self.llm_connector.get_last_usage())
+            sql = "".join(chunks).strip()
+            self.logger.info(f"SQL query: {sql}")
+
+            if (
+                self.answer_cache is not None
+                and cache_key is not None
+                and self.candidates == 1
+            ):
+                self.answer_cache.set(cache_key, sql)
+
     def query(self, text: Text) -> List[Dict]:
         """
         Query the database.
         :param text: The text to convert to SQL query and query the database.
         :return: The query result.
         """
-        sql = self.convert_text_to_sql(text)
-        return self.data_connector.query(sql)
+        return self._query(text)
+
+    def _prepare_query(
+        self, text: Text, database_schema: Optional[Dict] = None
+    ) -> Tuple[Text, Optional[Dict[Text, Any]], Optional[Text]]:
+        # Returns the SQL query to execute, the values of its bind parameters, and the
+        # SQL query generated by the LLM, or None if a template matched.
+        template = self.find_template(text)
+        if template is None:
+            # Without a batch schema, the question goes through convert_text_to_sql(),
+            # so that subclasses such as TextToSQLChat can answer it with their history.
+            generated_sql = (
+                self.convert_text_to_sql(text)
+                if database_schema is None
+                else self._convert_text_to_sql(text, database_schema)
+            )
+            return self.check_query_cost(generated_sql), None, generated_sql
 
-    def query_df(self, text: Text) -> pd.DataFrame:
+        sql, parameters = self.check_template_cost(*template)
+        return sql, parameters, None
+
+    def _query(self, text: Text, database_schema: Optional[Dict] = None) -> List[Dict]:
+        with self.span("query"):
+            sql, parameters, generated_sql = self._prepare_query(text, database_schema)
+            with self.span("execute") as span:
+                result, shared = self.coalesce_query(
+                    "query",
+                    sql,
+                    parameters,
+                    lambda: self.data_connector.query(sql, parameters=parameters),
+                )
+                span.set_attributes({"rows": len(result), "shared": shared})
+            if generated_sql is not None:
+                self.record_answer(text, generated_sql)
+            # Each caller gets its own list of the shared rows.
+            return list(result) if shared else result
+
+    def query_df(self, text: Text) -> "pd.DataFrame":
         """
         Query the database and return the result as a Pandas DataFrame.
         :param text: The text to convert to SQL query and query the database.
         :return: A Pandas DataFrame containing the query result.
         """
-        sql = self.convert_text_to_sql(text)
-        return pd.DataFrame(self.data_connector.query(sql))
+        import pandas as pd
+
+        with self.span("query_df"):
+            sql, parameters, generated_sql = self._prepare_query(text)
+            with self.span("execute") as span:
+                (columns, records), shared = self.coalesce_query(
+                    "query_records",
+                    sql,
+                    parameters,
+                    lambda: self.data_connector.query_records(
+                        sql, parameters=parameters
+                    ),
+                )
+                span.set_attributes({"rows": len(records), "shared": shared})
+            if generated_sql is not None:
+                self.record_answer(text, generated_sql)
+            with self.span("dataframe"):
+                return pd.DataFrame.from_records(records, columns=columns)
+
+    def query_df_chunks(
+        self, text: Text, chunksize: int = 10000
+    ) -> Iterator["pd.DataFrame"]:
+        """
+        Query the database and stream the result as Pandas DataFrames of bounded size.
+        The rows are fetched from the database chunk by chunk, so memory usage is
+        bounded by the chunksize rather than by the size of the result. An empty
+        result yields a single empty DataFrame with the columns of the query. The
+        question is answered as by query_df(), but the execution of the query is not
+        shared with identical queries in flight, as the rows are not held.
+        :param text: The text to convert to SQL query and query the database.
+        :param chunksize: The maximum number of rows in each DataFrame.
+        :return: An iterator over Pandas DataFrames containing the query result.
+        """
+        import pandas as pd
+
+        with self.span("query_df") as query_span:
+            sql, parameters, generated_sql = self._prepare_query(text)
+            with self.span("execute") as span:
+                row_count = 0
+                for columns, records in self.data_connector.query_records_iter(
+                    sql, batch_size=chunksize, parameters=parameters
+                ):
+                    row_count += len(records)
+                    df = pd.DataFrame.from_records(records, columns=columns)
+                    with query_span.pause(), span.pause():
+                        yield df
+                span.set_attribute("rows", row_count)
+            if generated_sql is not None:
+                self.record_answer(text, generated_sql)
+
+    def convert_many(
+        self, texts: List[Text], max_workers: int = 8, ordered: bool = True
+    ) -> List[BatchResult]:
+        """
+        Convert many texts to SQL queries concurrently.
+        The database schema is retrieved once and shared by all the prompts. Each text
+        is converted independently of any chat history, and a failure to convert one
+        text does not abort the batch.
+        :param texts: The texts to convert to SQL queries.
+        :param max_workers: The maximum number of concurrent LLM calls.
+        :param ordered: Whether to return the results in the order of the texts. If
+                        False, the results are returned in the order they complete.
+        :return: A list of BatchResult objects holding the SQL query or the error for
+                 each text.
+        """
+        database_schema = self.data_connector.get_database_schema()
+        return self._run_batch(
+            texts,
+            lambda text: self._convert_text_to_sql(text, database_schema),
+            max_workers,
+            ordered,
+        )
+
+    def query_many(
+        self, texts: List[Text], max_workers: int = 8, ordered: bool = True
+    ) -> List[BatchResult]:
+        """
+        Convert many texts to SQL queries and query the database concurrently.
+        The database schema is retrieved once and shared by all the prompts. Each text
+        is answered as by query(), independently of any chat history, and a failure to
+        convert or execute one query does not abort the batch.
+        :param texts: The texts to convert to SQL queries and query the database.
+        :param max_workers: The maximum number of concurrent conversions and queries.
+        :param ordered: Whether to return the results in the order of the texts. If
+                        False, the results are returned in the order they complete.
+        :return: A list of BatchResult objects holding the query result or the error
+                 for each text.
+        """
+        database_schema = self.data_connector.get_database_schema()
+        return self._run_batch(
+            texts,
+            lambda text: self._query(text, database_schema),
+            max_workers,
+            ordered,
+        )
+
+    def _run_batch(
+        self,
+        texts: List[Text],
+        function: Callable[[Text], Any],
+        max_workers: int,
+        ordered: bool,
+    ) -> List[BatchResult]:
+        def run(index: int, text: Text) -> BatchResult:
+            try:
+                return BatchResult(index, text, result=function(text))
+            except Exception as e:
+                self.logger.warning(f"Failed to process text {index}: {e}")
+                return BatchResult(index, text, error=e)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(run, index, text) for index, text in enumerate(texts)
+            ]
+            if ordered:
+                return [future.result() for future in futures]
+            return [future.result() for future in as_completed(futures)]
@@ -7,6 +7,9 @@ from .llm_connectors.llm_connector import LLMConnector
 class TextToSQLAgent:
     """
     The class for invoking an agent against the configured database.
+    The agent queries the database through the engine of the data connector, and
+    describes the tables to the LLM from the cached schema of the data connector, so
+    the database is not reflected again at every step.
 
     Parameters:
     -----------
@@ -14,17 +17,32 @@ class TextToSQLAgent:
         The LLMConnector to use for converting text to SQL query.
     data_connector : DataConnector
         The DataConnector to use for querying the database.
+    verbose : bool
+        Whether to print each step of the agent. This parameter is optional, and
+        defaults to False.
+    sample_rows_in_table_info : int
+        The number of sample rows to include in the description of each table. This
+        parameter is optional, and defaults to 3.
     """
 
-    def __init__(self, data_connector: DataConnector, llm_connector: LLMConnector):
+    def __init__(
+        self,
+        data_connector: DataConnector,
+        llm_connector: LLMConnector,
+        verbose: bool = False,
+        sample_rows_in_table_info: int = 3,
+    ):
         try:
             from langchain_community.agent_toolkits import create_sql_agent
-            from langchain_community.utilities.sql_database import SQLDatabase
 
-            db = SQLDatabase.from_uri(data_connector.get_connection_string())
+            from .cached_sql_database import CachedSQLDatabase
+
+            self.db = CachedSQLDatabase(
+                data_connector, sample_rows_in_table_info=sample_rows_in_table_info
+            )
             llm = llm_connector.to_langchain()
 
-            self.agent_executor = create_sql_agent(llm, db=db, verbose=True)
+            self.agent_executor = create_sql_agent(llm, db=self.db, verbose=verbose)
         except ImportError:
             raise ImportError(
                 "The langchain-community package is required to use the agent. "
@@ -1,15 +1,12 @@
-import logging.config
-from typing import List, Text, Union
+from typing import List, Optional, Text, Union
 
-from .config_parser import ConfigParser
+from .cost_guard import QueryCostGuard
 from .data_connectors.data_connector import DataConnector
+from .instrumentation import Instrumentation
 from .llm_connectors.llm_connector import LLMConnector
+from .prompt_builder import TokenCounter
 from .text_to_sql import TextToSQL
 
-logging_config_parser = ConfigParser()
-logging.config.dictConfig(logging_config_parser.get_config_dict())
-logger = logging.getLogger()
-
 
 class TextToSQLChatMemory:
     """
@@ -24,13 +21,29 @@ class TextToSQLChatMemory:
         The size of the window to use when retrieving messages from memory.
         This parameter is optional, and defaults to None. If this parameter is not
         provided, all messages will returned.
+    max_tokens : Union[int, None]
+        The maximum number of tokens in the retrieved messages, including the system
+        prompt. The oldest messages are dropped first, but the system prompt and the
+        latest message are always included. This parameter is optional, and defaults
+        to None. If this parameter is not provided, messages are not limited by tokens.
+    token_counter : TokenCounter
+        The TokenCounter to use when max_tokens is set. This parameter is optional. If
+        this parameter is not provided, a counter for the default model is created.
     """
 
     def __init__(
-        self, system_prompt: Text, window_size: Union[int, None] = None
+        self,
+        system_prompt: Text,
+        window_size: Union[int, None] = None,
+        max_tokens: Union[int, None] = None,
+        token_counter: Optional[TokenCounter] = None,
     ) -> None:
         self.system_prompt = system_prompt
         self.window_size = window_size
+        self.max_tokens = max_tokens
+        self.token_counter = (
+            (token_counter or TokenCounter()) if max_tokens is not None else None
+        )
         self.memory: List = []
 
     def add_message(self, role: Text, content: Text) -> None:
@@ -50,17 +63,32 @@ class TextToSQLChatMemory:
         """
         Get the messages stored in memory.
         If the window_size is not provided or the number of messages is less than the
-        window_size, all messages will be returned. The system prompt is always
+        window_size, all messages will be returned. If max_tokens is provided, the
+        oldest messages are dropped until the messages fit. The system prompt is always
         included.
         :return: The messages stored in memory.
         """
+        system_message = {"role": "system", "content": self.system_prompt}
         if self.window_size is None or len(self.memory) <= self.window_size:
-            return [{"role": "system", "content": self.system_prompt}] + self.memory
+            messages = self.memory
         else:
             # Return the last 'window_size' elements of the memory.
-            return [{"role": "system", "content": self.system_prompt}] + self.memory[
-                -self.window_size :
-            ]
+            messages = self.memory[-self.window_size :]
+
+        if self.max_tokens is not None and self.token_counter is not None:
+            remaining = self.max_tokens - self.token_counter.count_messages(
+                [system_message]
+            )
+            start = len(messages)
+            while start > 0:
+                tokens = self.token_counter.count_messages([messages[start - 1]])
+                if tokens > remaining and start < len(messages):
+                    break
+                remaining -= tokens
+                start -= 1
+            messages = messages[start:]
+
+        return [system_message] + messages
 
 
 class TextToSQLChat(TextToSQL):
@@ -78,6 +106,19 @@ class TextToSQLChat(TextToSQL):
         The size of the window to use when retrieving messages from memory.
         This parameter is optional, and defaults to None. If this parameter is not
         provided, all messages will returned.
+    max_tokens : Union[int, None]
+        The maximum number of tokens in the messages sent to the LLM, including the
+        system prompt. The oldest messages are dropped first. This parameter is
+        optional, and defaults to None. If this parameter is not provided, messages are
+        not limited by tokens.
+    instrumentation : Instrumentation
+        The Instrumentation to notify of the duration and token usage of each stage
+        of the chat. This parameter is optional, and defaults to None. If this
+        parameter is not provided, the chat is not instrumented.
+    cost_guard : QueryCostGuard
+        The QueryCostGuard to check the estimated cost of each SQL query with before
+        it is executed. This parameter is optional, and defaults to None. If this
+        parameter is not provided, queries are executed without a pre-flight check.
     """
 
     def __init__(
@@ -85,8 +126,16 @@ class TextToSQLChat(TextToSQL):
         data_connector: DataConnector,
         llm_connector: LLMConnector,
         window_size: Union[int, None] = None,
+        max_tokens: Union[int, None] = None,
+        instrumentation: Union[Instrumentation, None] = None,
+        cost_guard: Union[QueryCostGuard, None] = None,
     ) -> None:
-        super().__init__(data_connector, llm_connector)
+        super().__init__(
+            data_connector,
+            llm_connector,
+            instrumentation=instrumentation,
+            cost_guard=cost_guard,
+        )
 
         # Add the system prompt to the memory.
         system_prompt = self.llm_connector.create_prompt(
@@ -96,7 +145,9 @@ class TextToSQLChat(TextToSQL):
         )
         self.logger.info(f"System prompt: {system_prompt}")
 
-        self.memory = TextToSQLChatMemory(system_prompt, window_size=window_size)
+        self.memory = TextToSQLChatMemory(
+            system_prompt, window_size=window_size, max_tokens=max_tokens
+        )
 
     def convert_text_to_sql(self, text: Text) -> Text:
         """
@@ -104,11 +155,17 @@ class TextToSQLChat(TextToSQL):
         :param text: The Text to convert to SQL query.
         :return: The converted SQL query.
         """
-        self.memory.add_message("user", text)
+        with self.span("chat.convert_text_to_sql"):
+            self.memory.add_message("user", text)
+            with self.span("prompt"):
+                messages = self.memory.get_messages()
 
-        sql = self.llm_connector.get_answer(messages=self.memory.get_messages()).strip()
-        self.logger.info(f"SQL query: {sql}")
+            with self.span("llm") as llm_span:
+                self.llm_connector.set_last_usage(None)
+                sql = self.llm_connector.get_answer(messages=messages).strip()
+                llm_span.set_attributes(self.llm_connector.get_last_usage())
+            self.logger.info(f"SQL query: {sql}")
 
-        self.memory.add_message("system", sql)
+            self.memory.add_message("system", sql)
 
-        return sql
+            return sql
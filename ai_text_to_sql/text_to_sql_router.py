@@ -0,0 +1,219 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Text
+
+from .data_connectors.data_connector import DataConnector
+from .exceptions import NoRelevantDatabaseException
+from .llm_connectors.llm_connector import LLMConnector
+from .text_to_sql import TextToSQL
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .schema_index import SchemaIndex
+
+logger = logging.getLogger(__name__)
+
+
+class TextToSQLRouter:
+    """
+    The class for converting text to SQL query and querying the database that is most
+    relevant to each question, among many databases.
+    The schemas of all the databases are reflected once to build an offline BM25 index
+    of their tables, which only keeps the terms of the table and column names. Each
+    question is routed to the databases whose tables match it best. Only the most
+    recently used databases keep their reflected schema, their pooled connections and
+    their TextToSQL instance; the others are released and restored on demand.
+
+    Parameters:
+    -----------
+    data_connectors : Mapping[Text, DataConnector]
+        A dictionary mapping the name of each database to its DataConnector.
+    llm_connector : LLMConnector
+        The LLMConnector to use for converting text to SQL query.
+    max_databases : int
+        The maximum number of databases to route a question to. This parameter is
+        optional, and defaults to 1.
+    min_score_ratio : float
+        The minimum score of a database, relative to the score of the most relevant
+        database, for a question to be routed to it as well. This parameter is
+        optional, and defaults to 0.5.
+    tables_per_database : int
+        The number of best matching tables whose scores are added up to score a
+        database. This parameter is optional, and defaults to 3.
+    max_active_databases : int
+        The maximum number of recently used databases whose schema, connections and
+        TextToSQL instance are kept in memory. This parameter is optional, and
+        defaults to 8.
+    text_to_sql_kwargs : Any
+        The other parameters of the TextToSQL instance created for each database, e.g.
+        max_tables or answer_cache.
+    """
+
+    def __init__(
+        self,
+        data_connectors: Mapping[Text, DataConnector],
+        llm_connector: LLMConnector,
+        max_databases: int = 1,
+        min_score_ratio: float = 0.5,
+        tables_per_database: int = 3,
+        max_active_databases: int = 8,
+        **text_to_sql_kwargs: Any,
+    ) -> None:
+        self.data_connectors = data_connectors
+        self.llm_connector = llm_connector
+        self.max_databases = max_databases
+        self.min_score_ratio = min_score_ratio
+        self.tables_per_database = tables_per_database
+        self.max_active_databases = max_active_databases
+        self.text_to_sql_kwargs = text_to_sql_kwargs
+
+        self._schema_index: Optional["SchemaIndex"] = None
+        # Maps the documents of the index, i.e. the tables, to their database.
+        self._table_databases: Dict[Text, Text] = {}
+        self._active: OrderedDict[Text, TextToSQL] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def build_index(self) -> "SchemaIndex":
+        """
+        Reflect the schema of every database and build the index used for routing.
+        The schemas of the databases that are not active are released afterwards.
+        :return: The SchemaIndex over the tables of all the databases.
+        """
+        from .schema_index import SchemaIndex
+
+        with self._lock:
+            documents: Dict[Text, List[Text]] = {}
+            self._table_databases = {}
+            for name, data_connector in self.data_connectors.items():
+                for table, columns in data_connector.get_database_schema().items():
+                    document = f"{name}.{table}"
+                    documents[document] = columns
+                    self._table_databases[document] = name
+                if name not in self._active:
+                    self._release(data_connector)
+
+            schema_index = SchemaIndex(documents)
+            # Only the postings are needed for routing, so the columns of the released
+            # databases are not kept in memory by the index.
+            schema_index.database_schema = {}
+            self._schema_index = schema_index
+            return schema_index
+
+    def refresh_index(self) -> "SchemaIndex":
+        """
+        Rebuild the index after databases were added or their schemas changed.
+        :return: The rebuilt SchemaIndex.
+        """
+        with self._lock:
+            for name in self._active:
+                self.data_connectors[name].invalidate_schema()
+            return self.build_index()
+
+    def route(self, text: Text) -> List[Text]:
+        """
+        Get the names of the databases that are most relevant to the given text.
+        :param text: The text to route, typically the user's question.
+        :return: The names of the databases, the most relevant one first.
+        """
+        with self._lock:
+            schema_index = self._schema_index or self.build_index()
+            table_databases = self._table_databases
+
+        table_scores: Dict[Text, List[float]] = {}
+        for document, score in schema_index.search(text, len(table_databases)):
+            table_scores.setdefault(table_databases[document], []).append(score)
+        if not table_scores:
+            raise NoRelevantDatabaseException(
+                f"No database is relevant to the question: {text}"
+            )
+
+        # The scores of each database are in decreasing order.
+        database_scores = sorted(
+            (
+                (sum(scores[: self.tables_per_database]), name)
+                for name, scores in table_scores.items()
+            ),
+            key=lambda item: -item[0],
+        )
+        best_score = database_scores[0][0]
+        databases = [
+            name
+            for score, name in database_scores[: self.max_databases]
+            if score >= self.min_score_ratio * best_score
+        ]
+        logger.info(f"Routed to databases: {databases}")
+        return databases
+
+    def get_text_to_sql(self, name: Text) -> TextToSQL:
+        """
+        Get the TextToSQL instance of a database, marking the database as the most
+        recently used. If there are more than max_active_databases active databases,
+        the least recently used one is released.
+        :param name: The name of the database.
+        :return: The TextToSQL instance of the database.
+        """
+        with self._lock:
+            text_to_sql = self._active.get(name)
+            if text_to_sql is None:
+                text_to_sql = TextToSQL(
+                    self.data_connectors[name],
+                    self.llm_connector,
+                    **self.text_to_sql_kwargs,
+                )
+            self._active[name] = text_to_sql
+            self._active.move_to_end(name)
+
+            while len(self._active) > self.max_active_databases:
+                evicted_name, _ = self._active.popitem(last=False)
+                self._release(self.data_connectors[evicted_name])
+            return text_to_sql
+
+    def get_active_databases(self) -> List[Text]:
+        """
+        Get the names of the databases that are kept in memory.
+        :return: The names of the active databases, the least recently used first.
+        """
+        with self._lock:
+            return list(self._active)
+
+    @staticmethod
+    def _release(data_connector: DataConnector) -> None:
+        # The schema is reflected again, and connections are opened again, the next
+        # time the database is used.
+        data_connector.invalidate_schema()
+        data_connector.connection.dispose()
+
+    def convert_text_to_sql(self, text: Text) -> Dict[Text, Text]:
+        """
+        Convert text to SQL query for each of the databases it is routed to.
+        :param text: The Text to convert to SQL query.
+        :return: A dictionary mapping the name of each database to its SQL query.
+        """
+        return {
+            name: self.get_text_to_sql(name).convert_text_to_sql(text)
+            for name in self.route(text)
+        }
+
+    def query(self, text: Text) -> Dict[Text, List[Dict]]:
+        """
+        Query each of the databases the text is routed to.
+        :param text: The text to convert to SQL query and query the databases.
+        :return: A dictionary mapping the name of each database to its query result.
+        """
+        return {
+            name: self.get_text_to_sql(name).query(text) for name in self.route(text)
+        }
+
+    def query_df(self, text: Text) -> Dict[Text, "pd.DataFrame"]:
+        """
+        Query each of the databases the text is routed to and return the results as
+        Pandas DataFrames.
+        :param text: The text to convert to SQL query and query the databases.
+        :return: A dictionary mapping the name of each database to a Pandas DataFrame
+                 containing its query result.
+        """
+        return {
+            name: self.get_text_to_sql(name).query_df(text) for name in self.route(text)
+        }
@@ -0,0 +1,110 @@
+"""
+Measures the cold-start import time of the package with `python -X importtime` and
+checks that importing it does not load pandas, the LLM client libraries or the
+drivers of databases that are not used.
+
+Usage: python -m benchmarks.import_time --runs 5 --max-ms 500
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_STATEMENT = (
+    "import ai_text_to_sql; "
+    "from ai_text_to_sql import TextToSQL; "
+    "from ai_text_to_sql.data_connectors import SQLiteConnector"
+)
+
+HEAVY_MODULES = (
+    "pandas",
+    "numpy",
+    "openai",
+    "pyodbc",
+    "psycopg2",
+    "pymysql",
+    "langchain_community",
+    "langchain_openai",
+    "sqlalchemy.ext.asyncio",
+)
+
+
+def import_time(statement: str) -> Tuple[int, Dict[str, int], List[str]]:
+    """
+    Run the given import statement in a fresh interpreter.
+    :param statement: The Python statement that imports the package.
+    :return: A tuple containing the total import time of the package in microseconds,
+             a dictionary mapping each imported module to its cumulative import time
+             in microseconds, and the heavy modules that were loaded.
+    """
+    check = (
+        f"{statement}; import sys; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0
+    cumulative_times: Dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        name = module.strip()
+        cumulative_times[name] = max(
+            cumulative_times.get(name, 0), int(cumulative.strip())
+        )
+        # Modules of the package imported directly by the statement are not indented,
+        # and their cumulative times include everything they import.
+        if module == f" {name}" and name.startswith("ai_text_to_sql"):
+            total += int(cumulative.strip())
+
+    loaded = [module for module in process.stdout.strip().split(",") if module]
+    return total, cumulative_times, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statement", default=DEFAULT_STATEMENT)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Fail if the median import time exceeds this many milliseconds.",
+    )
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total, cumulative_times, loaded = import_time(args.statement)
+        totals.append(total)
+    median = statistics.median(totals) / 1000
+
+    print(f"Statement: {args.statement}")
+    print(f"Median import time over {args.runs} runs: {median:.1f} ms")
+    print("Slowest modules in the last run (cumulative):")
+    slowest = sorted(cumulative_times.items(), key=lambda item: item[1], reverse=True)
+    for module, time in slowest[: args.top]:
+        print(f"  {time / 1000:8.1f} ms  {module}")
+
+    failed = False
+    if loaded:
+        print(f"Heavy modules loaded on import: {', '.join(loaded)}")
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Median import time exceeds the limit of {args.max_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
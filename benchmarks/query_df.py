@@ -0,0 +1,107 @@
+"""
+Compares building a DataFrame from the list of SQLAlchemy Row objects returned by
+DataConnector.query() against the DBAPI record path used by TextToSQL.query_df().
+
+Usage: python -m benchmarks.query_df --rows 1000000
+"""
+
+import argparse
+import gc
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import pandas as pd
+
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+
+def create_database(path: str, rows: int) -> None:
+    """
+    Create a SQLite database with a single table of the given number of rows.
+    :param path: The path of the database file.
+    :param rows: The number of rows to insert.
+    """
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE measurements "
+            "(id INTEGER, value REAL, label TEXT, category INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO measurements VALUES (?, ?, ?, ?)",
+            ((i, i * 0.5, f"label_{i % 1000}", i % 7) for i in range(rows)),
+        )
+
+
+def measure(build: Callable[[], pd.DataFrame]) -> Tuple[float, float]:
+    """
+    Measure the time and the peak memory allocated by the given function.
+    The time is measured separately from the memory, since tracing allocations slows
+    down the function.
+    :param build: The function that builds the DataFrame.
+    :return: The run time in seconds and the peak memory in MiB.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def compare(connector: SQLiteConnector, query: str, label: str) -> None:
+    """
+    Compare the row and record paths for the given query.
+    :param connector: The connector to query.
+    :param query: The query to run.
+    :param label: The label to print for the comparison.
+    """
+
+    def from_rows() -> pd.DataFrame:
+        return pd.DataFrame(connector.query(query))
+
+    def from_records() -> pd.DataFrame:
+        columns, records = connector.query_records(query)
+        return pd.DataFrame.from_records(records, columns=columns)
+
+    rows_time, rows_memory = measure(from_rows)
+    records_time, records_memory = measure(from_records)
+    print(label)
+    print(f"  Row objects:   {rows_time * 1000:8.1f} ms {rows_memory:8.1f} MiB")
+    print(f"  DBAPI records: {records_time * 1000:8.1f} ms {records_memory:8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    chinook = SQLiteConnector(database="tests/data/chinook.db")
+    compare(
+        chinook,
+        "SELECT t.Name, a.Title, g.Name AS Genre, t.Milliseconds FROM tracks t "
+        "JOIN albums a ON a.AlbumId = t.AlbumId "
+        "JOIN genres g ON g.GenreId = t.GenreId",
+        "Chinook tracks (3503 rows)",
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = os.path.join(temp_dir, "rows.db")
+        create_database(database, args.rows)
+        compare(
+            SQLiteConnector(database=database),
+            "SELECT * FROM measurements",
+            f"Generated table ({args.rows} rows)",
+        )
+
+
+if __name__ == "__main__":
+    main()
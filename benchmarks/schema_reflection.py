@@ -0,0 +1,80 @@
+"""
+Compares reflecting the database schema table by table through the SQLAlchemy
+inspector against reflecting it with the connector's single bulk schema_query.
+
+Usage: python -m benchmarks.schema_reflection --tables 2000 --columns 12
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict
+
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+
+def create_database(path: str, tables: int, columns: int) -> None:
+    """
+    Create a SQLite database with the given number of tables and columns per table.
+    :param path: The path of the database file.
+    :param tables: The number of tables to create.
+    :param columns: The number of columns per table.
+    """
+    with sqlite3.connect(path) as conn:
+        for table in range(tables):
+            column_definitions = ", ".join(
+                f"column_{column} {'INTEGER' if column % 2 else 'TEXT'}"
+                for column in range(columns)
+            )
+            conn.execute(f"CREATE TABLE table_{table} ({column_definitions})")
+
+
+def time_reflection(reflect: Callable[[], Dict], repeat: int) -> float:
+    """
+    Time the given reflection function.
+    :param reflect: The function that reflects the schema.
+    :param repeat: The number of times to run the function.
+    :return: The best run time in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reflect()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = os.path.join(temp_dir, "schema.db")
+        create_database(database, args.tables, args.columns)
+
+        bulk_connector = SQLiteConnector(database=database)
+        inspector_connector = SQLiteConnector(database=database)
+        inspector_connector.schema_query = None
+
+        assert (
+            bulk_connector.refresh_schema() == inspector_connector.refresh_schema()
+        ), "The bulk and inspector reflections returned different schemas."
+
+        inspector_time = time_reflection(
+            inspector_connector.refresh_schema, args.repeat
+        )
+        bulk_time = time_reflection(bulk_connector.refresh_schema, args.repeat)
+
+    print(f"Tables: {args.tables}, columns per table: {args.columns}")
+    print(f"Inspector reflection: {inspector_time * 1000:.1f} ms")
+    print(f"Bulk reflection:      {bulk_time * 1000:.1f} ms")
+    print(f"Speedup:              {inspector_time / bulk_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
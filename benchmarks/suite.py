@@ -0,0 +1,235 @@
+"""
+Measures the overhead of the library offline, by replaying recorded answers with the
+ReplayConnector instead of calling an LLM.
+Schema reflection, prompt building, query() and query_df() are benchmarked against
+synthetic SQLite databases of increasing schema and row size, and against
+tests/data/chinook.db. The throughput and the p50/p95/p99 latencies are reported, and
+can be saved as a baseline and compared against it to catch regressions.
+
+Usage: python -m benchmarks.suite --sizes small,medium --output results.json
+       python -m benchmarks.suite --baseline results.json --tolerance 0.25
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.instrumentation import Histogram
+from ai_text_to_sql.llm_connectors.replay_connector import ReplayConnector
+
+# The number of tables, the number of columns per table and the number of rows of
+# the fact table of each synthetic database.
+SIZES: Dict[str, Tuple[int, int, int]] = {
+    "small": (10, 8, 1000),
+    "medium": (200, 12, 20000),
+    "large": (2000, 12, 200000),
+}
+
+CHINOOK_DATABASE = "tests/data/chinook.db"
+CHINOOK_RECORDINGS = os.path.join(
+    os.path.dirname(__file__), "recordings", "chinook.json"
+)
+
+SYNTHETIC_ANSWERS = {
+    "How many rows are in table 0?": "SELECT COUNT(*) AS row_count FROM table_0",
+    "Show the first 100 rows of table 0": "SELECT * FROM table_0 LIMIT 100",
+    "What is the average of column 1 per column 3 in table 0?": (
+        "SELECT column_3, AVG(column_1) AS average FROM table_0 GROUP BY column_3"
+    ),
+    "Show all rows of table 0": "SELECT * FROM table_0",
+}
+
+BENCHMARKS = ("schema_reflection", "prompt_building", "query", "query_df")
+
+
+def create_database(path: str, tables: int, columns: int, rows: int) -> None:
+    """
+    Create a synthetic SQLite database. The first table is a fact table holding all
+    the rows; the other tables only contribute to the size of the schema.
+    :param path: The path of the database file.
+    :param tables: The number of tables to create.
+    :param columns: The number of columns per table.
+    :param rows: The number of rows of the fact table.
+    """
+    with sqlite3.connect(path) as conn:
+        for table in range(tables):
+            column_definitions = ", ".join(
+                f"column_{column} {'INTEGER' if column % 2 else 'TEXT'}"
+                for column in range(columns)
+            )
+            conn.execute(f"CREATE TABLE table_{table} ({column_definitions})")
+
+        placeholders = ", ".join("?" for _ in range(columns))
+        conn.executemany(
+            f"INSERT INTO table_0 VALUES ({placeholders})",
+            (
+                tuple(
+                    row % 97 if column % 2 else f"value_{row % 1000}"
+                    for column in range(columns)
+                )
+                for row in range(rows)
+            ),
+        )
+
+
+def measure(function: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """
+    Measure the latency of the given function.
+    :param function: The function to measure.
+    :param iterations: The number of times to run the function, after one warm-up run.
+    :return: A dictionary with the throughput in operations per second and the p50,
+             p95 and p99 latencies in milliseconds.
+    """
+    function()
+    histogram = Histogram((), max_samples=iterations)
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        histogram.observe(time.perf_counter() - start)
+
+    return {
+        "throughput": histogram.count / histogram.sum if histogram.sum else 0.0,
+        "p50_ms": (histogram.percentile(50) or 0.0) * 1000,
+        "p95_ms": (histogram.percentile(95) or 0.0) * 1000,
+        "p99_ms": (histogram.percentile(99) or 0.0) * 1000,
+    }
+
+
+def run_benchmarks(
+    database: str, answers: Dict[str, str], iterations: int
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run the benchmarks against a database.
+    :param database: The path of the SQLite database file.
+    :param answers: The recorded answers to replay.
+    :param iterations: The number of iterations of each benchmark.
+    :return: A dictionary mapping each benchmark to its measurements.
+    """
+    connector = SQLiteConnector(database=database)
+    text_to_sql = TextToSQL(connector, ReplayConnector(answers))
+    questions = itertools.cycle(answers)
+
+    results = {"schema_reflection": measure(connector.refresh_schema, iterations)}
+    connector.get_database_schema()
+    results["prompt_building"] = measure(
+        lambda: text_to_sql.create_prompt(next(questions)), iterations
+    )
+    results["query"] = measure(lambda: text_to_sql.query(next(questions)), iterations)
+    results["query_df"] = measure(
+        lambda: text_to_sql.query_df(next(questions)), iterations
+    )
+    return results
+
+
+def find_regressions(
+    results: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    tolerance: float,
+    min_delta_ms: float,
+) -> List[str]:
+    """
+    Compare the results against a baseline.
+    :param results: The results of the benchmarks, by database and benchmark.
+    :param baseline: The baseline results, in the same format.
+    :param tolerance: The relative increase of the p50 latency that is tolerated.
+    :param min_delta_ms: The absolute increase of the p50 latency, in milliseconds,
+                         below which changes are considered noise.
+    :return: A description of each benchmark whose p50 latency regressed.
+    """
+    regressions = []
+    for database, benchmarks in results.items():
+        for benchmark, measurements in benchmarks.items():
+            reference = baseline.get(database, {}).get(benchmark)
+            if reference is None or not reference["p50_ms"]:
+                continue
+            change = measurements["p50_ms"] / reference["p50_ms"] - 1
+            delta = measurements["p50_ms"] - reference["p50_ms"]
+            if change > tolerance and delta > min_delta_ms:
+                regressions.append(
+                    f"{database}/{benchmark}: p50 {reference['p50_ms']:.2f} ms -> "
+                    f"{measurements['p50_ms']:.2f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def print_results(results: Dict[str, Dict]) -> None:
+    """
+    Print the results of the benchmarks as a table.
+    :param results: The results of the benchmarks, by database and benchmark.
+    """
+    print(
+        f"{'database':<10} {'benchmark':<18} {'ops/s':>10} "
+        f"{'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+    )
+    for database, benchmarks in results.items():
+        for benchmark in BENCHMARKS:
+            measurements = benchmarks[benchmark]
+            print(
+                f"{database:<10} {benchmark:<18} {measurements['throughput']:>10.1f} "
+                f"{measurements['p50_ms']:>10.2f} {measurements['p95_ms']:>10.2f} "
+                f"{measurements['p99_ms']:>10.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default="small,medium,large")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against the results in this file.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    parser.add_argument(
+        "--log", action="store_true", help="Keep the INFO logs of the pipeline."
+    )
+    args = parser.parse_args()
+
+    if not args.log:
+        # The pipeline logs every prompt, which would dominate the measurements.
+        logging.getLogger().setLevel(logging.WARNING)
+
+    results: Dict[str, Dict] = {}
+    with open(CHINOOK_RECORDINGS, "r") as f:
+        results["chinook"] = run_benchmarks(
+            CHINOOK_DATABASE, json.load(f), args.iterations
+        )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes.split(","):
+            tables, columns, rows = SIZES[size]
+            database = os.path.join(temp_dir, f"{size}.db")
+            create_database(database, tables, columns, rows)
+            results[size] = run_benchmarks(database, SYNTHETIC_ANSWERS, args.iterations)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = find_regressions(
+                results, json.load(f), args.tolerance, args.min_delta_ms
+            )
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from typing import Dict, List, Optional, Text, Tuple, Union
+
+from ai_text_to_sql.llm_connectors.llm_connector import LLMConnector
+
+
+class FakeLLMConnector(LLMConnector):
+    """
+    An LLM connector that returns predefined answers and records the prompts it
+    receives, for testing without calling an LLM. The token usage is approximated by
+    counting words.
+    """
+
+    name = "Fake"
+
+    def __init__(self, answers: Dict[Text, Text]) -> None:
+        self.answers = answers
+        self.prompts: List[Text] = []
+
+    def format_database_schema(
+        self, database_schema: Dict, connector_name: Text
+    ) -> Text:
+        return "\n".join(
+            f"# {table_name} ({', '.join(columns)})"
+            for table_name, columns in database_schema.items()
+        )
+
+    def create_prompt(
+        self,
+        user_input: Text,
+        database_schema: Dict,
+        connector_name: Text,
+        examples: Optional[List[Tuple[Text, Text]]] = None,
+    ) -> Text:
+        return (
+            self.format_database_schema(database_schema, connector_name)
+            + "\n"
+            + self.format_examples(examples)
+            + user_input
+        )
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        if messages:
+            prompt = messages[-1]["content"]
+        self.prompts.append(prompt or "")
+        question = (prompt or "").splitlines()[-1]
+        answer = self.answers[question]
+        prompt_tokens = len((prompt or "").split())
+        completion_tokens = len(answer.split())
+        self.set_last_usage(
+            {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+        )
+        return answer
+
+    def to_langchain(self) -> None:  # type: ignore[override]
+        raise NotImplementedError
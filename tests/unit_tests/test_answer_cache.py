@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.answer_cache import (
+    InMemoryAnswerCache,
+    SQLiteAnswerCache,
+    TieredAnswerCache,
+    create_cache_key,
+    normalize_question,
+)
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+from .fake_llm_connector import FakeLLMConnector
+
+
+class TestAnswerCaches(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "answers.db")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_normalize_question(self) -> None:
+        self.assertEqual(
+            normalize_question("  How many   Genres are there? "),
+            "how many genres are there",
+        )
+        self.assertEqual(
+            create_cache_key("List genres", {"model": "a"}, "schema"),
+            create_cache_key("list  genres.", {"model": "a"}, "schema"),
+        )
+        self.assertNotEqual(
+            create_cache_key("List genres", {"model": "a"}, "schema"),
+            create_cache_key("List genres", {"model": "b"}, "schema"),
+        )
+
+    def test_in_memory_cache_eviction(self) -> None:
+        cache = InMemoryAnswerCache(max_entries=2)
+        cache.set("a", "SELECT 1")
+        cache.set("b", "SELECT 2")
+        cache.get("a")
+        cache.set("c", "SELECT 3")
+
+        self.assertEqual(cache.get("a"), "SELECT 1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_in_memory_cache_ttl(self) -> None:
+        cache = InMemoryAnswerCache(ttl=0)
+        cache.set("a", "SELECT 1")
+        self.assertIsNone(cache.get("a"))
+
+    def test_sqlite_cache_persistence_and_eviction(self) -> None:
+        cache = SQLiteAnswerCache(self.path, max_entries=2)
+        cache.set("a", "SELECT 1")
+        cache.set("b", "SELECT 2")
+        cache.set("c", "SELECT 3")
+        cache.close()
+
+        cache = SQLiteAnswerCache(self.path, max_entries=2)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "SELECT 3")
+        cache.close()
+
+    def test_tiered_cache(self) -> None:
+        memory_cache = InMemoryAnswerCache()
+        disk_cache = SQLiteAnswerCache(self.path)
+        disk_cache.set("a", "SELECT 1")
+
+        cache = TieredAnswerCache(memory_cache, disk_cache)
+        self.assertEqual(cache.get("a"), "SELECT 1")
+        self.assertEqual(memory_cache.get("a"), "SELECT 1")
+        disk_cache.close()
+
+
+class TestTextToSQLAnswerCache(unittest.TestCase):
+    def test_repeated_questions_use_cache(self) -> None:
+        llm_connector = FakeLLMConnector(
+            {"How many genres are there?": "SELECT COUNT(*) FROM genres"}
+        )
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            llm_connector,
+            answer_cache=InMemoryAnswerCache(),
+        )
+
+        for question in ["How many genres are there?", "how many genres are there"]:
+            self.assertEqual(
+                tts.convert_text_to_sql(question), "SELECT COUNT(*) FROM genres"
+            )
+        self.assertEqual(len(llm_connector.prompts), 1)
@@ -0,0 +1,49 @@
+import asyncio
+import importlib.util
+import unittest
+
+from ai_text_to_sql import AsyncTextToSQL, AsyncTextToSQLChat
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTION = "Get me a list of 5 distinct genres."
+SQL = "SELECT DISTINCT Name FROM genres LIMIT 5"
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("aiosqlite"), "The aiosqlite package is not installed."
+)
+class TestAsyncTextToSQL(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.data_connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.llm_connector = FakeLLMConnector({QUESTION: SQL})
+
+    async def asyncTearDown(self) -> None:
+        await self.data_connector.aclose()
+
+    async def test_query(self) -> None:
+        tts = AsyncTextToSQL(self.data_connector, self.llm_connector, max_tables=2)
+
+        results = await asyncio.gather(*(tts.query(QUESTION) for _ in range(10)))
+        for genres in results:
+            self.assertEqual(
+                [genre[0] for genre in genres],
+                ["Rock", "Jazz", "Metal", "Alternative & Punk", "Rock And Roll"],
+            )
+
+    async def test_query_df(self) -> None:
+        tts = AsyncTextToSQL(self.data_connector, self.llm_connector)
+        df = await tts.query_df(QUESTION)
+        self.assertEqual(list(df.columns), ["Name"])
+        self.assertEqual(len(df), 5)
+
+    async def test_chat(self) -> None:
+        tts = AsyncTextToSQLChat(self.data_connector, self.llm_connector)
+        # The schema is not reflected until the first message.
+        self.assertIsNone(self.data_connector._database_schema)
+
+        self.assertEqual(await tts.convert_text_to_sql(QUESTION), SQL)
+        messages = tts.memory.get_messages()
+        self.assertIn("genres", messages[0]["content"])
+        self.assertEqual(messages[-1]["content"], SQL)
@@ -0,0 +1,29 @@
+import importlib.util
+import unittest
+
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("langchain_community"),
+    "The langchain-community package is not installed.",
+)
+class TestCachedSQLDatabase(unittest.TestCase):
+    def setUp(self) -> None:
+        from ai_text_to_sql.cached_sql_database import CachedSQLDatabase
+
+        self.data_connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.db = CachedSQLDatabase(self.data_connector, sample_rows_in_table_info=2)
+
+    def test_reuses_engine_and_schema(self) -> None:
+        self.assertIs(self.db._engine, self.data_connector.connection)
+        self.assertIn("genres", self.db.get_usable_table_names())
+        self.assertEqual(self.data_connector.schema_cache_misses, 1)
+
+    def test_table_info_is_memoized(self) -> None:
+        table_info = self.db.get_table_info(["genres"])
+        self.assertIn("CREATE TABLE genres", table_info)
+        self.assertIs(self.db.get_table_info(["genres"]), table_info)
+
+        self.data_connector.refresh_schema()
+        self.assertIsNot(self.db.get_table_info(["genres"]), table_info)
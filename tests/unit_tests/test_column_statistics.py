@@ -0,0 +1,76 @@
+import unittest
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.column_statistics import (
+    ColumnStatistics,
+    describe_column,
+    estimate_column_statistics,
+)
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+
+from .fake_llm_connector import FakeLLMConnector
+
+
+class TestColumnStatistics(unittest.TestCase):
+    def test_estimate_column_statistics(self) -> None:
+        values = ["Rock", "Rock", "Rock", "Jazz", "Jazz", "Blues", None, None]
+        statistics = estimate_column_statistics(values, column_type="TEXT")
+        self.assertEqual(statistics.distinct_values, 3)
+        self.assertEqual(statistics.null_fraction, 0.25)
+        self.assertEqual(statistics.frequent_values, ["Rock", "Jazz"])
+
+        # A sample without repeated values is extrapolated to a unique column.
+        statistics = estimate_column_statistics(list(range(100)), row_count=5000)
+        self.assertAlmostEqual(statistics.distinct_values or 0, 5000)
+        self.assertEqual(statistics.frequent_values, [])
+
+    def test_describe_column(self) -> None:
+        statistics = ColumnStatistics(
+            type="TEXT", distinct_values=24.4, null_fraction=0.1, frequent_values=["O'"]
+        )
+        self.assertEqual(
+            describe_column("Country", statistics),
+            "Country TEXT [~24 distinct; 10% null; e.g. 'O''']",
+        )
+
+    def test_data_connector(self) -> None:
+        connector = SQLiteConnector(
+            database="tests/data/chinook.db", statistics_time_budget=10
+        )
+        connector.get_database_schema()
+        assert connector._statistics_thread is not None
+        connector._statistics_thread.join(10)
+
+        statistics = connector.get_column_statistics()
+        genre_name = statistics["genres"]["Name"]
+        self.assertEqual(genre_name.type, "NVARCHAR(120)")
+        self.assertEqual(genre_name.distinct_values, 25)
+        self.assertEqual(
+            statistics["invoices"]["BillingCountry"].frequent_values[0], "USA"
+        )
+        # Large tables are sampled rather than read in full.
+        track_id = statistics["tracks"]["TrackId"]
+        self.assertEqual(track_id.sampled_rows, connector.statistics_sample_rows)
+        self.assertAlmostEqual(track_id.distinct_values or 0, 3503)
+
+        connector.invalidate_schema()
+        self.assertEqual(connector.get_column_statistics(), {})
+
+    def test_prompt_schema(self) -> None:
+        connector = SQLiteConnector(
+            database="tests/data/chinook.db", statistics_time_budget=10
+        )
+        text_to_sql = TextToSQL(connector, FakeLLMConnector({}))
+        text_to_sql.get_database_schema("List the genres")
+        assert connector._statistics_thread is not None
+        connector._statistics_thread.join(10)
+
+        database_schema = text_to_sql.get_database_schema("List the genres")
+        self.assertIn(
+            "BillingCountry NVARCHAR(40) [~24 distinct; e.g. 'USA'",
+            " ".join(database_schema["invoices"]),
+        )
+        # The annotated schema is reused until the statistics change.
+        self.assertIs(
+            text_to_sql.get_database_schema("List the genres"), database_schema
+        )
@@ -0,0 +1,114 @@
+import sqlite3
+import tempfile
+import unittest
+import warnings
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.cost_guard import QueryCostGuard
+from ai_text_to_sql.data_connectors.data_connector import QueryPlan
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.exceptions import QueryCostExceededException, QueryCostWarning
+from ai_text_to_sql.instrumentation import HistogramCollector
+
+from .fake_llm_connector import FakeLLMConnector
+
+CARTESIAN_QUESTION = "Pair every track with every invoice."
+CARTESIAN_SQL = "SELECT t.Name, i.Total FROM tracks t, invoices i"
+LOOKUP_QUESTION = "What is the name of track 1?"
+LOOKUP_SQL = "SELECT Name FROM tracks WHERE TrackId = 1"
+
+ANSWERS = {CARTESIAN_QUESTION: CARTESIAN_SQL, LOOKUP_QUESTION: LOOKUP_SQL}
+
+
+class TestExplain(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data_connector = SQLiteConnector(database="tests/data/chinook.db")
+
+    def test_explain_full_scans(self) -> None:
+        query_plan = self.data_connector.explain(CARTESIAN_SQL)
+
+        self.assertEqual(sorted(query_plan.full_scans), ["invoices", "tracks"])
+        self.assertGreater(query_plan.estimated_rows or 0, 1000000)
+
+    def test_explain_index_lookup(self) -> None:
+        query_plan = self.data_connector.explain(LOOKUP_SQL)
+
+        self.assertEqual(query_plan.full_scans, [])
+        self.assertIsNone(query_plan.estimated_rows)
+
+    def test_limit_query(self) -> None:
+        sql = self.data_connector.limit_query(CARTESIAN_SQL, 5)
+
+        self.assertEqual(len(self.data_connector.query(sql)), 5)
+
+    def test_estimate_row_count_quotes_table_name(self) -> None:
+        table_name = 'odd "table"'
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = f"{temp_dir}/test.db"
+            with sqlite3.connect(database) as conn:
+                conn.execute('CREATE TABLE "odd ""table""" (Id INTEGER)')
+                conn.executemany(
+                    'INSERT INTO "odd ""table""" VALUES (?)', [(1,), (2,), (3,)]
+                )
+            data_connector = SQLiteConnector(database=database)
+            with data_connector.connection.connect() as conn:
+                self.assertEqual(data_connector.estimate_row_count(conn, table_name), 3)
+            data_connector.connection.dispose()
+
+
+class TestQueryCostGuard(unittest.TestCase):
+    def create_text_to_sql(self, cost_guard: QueryCostGuard) -> TextToSQL:
+        return TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            FakeLLMConnector(ANSWERS),
+            cost_guard=cost_guard,
+        )
+
+    def test_get_violations(self) -> None:
+        cost_guard = QueryCostGuard(max_rows=100, max_cost=10.0, max_full_scans=0)
+        query_plan = QueryPlan(
+            estimated_rows=1000, estimated_cost=5.0, full_scans=["tracks"]
+        )
+
+        violations = cost_guard.get_violations(query_plan)
+        self.assertEqual(len(violations), 2)
+        self.assertIn("1000 estimated rows", violations[0])
+        self.assertIn("tracks", violations[1])
+
+    def test_invalid_action(self) -> None:
+        with self.assertRaises(ValueError):
+            QueryCostGuard(action="ignore")
+
+    def test_reject(self) -> None:
+        tts = self.create_text_to_sql(QueryCostGuard(max_rows=100000))
+
+        with self.assertRaises(QueryCostExceededException):
+            tts.query(CARTESIAN_QUESTION)
+        self.assertEqual(
+            tts.query(LOOKUP_QUESTION), [("For Those About To Rock (We Salute You)",)]
+        )
+
+    def test_limit(self) -> None:
+        collector = HistogramCollector()
+        tts = self.create_text_to_sql(
+            QueryCostGuard(max_full_scans=1, action="limit", limit=10)
+        )
+        tts.instrumentation = collector
+
+        self.assertEqual(len(tts.query(CARTESIAN_QUESTION)), 10)
+        self.assertEqual(len(tts.query_df(CARTESIAN_QUESTION)), 10)
+        histogram = collector.get_histogram("cost_guard")
+        assert histogram is not None
+        self.assertEqual(histogram.count, 2)
+
+    def test_warn(self) -> None:
+        tts = self.create_text_to_sql(QueryCostGuard(max_full_scans=1, action="warn"))
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            df = next(tts.query_df_chunks(CARTESIAN_QUESTION, chunksize=100))
+
+        self.assertEqual(len(df), 100)
+        self.assertTrue(
+            any(issubclass(warning.category, QueryCostWarning) for warning in caught)
+        )
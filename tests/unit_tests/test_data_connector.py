@@ -0,0 +1,157 @@
+import asyncio
+import copy
+import json
+import sqlite3
+import tempfile
+import unittest
+
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.exceptions import QueryTimeoutException, RowLimitExceededException
+
+SLOW_QUERY = "SELECT COUNT(*) FROM tracks AS a, tracks AS b, tracks AS c"
+
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = f"{self.temp_dir.name}/test.db"
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("CREATE TABLE artists (ArtistId INTEGER, Name TEXT)")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def add_table(self) -> None:
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("CREATE TABLE albums (AlbumId INTEGER, Title TEXT)")
+
+    def test_schema_is_cached(self) -> None:
+        connector = SQLiteConnector(database=self.database)
+        schema = connector.get_database_schema()
+        self.assertEqual(schema, {"artists": ("ArtistId", "Name")})
+
+        self.add_table()
+        self.assertIs(connector.get_database_schema(), schema)
+        self.assertEqual(connector.schema_cache_hits, 1)
+        self.assertEqual(connector.schema_cache_misses, 1)
+
+    def test_schema_is_read_only(self) -> None:
+        connector = SQLiteConnector(database=self.database)
+        schema = connector.get_database_schema()
+        with self.assertRaises(TypeError):
+            schema["albums"] = ("AlbumId", "Title")
+        with self.assertRaises(TypeError):
+            schema.pop("artists")
+
+        # Copies can be modified without affecting the snapshot.
+        schema_copy = copy.deepcopy(schema)
+        self.assertEqual(schema_copy, schema)
+        modifiable_schema = dict(schema)
+        modifiable_schema["albums"] = ("AlbumId", "Title")
+        self.assertNotIn("albums", connector.get_database_schema())
+        self.assertEqual(
+            json.loads(json.dumps(schema)), {"artists": ["ArtistId", "Name"]}
+        )
+
+    def test_refresh_and_invalidate_schema(self) -> None:
+        connector = SQLiteConnector(database=self.database)
+        connector.get_database_schema()
+
+        self.add_table()
+        self.assertIn("albums", connector.refresh_schema())
+
+        connector.invalidate_schema()
+        self.assertIsNone(connector.get_schema_cache_info()["age"])
+        connector.get_database_schema()
+        self.assertEqual(connector.schema_cache_misses, 2)
+
+    def test_schema_cache_ttl(self) -> None:
+        connector = SQLiteConnector(database=self.database, schema_cache_ttl=0)
+        connector.get_database_schema()
+
+        self.add_table()
+        self.assertIn("albums", connector.get_database_schema())
+        self.assertEqual(connector.schema_cache_hits, 0)
+        self.assertEqual(connector.schema_cache_misses, 2)
+
+    def test_schema_fingerprint(self) -> None:
+        connector = SQLiteConnector(database=self.database, schema_cache_ttl=0)
+        schema = connector.get_database_schema()
+        fingerprint = connector.schema_fingerprint()
+        self.assertEqual(connector.get_schema_cache_info()["fingerprint"], fingerprint)
+
+        # An expired snapshot is served as long as the schema has not changed.
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("INSERT INTO artists VALUES (1, 'AC/DC')")
+        self.assertEqual(connector.schema_fingerprint(), fingerprint)
+        self.assertIs(connector.get_database_schema(), schema)
+        self.assertEqual(connector.schema_cache_hits, 1)
+
+        self.add_table()
+        self.assertNotEqual(connector.schema_fingerprint(), fingerprint)
+        self.assertIn("albums", connector.get_database_schema())
+        self.assertEqual(connector.schema_cache_misses, 2)
+
+
+class TestSchemaReflection(unittest.TestCase):
+    def test_bulk_reflection_matches_inspector(self) -> None:
+        bulk_connector = SQLiteConnector(database="tests/data/chinook.db")
+        inspector_connector = SQLiteConnector(database="tests/data/chinook.db")
+        inspector_connector.schema_query = None
+
+        self.assertEqual(
+            bulk_connector.reflect_database_schema(),
+            inspector_connector.reflect_database_schema(),
+        )
+
+    def test_column_types(self) -> None:
+        connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.assertEqual(
+            connector.get_column_types()["genres"]["Name"], "NVARCHAR(120)"
+        )
+
+
+class TestQueryLimits(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connector = SQLiteConnector(
+            database="tests/data/chinook.db", timeout=0.1, max_rows=100
+        )
+
+    def test_timeout(self) -> None:
+        with self.assertRaisesRegex(QueryTimeoutException, "timeout of 0.1 seconds"):
+            self.connector.query(SLOW_QUERY)
+        with self.assertRaises(QueryTimeoutException):
+            self.connector.query_records(SLOW_QUERY, timeout=0.05)
+
+        # The connection is returned to the pool without the timeout.
+        self.connector.timeout = None
+        self.assertEqual(self.connector.query("SELECT COUNT(*) FROM genres"), [(25,)])
+
+    def test_max_rows(self) -> None:
+        with self.assertRaisesRegex(RowLimitExceededException, "maximum of 100 rows"):
+            self.connector.query("SELECT * FROM tracks")
+        with self.assertRaises(RowLimitExceededException):
+            self.connector.query_records("SELECT * FROM tracks", batch_size=30)
+
+        self.assertEqual(len(self.connector.query("SELECT * FROM genres")), 25)
+        rows = self.connector.query("SELECT * FROM tracks", max_rows=5000)
+        self.assertEqual(len(rows), 3503)
+
+    def test_query_iter_max_rows(self) -> None:
+        batches = []
+        with self.assertRaises(RowLimitExceededException):
+            for batch in self.connector.query_iter("SELECT * FROM tracks", 40):
+                batches.append(batch)
+        self.assertEqual([len(batch) for batch in batches], [40, 40])
+
+    def test_async_limits(self) -> None:
+        async def run() -> None:
+            try:
+                with self.assertRaises(QueryTimeoutException):
+                    await self.connector.aquery(SLOW_QUERY)
+                with self.assertRaises(RowLimitExceededException):
+                    await self.connector.aquery_records("SELECT * FROM tracks")
+            finally:
+                await self.connector.aclose()
+
+        asyncio.run(run())
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.example_store import ExampleStore
+
+from .fake_llm_connector import FakeLLMConnector
+
+COUNT_SQL = "SELECT COUNT(*) FROM genres"
+LIST_SQL = "SELECT Name FROM genres"
+
+
+class TestExampleStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = ExampleStore()
+        self.store.add("How many genres are there?", COUNT_SQL)
+        self.store.add("List the names of the genres", LIST_SQL)
+        self.store.add("How many invoices were issued in 2023?", "SELECT 2023")
+
+    def test_search(self) -> None:
+        examples = self.store.search("how many genres are in the store")
+        self.assertEqual(examples[0].sql, COUNT_SQL)
+        self.assertGreater(examples[0].similarity, examples[1].similarity)
+
+        self.assertEqual(
+            self.store.search("How many genres are there", 1)[0].sql, COUNT_SQL
+        )
+        self.assertEqual(self.store.search("zzz"), [])
+
+    def test_find_match(self) -> None:
+        match = self.store.find_match("How many genres are there")
+        assert match is not None
+        self.assertEqual(match.sql, COUNT_SQL)
+        self.assertIsNone(self.store.find_match("How many tracks are there?"))
+        # Questions that differ by a number do not share their SQL query.
+        self.assertIsNone(
+            self.store.find_match("How many invoices were issued in 2022?")
+        )
+
+    def test_incremental_updates(self) -> None:
+        # Enough examples are added for the index to be rebuilt along the way.
+        for index in range(200):
+            self.store.add(f"Show the track number {index}", f"SELECT {index}")
+        self.assertEqual(len(self.store), 203)
+        self.assertFalse(self.store.add("Show the track number 7", "SELECT 7"))
+        self.assertEqual(
+            self.store.search("show the track number 150", 1)[0].sql, "SELECT 150"
+        )
+        self.assertEqual(
+            self.store.search("how many genres are there", 1)[0].sql, COUNT_SQL
+        )
+
+        self.assertTrue(self.store.add("Show the track number 7", "SELECT 'seven'"))
+        self.assertEqual(len(self.store), 203)
+        self.assertEqual(
+            self.store.search("show the track number 7", 1)[0].sql, "SELECT 'seven'"
+        )
+
+    def test_persistence(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "examples.jsonl")
+            ExampleStore(path).add("How many genres are there?", COUNT_SQL)
+
+            match = ExampleStore(path).find_match("how many genres are there")
+            assert match is not None
+            self.assertEqual(match.sql, COUNT_SQL)
+
+    def test_text_to_sql(self) -> None:
+        llm_connector = FakeLLMConnector({"How many genres are there?": COUNT_SQL})
+        text_to_sql = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            llm_connector,
+            example_store=ExampleStore(),
+        )
+
+        self.assertEqual(text_to_sql.query("How many genres are there?"), [(25,)])
+        self.assertEqual(len(llm_connector.prompts), 1)
+        # A paraphrase of an answered question reuses its SQL query.
+        self.assertEqual(
+            text_to_sql.convert_text_to_sql("how many genres are there"), COUNT_SQL
+        )
+        self.assertEqual(len(llm_connector.prompts), 1)
+
+        # Other questions include the most similar answered questions in the prompt.
+        llm_connector.answers["How many albums are there?"] = (
+            "SELECT COUNT(*) FROM albums"
+        )
+        text_to_sql.convert_text_to_sql("How many albums are there?")
+        self.assertIn(
+            f"# How many genres are there?\n{COUNT_SQL}\n", llm_connector.prompts[-1]
+        )
+
+    def test_connector_without_examples(self) -> None:
+        class LegacyLLMConnector(FakeLLMConnector):
+            def create_prompt(  # type: ignore[override]
+                self, user_input: str, database_schema: dict, connector_name: str
+            ) -> str:
+                return super().create_prompt(
+                    user_input, database_schema, connector_name
+                )
+
+        llm_connector = LegacyLLMConnector(
+            {"How many albums are there?": "SELECT COUNT(*) FROM albums"}
+        )
+        for token_budget in (None, 2000):
+            text_to_sql = TextToSQL(
+                SQLiteConnector(database="tests/data/chinook.db"),
+                llm_connector,
+                token_budget=token_budget,
+                example_store=self.store,
+            )
+            # Connectors that do not accept examples get prompts without them.
+            self.assertEqual(text_to_sql.query("How many albums are there?"), [(347,)])
+            self.assertNotIn(COUNT_SQL, llm_connector.prompts[-1])
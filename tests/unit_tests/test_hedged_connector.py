@@ -0,0 +1,168 @@
+import asyncio
+import time
+import unittest
+from typing import Dict, List, Text, Union
+
+from ai_text_to_sql import AsyncTextToSQL, TextToSQL
+from ai_text_to_sql.candidate_selector import CandidateSelector
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.llm_connectors.hedged_connector import HedgedConnector
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTION = "How many genres are there?"
+
+
+class SlowFirstConnector(FakeLLMConnector):
+    """
+    A fake LLM connector whose first call is slow, and whose candidates are
+    returned in a fixed order.
+    """
+
+    def __init__(self, answers: Dict[Text, Text], latency: float) -> None:
+        super().__init__(answers)
+        self.latency = latency
+        self.calls = 0
+        self.cancelled = 0
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(self.latency)
+        return super().get_answer(prompt, messages)
+
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency if self.calls == 1 else 0)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return super().get_answer(prompt, messages)
+
+    def get_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        return [
+            "SELECT COUNT(*) FROM genre",
+            "SELECT COUNT(*) FROM genres",
+            "SELECT 1",
+        ][:n]
+
+    async def aget_answers(
+        self,
+        prompt: Union[Text, None] = None,
+        messages: Union[List[Dict], None] = None,
+        n: int = 1,
+    ) -> List[Text]:
+        return self.get_answers(prompt, messages, n)
+
+
+class UsageOnceConnector(FakeLLMConnector):
+    """
+    A fake LLM connector that only reports the usage of its first call.
+    """
+
+    def __init__(self, answers: Dict[Text, Text]) -> None:
+        super().__init__(answers)
+        self.calls = 0
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        self.calls += 1
+        if self.calls == 1:
+            return super().get_answer(prompt, messages)
+        return self.answers[prompt or ""]
+
+
+class TestHedgedConnector(unittest.TestCase):
+    def test_hedge_wins(self) -> None:
+        llm_connector = SlowFirstConnector({QUESTION: "SELECT 1"}, latency=0.5)
+        hedged_connector = HedgedConnector(llm_connector, delay=0.05)
+
+        start = time.perf_counter()
+        self.assertEqual(hedged_connector.get_answer(QUESTION), "SELECT 1")
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(
+            (hedged_connector.hedged_requests, hedged_connector.hedge_wins), (1, 1)
+        )
+        self.assertIsNotNone(hedged_connector.get_last_usage())
+
+        # Only the winning latency is observed, from the original request.
+        self.assertEqual(hedged_connector._latencies.count, 1)
+        self.assertGreaterEqual(hedged_connector._latencies.percentile(100) or 0, 0.05)
+
+    def test_async_hedge_cancels_loser(self) -> None:
+        llm_connector = SlowFirstConnector({QUESTION: "SELECT 1"}, latency=5)
+        hedged_connector = HedgedConnector(llm_connector, delay=0.05)
+
+        async def run() -> Text:
+            answer = await hedged_connector.aget_answer(QUESTION)
+            await asyncio.sleep(0)
+            return answer
+
+        self.assertEqual(asyncio.run(run()), "SELECT 1")
+        self.assertEqual(llm_connector.cancelled, 1)
+
+    def test_percentile_delay(self) -> None:
+        llm_connector = FakeLLMConnector({QUESTION: "SELECT 1"})
+        hedged_connector = HedgedConnector(
+            llm_connector, initial_delay=1.5, min_samples=5
+        )
+        self.assertEqual(hedged_connector.get_hedge_delay(), 1.5)
+
+        for _ in range(5):
+            hedged_connector.get_answer(QUESTION)
+        self.assertLess(hedged_connector.get_hedge_delay(), 0.1)
+        self.assertEqual(hedged_connector.hedged_requests, 0)
+
+    def test_usage_is_not_carried_over(self) -> None:
+        llm_connector = UsageOnceConnector({QUESTION: "SELECT 1"})
+        hedged_connector = HedgedConnector(llm_connector, max_workers=1)
+        hedged_connector.get_answer(QUESTION)
+        self.assertIsNotNone(hedged_connector.get_last_usage())
+
+        # The second request reports no usage, although it is sent from the same
+        # worker thread as the first.
+        hedged_connector.get_answer(QUESTION)
+        self.assertIsNone(hedged_connector.get_last_usage())
+
+    def test_close(self) -> None:
+        hedged_connector = HedgedConnector(FakeLLMConnector({QUESTION: "SELECT 1"}))
+        hedged_connector.get_answer(QUESTION)
+        hedged_connector.close()
+        with self.assertRaises(RuntimeError):
+            hedged_connector.get_answer(QUESTION)
+
+
+class TestCandidateSelection(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data_connector = SQLiteConnector(database="tests/data/chinook.db")
+
+    def test_select(self) -> None:
+        selector = CandidateSelector()
+        self.assertEqual(
+            selector.select(
+                self.data_connector, ["SELECT * FROM genre", "SELECT * FROM genres"]
+            ),
+            "SELECT * FROM genres",
+        )
+        self.assertEqual(
+            selector.select(self.data_connector, ["SELECT x", "SELECT y"]), "SELECT x"
+        )
+
+    def test_text_to_sql_candidates(self) -> None:
+        llm_connector = SlowFirstConnector({}, latency=0)
+        tts = TextToSQL(self.data_connector, llm_connector, candidates=3)
+        self.assertEqual(tts.query(QUESTION), [(25,)])
+
+        async_tts = AsyncTextToSQL(self.data_connector, llm_connector, candidates=2)
+        self.assertEqual(asyncio.run(async_tts.query(QUESTION)), [(25,)])
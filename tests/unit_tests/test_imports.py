@@ -0,0 +1,46 @@
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ("pandas", "numpy", "openai", "pyodbc", "psycopg2", "langchain")
+
+
+class TestImports(unittest.TestCase):
+    def get_loaded_modules(self, statement: str) -> list:
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                f"{statement}; import sys; print('\\n'.join(sys.modules))",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return [
+            module
+            for module in process.stdout.splitlines()
+            if module.split(".")[0].startswith(HEAVY_MODULES)
+        ]
+
+    def test_import_does_not_load_heavy_modules(self) -> None:
+        loaded = self.get_loaded_modules(
+            "import ai_text_to_sql; "
+            "from ai_text_to_sql import TextToSQL; "
+            "from ai_text_to_sql.data_connectors import SQLiteConnector; "
+            "SQLiteConnector(database='tests/data/chinook.db').get_database_schema()"
+        )
+        self.assertEqual(loaded, [])
+
+    def test_heavy_modules_are_loaded_on_first_use(self) -> None:
+        loaded = self.get_loaded_modules(
+            "from ai_text_to_sql.llm_connectors import OpenAIConnector"
+        )
+        self.assertIn("openai", loaded)
+
+    def test_unknown_attribute(self) -> None:
+        import ai_text_to_sql
+
+        with self.assertRaises(AttributeError):
+            ai_text_to_sql.NotAClass
+        self.assertIn("TextToSQL", dir(ai_text_to_sql))
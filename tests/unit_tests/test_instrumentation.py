@@ -0,0 +1,163 @@
+import asyncio
+import time
+import unittest
+from typing import Any, Dict, Generator, List, Text, Tuple, cast
+
+from ai_text_to_sql import AsyncTextToSQL, TextToSQL, TextToSQLChat
+from ai_text_to_sql.answer_cache import InMemoryAnswerCache
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.instrumentation import (
+    CompositeInstrumentation,
+    Histogram,
+    HistogramCollector,
+    Instrumentation,
+)
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTION = "How many genres are there?"
+SQL = "SELECT COUNT(*) AS count FROM genres"
+
+
+class SpanRecorder(Instrumentation):
+    def __init__(self) -> None:
+        self.events: List[Tuple[Text, Text]] = []
+        self.spans: List[Tuple[Text, Dict[Text, Any]]] = []
+
+    def start_span(self, name: Text, attributes: Dict[Text, Any]) -> Any:
+        self.events.append(("start", name))
+        return name
+
+    def end_span(
+        self, handle: Any, name: Text, duration: float, attributes: Dict[Text, Any]
+    ) -> None:
+        self.events.append(("end", handle))
+        self.spans.append((name, dict(attributes)))
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_and_buckets(self) -> None:
+        histogram = Histogram((0.1, 1.0), max_samples=100)
+        for value in [0.05, 0.1, 0.5, 2.0]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.percentile(50), 0.1)
+        self.assertEqual(histogram.percentile(99), 2.0)
+        summary = histogram.to_dict()
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["buckets"], {"0.1": 2, "1.0": 3, "+Inf": 4})
+
+    def test_empty(self) -> None:
+        self.assertIsNone(Histogram((1.0,), max_samples=10).percentile(50))
+
+
+class TestTextToSQLInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.llm_connector = FakeLLMConnector({QUESTION: SQL})
+        self.recorder = SpanRecorder()
+        self.collector = HistogramCollector()
+        self.text_to_sql = TextToSQL(
+            self.connector,
+            self.llm_connector,
+            answer_cache=InMemoryAnswerCache(),
+            instrumentation=CompositeInstrumentation(self.collector, self.recorder),
+        )
+
+    def test_query_stages_are_nested(self) -> None:
+        self.text_to_sql.query(QUESTION)
+
+        names = [name for event, name in self.recorder.events if event == "start"]
+        self.assertEqual(
+            names,
+            ["query", "convert_text_to_sql", "schema", "prompt", "llm", "execute"],
+        )
+        # Spans end in the reverse order they started.
+        ends = [name for event, name in self.recorder.events if event == "end"]
+        self.assertEqual(ends[-1], "query")
+        self.assertEqual(ends[-2], "execute")
+
+    def test_tokens_rows_and_cache_hits(self) -> None:
+        self.text_to_sql.query(QUESTION)
+        self.text_to_sql.query(QUESTION)
+
+        counters = self.collector.get_summary()["counters"]
+        self.assertEqual(counters["convert_text_to_sql.cache_misses"], 1)
+        self.assertEqual(counters["convert_text_to_sql.cache_hits"], 1)
+        self.assertEqual(counters["execute.rows"], 2)
+        self.assertEqual(counters["llm.completion_tokens"], len(SQL.split()))
+        self.assertGreater(counters["llm.prompt_tokens"], 0)
+
+        durations = self.collector.get_summary()["durations"]
+        self.assertEqual(durations["query"]["count"], 2)
+        self.assertEqual(durations["llm"]["count"], 1)
+        self.assertGreaterEqual(durations["query"]["sum"], durations["execute"]["sum"])
+
+    def test_query_df(self) -> None:
+        self.text_to_sql.query_df(QUESTION)
+
+        durations = self.collector.get_summary()["durations"]
+        self.assertIn("query_df", durations)
+        self.assertIn("dataframe", durations)
+        self.assertEqual(self.collector.get_summary()["counters"]["execute.rows"], 1)
+
+    def test_stream(self) -> None:
+        list(self.text_to_sql.convert_text_to_sql_stream(QUESTION))
+        list(self.text_to_sql.convert_text_to_sql_stream(QUESTION))
+
+        summary = self.collector.get_summary()
+        self.assertEqual(summary["durations"]["convert_text_to_sql"]["count"], 2)
+        self.assertEqual(summary["counters"]["convert_text_to_sql.cache_hits"], 1)
+        self.assertEqual(summary["counters"]["llm.completion_tokens"], len(SQL.split()))
+
+    def test_streams_exclude_consumer_time(self) -> None:
+        chunks = cast(Generator, self.text_to_sql.query_df_chunks(QUESTION))
+        next(chunks)
+        time.sleep(0.2)
+        # Closing the stream early is not an error.
+        chunks.close()
+
+        stream = cast(Generator, self.text_to_sql.convert_text_to_sql_stream(QUESTION))
+        next(stream)
+        time.sleep(0.2)
+        stream.close()
+
+        durations = self.collector.get_summary()["durations"]
+        for name in ("query_df", "execute", "convert_text_to_sql"):
+            self.assertLess(durations[name]["sum"], 0.2)
+        for name, attributes in self.recorder.spans:
+            self.assertNotIn("error", attributes)
+
+    def test_errors_are_recorded(self) -> None:
+        with self.assertRaises(KeyError):
+            self.text_to_sql.query("An unknown question")
+
+        spans = dict(self.recorder.spans)
+        self.assertEqual(spans["llm"]["error"], "KeyError")
+        self.assertEqual(self.collector.get_summary()["counters"]["query.errors"], 1)
+
+    def test_chat(self) -> None:
+        chat = TextToSQLChat(
+            self.connector, self.llm_connector, instrumentation=self.collector
+        )
+        chat.convert_text_to_sql(QUESTION)
+
+        summary = self.collector.get_summary()
+        self.assertEqual(summary["durations"]["chat.convert_text_to_sql"]["count"], 1)
+        self.assertIn("llm.total_tokens", summary["counters"])
+
+    def test_async_usage_is_carried_back_from_worker_thread(self) -> None:
+        async_text_to_sql = AsyncTextToSQL(
+            self.connector, self.llm_connector, instrumentation=self.collector
+        )
+        asyncio.run(async_text_to_sql.convert_text_to_sql(QUESTION))
+
+        counters = self.collector.get_summary()["counters"]
+        self.assertEqual(counters["llm.completion_tokens"], len(SQL.split()))
+
+    def test_reset(self) -> None:
+        self.text_to_sql.convert_text_to_sql(QUESTION)
+        self.collector.reset()
+        self.assertEqual(
+            self.collector.get_summary(), {"durations": {}, "counters": {}}
+        )
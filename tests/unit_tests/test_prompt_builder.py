@@ -0,0 +1,97 @@
+import unittest
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.prompt_builder import PromptBuilder, TokenCounter
+from ai_text_to_sql.text_to_sql_chat import TextToSQLChatMemory
+
+from .fake_llm_connector import FakeLLMConnector
+
+SCHEMA = {
+    "genres": ["GenreId", "Name"],
+    "tracks": ["TrackId", "Name", "AlbumId", "GenreId", "Composer", "Milliseconds"],
+    "albums": ["AlbumId", "Title", "ArtistId"],
+}
+
+
+class TestPromptBuilder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.counter = TokenCounter()
+        self.builder = PromptBuilder(FakeLLMConnector({}), 10000, self.counter)
+
+    def test_counts_are_cached(self) -> None:
+        self.counter.count("# genres (GenreId, Name)")
+        self.assertIn("# genres (GenreId, Name)", self.counter._counts)
+        self.counter.count("a one-off prompt", cache=False)
+        self.assertNotIn("a one-off prompt", self.counter._counts)
+
+    def test_table_counts_are_bounded(self) -> None:
+        builder = PromptBuilder(FakeLLMConnector({}), 10000, max_cache_size=2)
+        for table_name, columns in SCHEMA.items():
+            builder.count_table_tokens(table_name, columns, "SQLite")
+
+        # The least recently used count is evicted.
+        self.assertEqual(
+            [key[0] for key in builder._table_counts], ["tracks", "albums"]
+        )
+
+    def test_build_within_budget(self) -> None:
+        prompt, breakdown = self.builder.build("List genres", SCHEMA, "SQLite")
+
+        self.assertEqual(breakdown["tables_included"], list(SCHEMA))
+        self.assertEqual(breakdown["tables_dropped"], [])
+        self.assertEqual(breakdown["total"], self.counter.count(prompt))
+
+    def test_build_drops_lowest_priority_tables(self) -> None:
+        base_tokens = self.counter.count("\nList genres")
+        genres_tokens = self.builder.count_table_tokens(
+            "genres", SCHEMA["genres"], "SQLite"
+        )
+        truncated_tracks_tokens = self.builder.count_table_tokens(
+            "tracks", SCHEMA["tracks"][:2], "SQLite"
+        )
+        self.builder.token_budget = (
+            base_tokens + genres_tokens + truncated_tracks_tokens + 2
+        )
+
+        prompt, breakdown = self.builder.build("List genres", SCHEMA, "SQLite")
+
+        self.assertLessEqual(breakdown["total"], self.builder.token_budget)
+        self.assertEqual(breakdown["tables_included"], ["genres", "tracks"])
+        self.assertEqual(breakdown["tables_truncated"], ["tracks"])
+        self.assertEqual(breakdown["tables_dropped"], ["albums"])
+        self.assertIn("# genres (GenreId, Name)", prompt)
+        self.assertIn("# tracks (TrackId, Name)", prompt)
+
+    def test_build_raises_when_question_exceeds_budget(self) -> None:
+        self.builder.token_budget = 1
+        with self.assertRaises(ValueError):
+            self.builder.build("List all the genres", SCHEMA, "SQLite")
+
+
+class TestTokenBudgets(unittest.TestCase):
+    def test_text_to_sql_token_breakdown(self) -> None:
+        question = "How many genres are there?"
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            FakeLLMConnector({question: "SELECT COUNT(*) FROM genres"}),
+            max_tables=3,
+            token_budget=60,
+        )
+
+        tts.convert_text_to_sql(question)
+        breakdown = tts.get_last_token_breakdown()
+        assert breakdown is not None
+        self.assertLessEqual(breakdown["total"], 60)
+        self.assertEqual(breakdown["tables_included"][0], "genres")
+
+    def test_chat_memory_max_tokens(self) -> None:
+        memory = TextToSQLChatMemory("system", max_tokens=30)
+        for index in range(10):
+            memory.add_message("user", f"question number {index}")
+
+        messages = memory.get_messages()
+        self.assertEqual(messages[0]["content"], "system")
+        self.assertEqual(messages[-1]["content"], "question number 9")
+        self.assertLess(len(messages), 11)
+        self.assertLessEqual(TokenCounter().count_messages(messages), 30)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_text_to_sql import TextToSQL, TextToSQLChat
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.exceptions import NoRecordedAnswerException
+from ai_text_to_sql.llm_connectors import RecordReplayConnector
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTION = "How many genres are there?"
+SQL = "SELECT COUNT(*) AS count FROM genres"
+
+
+class TestRecordReplayConnector(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cassette_path = os.path.join(self.temp_dir.name, "cassette.jsonl")
+        self.connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.llm_connector = FakeLLMConnector({QUESTION: SQL})
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_records_then_replays(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        text_to_sql = TextToSQL(self.connector, recorder)
+        self.assertEqual(text_to_sql.convert_text_to_sql(QUESTION), SQL)
+        self.assertEqual(text_to_sql.convert_text_to_sql(QUESTION), SQL)
+        self.assertEqual(len(self.llm_connector.prompts), 1)
+        self.assertEqual((recorder.hits, recorder.misses), (1, 1))
+
+        # A new instance replays the cassette without calling the LLM.
+        replayer = RecordReplayConnector(
+            FakeLLMConnector({}), self.cassette_path, mode="replay"
+        )
+        self.assertEqual(
+            TextToSQL(self.connector, replayer).convert_text_to_sql(QUESTION), SQL
+        )
+
+    def test_replay_mode_raises_on_miss(self) -> None:
+        replayer = RecordReplayConnector(
+            self.llm_connector, self.cassette_path, mode="replay"
+        )
+        with self.assertRaises(NoRecordedAnswerException):
+            replayer.get_answer(prompt=QUESTION)
+        self.assertEqual(self.llm_connector.prompts, [])
+
+    def test_record_mode_always_calls_llm(self) -> None:
+        recorder = RecordReplayConnector(
+            self.llm_connector, self.cassette_path, mode="record"
+        )
+        recorder.get_answer(prompt=QUESTION)
+        recorder.get_answer(prompt=QUESTION)
+        self.assertEqual(len(self.llm_connector.prompts), 2)
+
+    def test_keys_depend_on_messages_and_parameters(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        self.assertEqual(
+            recorder.get_request_key(prompt=QUESTION),
+            recorder.get_request_key(messages=[{"role": "user", "content": QUESTION}]),
+        )
+        self.assertNotEqual(
+            recorder.get_request_key(prompt=QUESTION),
+            recorder.get_request_key(prompt=QUESTION + " "),
+        )
+
+    def test_keys_depend_on_options(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        keys = {
+            recorder.get_request_key(prompt=QUESTION),
+            recorder.get_request_key(prompt=QUESTION, n=3),
+            recorder.get_request_key(prompt=QUESTION, stream=True),
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_records_then_replays_answers(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        self.assertEqual(recorder.get_answers(prompt=QUESTION, n=3), [SQL] * 3)
+        self.assertEqual(len(self.llm_connector.prompts), 3)
+
+        replayer = RecordReplayConnector(
+            FakeLLMConnector({}), self.cassette_path, mode="replay"
+        )
+        self.assertEqual(replayer.get_answers(prompt=QUESTION, n=3), [SQL] * 3)
+        self.assertEqual(
+            asyncio.run(replayer.aget_answers(prompt=QUESTION, n=3)), [SQL] * 3
+        )
+        # A single answer is a different request.
+        with self.assertRaises(NoRecordedAnswerException):
+            replayer.get_answer(prompt=QUESTION)
+
+    def test_records_then_replays_streams(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        self.assertEqual("".join(recorder.stream_answer(prompt=QUESTION)), SQL)
+
+        replayer = RecordReplayConnector(
+            FakeLLMConnector({}), self.cassette_path, mode="replay"
+        )
+        self.assertEqual(list(replayer.stream_answer(prompt=QUESTION)), [SQL])
+
+        async def collect() -> list:
+            return [chunk async for chunk in replayer.astream_answer(prompt=QUESTION)]
+
+        self.assertEqual(asyncio.run(collect()), [SQL])
+        self.assertEqual(replayer.hits, 2)
+
+    def test_chat_and_async(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        chat = TextToSQLChat(self.connector, recorder)
+        self.assertEqual(chat.convert_text_to_sql(QUESTION), SQL)
+
+        messages = [{"role": "user", "content": QUESTION}]
+        self.assertEqual(asyncio.run(recorder.aget_answer(messages=messages)), SQL)
+        self.assertEqual(asyncio.run(recorder.aget_answer(messages=messages)), SQL)
+        self.assertEqual(recorder.hits, 1)
+
+    def test_counters_under_concurrency(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        recorder.get_answer(prompt=QUESTION)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            answers = list(
+                executor.map(lambda _: recorder.get_answer(prompt=QUESTION), range(400))
+            )
+        self.assertEqual(answers, [SQL] * 400)
+        self.assertEqual((recorder.hits, recorder.misses), (400, 1))
+
+    def test_load_cassette_skips_truncated_lines(self) -> None:
+        recorder = RecordReplayConnector(self.llm_connector, self.cassette_path)
+        recorder.get_answer(prompt=QUESTION)
+        with open(self.cassette_path, "a") as f:
+            f.write('{"key": "truncat')
+
+        warm_path = os.path.join(self.temp_dir.name, "warm.jsonl")
+        warmed = RecordReplayConnector(FakeLLMConnector({}), warm_path, mode="replay")
+        self.assertEqual(warmed.load_cassette(self.cassette_path), 1)
+        self.assertEqual(warmed.get_answer(prompt=QUESTION), SQL)
+
+    def test_invalid_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            RecordReplayConnector(self.llm_connector, self.cassette_path, mode="x")
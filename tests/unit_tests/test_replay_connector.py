@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from ai_text_to_sql import TextToSQL, TextToSQLChat
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.exceptions import NoRecordedAnswerException
+from ai_text_to_sql.llm_connectors import OpenAIConnector, ReplayConnector
+
+ANSWERS = {"How many genres are there?": "SELECT COUNT(*) AS count FROM genres"}
+
+
+class TestReplayConnector(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.llm_connector = ReplayConnector(ANSWERS)
+
+    def test_replays_answer_from_prompt(self) -> None:
+        text_to_sql = TextToSQL(self.connector, self.llm_connector)
+        self.assertEqual(
+            text_to_sql.convert_text_to_sql("how many genres are there"),
+            ANSWERS["How many genres are there?"],
+        )
+        self.assertEqual(text_to_sql.query("How many genres are there?")[0][0], 25)
+
+        usage = self.llm_connector.get_last_usage()
+        assert usage is not None
+        self.assertEqual(
+            usage["total_tokens"], usage["prompt_tokens"] + usage["completion_tokens"]
+        )
+
+    def test_prompt_matches_openai_connector(self) -> None:
+        self.assertIs(ReplayConnector.create_prompt, OpenAIConnector.create_prompt)
+        self.assertIs(
+            ReplayConnector.format_database_schema,
+            OpenAIConnector.format_database_schema,
+        )
+
+    def test_replays_answer_from_messages(self) -> None:
+        chat = TextToSQLChat(self.connector, self.llm_connector)
+        self.assertEqual(
+            chat.convert_text_to_sql("How many genres are there?"),
+            ANSWERS["How many genres are there?"],
+        )
+
+    def test_async(self) -> None:
+        sql = asyncio.run(
+            self.llm_connector.aget_answer(
+                messages=[{"role": "user", "content": "How many genres are there?"}]
+            )
+        )
+        self.assertEqual(sql, ANSWERS["How many genres are there?"])
+
+    def test_unknown_question(self) -> None:
+        text_to_sql = TextToSQL(self.connector, self.llm_connector)
+        with self.assertRaises(NoRecordedAnswerException):
+            text_to_sql.convert_text_to_sql("How many albums are there?")
+
+        default_connector = ReplayConnector(ANSWERS, default_answer="SELECT 1")
+        self.assertEqual(
+            default_connector.get_answer(prompt="How many albums are there?"),
+            "SELECT 1",
+        )
+
+    def test_from_file(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_path = os.path.join(temp_dir, "answers.json")
+            with open(json_path, "w") as f:
+                json.dump(ANSWERS, f)
+
+            jsonl_path = os.path.join(temp_dir, "answers.jsonl")
+            with open(jsonl_path, "w") as f:
+                for question, sql in ANSWERS.items():
+                    f.write(json.dumps({"question": question, "sql": sql}) + "\n")
+
+            for path in (json_path, jsonl_path):
+                connector = ReplayConnector.from_file(path, latency=0.001)
+                self.assertEqual(
+                    connector.get_answer(prompt="How many genres are there?"),
+                    ANSWERS["How many genres are there?"],
+                )
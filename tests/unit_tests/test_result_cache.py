@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.exceptions import RowLimitExceededException
+from ai_text_to_sql.result_cache import (
+    ResultCache,
+    get_query_tables,
+    is_read_only_query,
+    normalize_sql,
+)
+
+
+class TestResultCache(unittest.TestCase):
+    def test_normalize_sql(self) -> None:
+        self.assertEqual(
+            normalize_sql(
+                "select Name ,  Total\nfrom invoices -- all\nwhere x = 'A  b';"
+            ),
+            normalize_sql("SELECT Name, Total FROM invoices WHERE x='A  b'"),
+        )
+        self.assertNotEqual(
+            normalize_sql("SELECT * FROM t WHERE x = 'a'"),
+            normalize_sql("SELECT * FROM t WHERE x = 'A'"),
+        )
+
+    def test_get_query_tables(self) -> None:
+        self.assertEqual(
+            get_query_tables(
+                'SELECT * FROM main."Tracks" AS t JOIN albums a ON a.AlbumId = '
+                "t.AlbumId, genres WHERE t.GenreId IN (SELECT GenreId FROM [genres])"
+            ),
+            {"tracks", "albums", "genres"},
+        )
+        self.assertEqual(
+            get_query_tables("SELECT * FROM (SELECT * FROM a, b) AS s, c"),
+            {"a", "b", "c"},
+        )
+
+    def test_is_read_only_query(self) -> None:
+        self.assertTrue(is_read_only_query("with t AS (SELECT 1) SELECT * FROM t"))
+        self.assertTrue(is_read_only_query("SELECT 'DELETE' FROM notes"))
+        self.assertFalse(
+            is_read_only_query("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d")
+        )
+        self.assertFalse(is_read_only_query("SELECT * INTO backup FROM t"))
+        self.assertFalse(is_read_only_query("PRAGMA user_version"))
+
+    def test_eviction_by_size(self) -> None:
+        cache = ResultCache(max_bytes=2000)
+        cache.set("a", [(1, "a" * 500)], ["t"])
+        cache.set("b", [(2, "b" * 500)], ["t"])
+        cache.get("a")
+        cache.set("c", [(3, "c" * 500)], ["t"])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertLessEqual(cache.size, 2000)
+
+        cache.set("d", [(4, "d" * 5000)], ["t"])
+        self.assertIsNone(cache.get("d"))
+
+    def test_ttl(self) -> None:
+        cache = ResultCache(ttl=0)
+        cache.set("a", [(1,)], ["t"])
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size, 0)
+
+    def test_invalidate(self) -> None:
+        cache = ResultCache()
+        cache.set("a", [(1,)], ["tracks", "albums"])
+        cache.set("b", [(2,)], ["genres"])
+
+        self.assertEqual(cache.invalidate('"Albums"'), 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+
+
+class TestDataConnectorResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.result_cache = ResultCache()
+        self.connector = SQLiteConnector(
+            database="tests/data/chinook.db", result_cache=self.result_cache
+        )
+
+    def test_query(self) -> None:
+        rows = self.connector.query("SELECT Name FROM genres ORDER BY GenreId")
+        cached_rows = self.connector.query(
+            "select Name\nfrom genres\norder by GenreId;"
+        )
+
+        self.assertEqual(rows, cached_rows)
+        self.assertEqual((self.result_cache.hits, self.result_cache.misses), (1, 1))
+
+        # Identifiers may be case-sensitive, so they are not normalized.
+        self.connector.query("SELECT name FROM genres ORDER BY GenreId")
+        self.assertEqual(self.result_cache.misses, 2)
+
+        self.assertEqual(self.connector.invalidate_results("genres"), 2)
+        self.connector.query("SELECT Name FROM genres ORDER BY GenreId")
+        self.assertEqual(self.result_cache.misses, 3)
+
+    def test_query_records_and_max_rows(self) -> None:
+        columns, records = self.connector.query_records("SELECT * FROM genres")
+        self.assertEqual(
+            self.connector.query_records("SELECT * FROM genres"), (columns, records)
+        )
+        self.assertEqual(self.result_cache.hits, 1)
+
+        with self.assertRaises(RowLimitExceededException):
+            self.connector.query_records("SELECT * FROM genres", max_rows=10)
+
+    def test_shared_between_connectors(self) -> None:
+        other_connector = SQLiteConnector(
+            database="tests/data/chinook.db", result_cache=self.result_cache
+        )
+        self.connector.query("SELECT COUNT(*) FROM tracks")
+        asyncio.run(other_connector.aquery("SELECT COUNT(*) FROM tracks"))
+        asyncio.run(other_connector.aclose())
+
+        self.assertEqual(self.result_cache.hits, 1)
+
+    def test_write_queries_are_not_cached(self) -> None:
+        connector = SQLiteConnector(database=":memory:", result_cache=self.result_cache)
+        connector.query("PRAGMA user_version")
+        connector.query("PRAGMA user_version")
+
+        self.assertEqual((self.result_cache.hits, self.result_cache.misses), (0, 0))
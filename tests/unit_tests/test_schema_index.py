@@ -0,0 +1,68 @@
+import unittest
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.schema_index import SchemaIndex, tokenize
+
+from .fake_llm_connector import FakeLLMConnector
+
+
+class TestSchemaIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.index = SchemaIndex(
+            self.connector.get_database_schema(), self.connector.get_foreign_keys()
+        )
+
+    def test_tokenize(self) -> None:
+        self.assertEqual(tokenize("InvoiceLines"), ["invoice", "line"])
+        self.assertEqual(tokenize("media_types"), ["media", "type"])
+        self.assertEqual(tokenize("CustomerID"), ["customer", "id"])
+
+    def test_search(self) -> None:
+        tables = [table for table, _ in self.index.search("List all genres", 1)]
+        self.assertEqual(tables, ["genres"])
+        self.assertEqual(self.index.search("zzz", 3), [])
+
+    def test_select_tables_with_neighbours(self) -> None:
+        tables = self.index.select_tables("Which albums are there?", 1)
+        self.assertEqual(tables[0], "albums")
+        self.assertIn("artists", tables)
+        self.assertIn("tracks", tables)
+
+    def test_search_comments(self) -> None:
+        # SQLite does not support comments.
+        self.assertEqual(self.connector.get_comments(), {})
+
+        index = SchemaIndex(
+            self.connector.get_database_schema(),
+            comments={
+                "playlists": {"comment": "Curated mixtapes", "columns": {}},
+                "tracks": {"comment": None, "columns": {"Bytes": "The file size"}},
+            },
+        )
+        self.assertEqual(
+            index.search("Which mixtapes are there?", 3)[0][0], "playlists"
+        )
+        self.assertEqual(index.search("What is the file size?", 3)[0][0], "tracks")
+
+    def test_prune_schema_without_matches(self) -> None:
+        self.assertIs(
+            self.index.prune_schema("zzz", 3), self.connector.get_database_schema()
+        )
+
+
+class TestTextToSQLSchemaPruning(unittest.TestCase):
+    def test_prompt_contains_relevant_tables(self) -> None:
+        question = "List all genres"
+        llm_connector = FakeLLMConnector({question: "SELECT Name FROM genres"})
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            llm_connector,
+            max_tables=1,
+        )
+
+        self.assertEqual(tts.convert_text_to_sql(question), "SELECT Name FROM genres")
+        self.assertIn("# genres (", llm_connector.prompts[0])
+        self.assertIn("# tracks (", llm_connector.prompts[0])
+        self.assertNotIn("# customers (", llm_connector.prompts[0])
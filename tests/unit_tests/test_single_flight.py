@@ -0,0 +1,143 @@
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Text, Union
+
+from ai_text_to_sql import AsyncTextToSQL, TextToSQL
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.single_flight import SingleFlight
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTIONS = ["How many genres are there?", "how many  genres are there"]
+SQL = "SELECT COUNT(*) FROM genres"
+
+
+class SlowLLMConnector(FakeLLMConnector):
+    """
+    A fake LLM connector that takes a while to answer, and counts its calls.
+    """
+
+    def __init__(self) -> None:
+        super().__init__({question: SQL for question in QUESTIONS})
+        self.calls = 0
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        self.calls += 1
+        time.sleep(0.3)
+        return super().get_answer(prompt, messages)
+
+    async def aget_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return super().get_answer(prompt, messages)
+
+
+class SlowSQLiteConnector(SQLiteConnector):
+    """
+    A SQLite connector whose asynchronous queries take a while, and are counted.
+    """
+
+    executions = 0
+
+    async def aquery(
+        self,
+        query: Text,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        parameters: Optional[Dict[Text, Any]] = None,
+    ) -> List[Any]:
+        self.executions += 1
+        await asyncio.sleep(0.1)
+        return await super().aquery(query, timeout, max_rows, parameters)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_do_shares_exceptions(self) -> None:
+        single_flight = SingleFlight()
+        started = threading.Event()
+
+        def fail() -> None:
+            started.set()
+            time.sleep(0.2)
+            raise ValueError("boom")
+
+        def follow() -> None:
+            started.wait()
+            single_flight.do("key", lambda: None)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(single_flight.do, "key", fail)
+            follower = executor.submit(follow)
+            for future in (leader, follower):
+                with self.assertRaises(ValueError):
+                    future.result()
+
+        self.assertEqual((single_flight.calls, single_flight.shared_calls), (2, 1))
+        # Once the call is done, the next call with the key runs the function again.
+        self.assertEqual(single_flight.do("key", lambda: 1), (1, False))
+
+    def test_text_to_sql_threads(self) -> None:
+        llm_connector = SlowLLMConnector()
+        single_flight = SingleFlight()
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            llm_connector,
+            single_flight=single_flight,
+        )
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(tts.query, QUESTIONS * 3))
+
+        self.assertEqual(results, [[(25,)]] * 6)
+        self.assertEqual(llm_connector.calls, 1)
+        self.assertGreaterEqual(single_flight.shared_calls, 5)
+
+    def test_async_text_to_sql_tasks(self) -> None:
+        llm_connector = SlowLLMConnector()
+        data_connector = SlowSQLiteConnector(database="tests/data/chinook.db")
+        tts = AsyncTextToSQL(
+            data_connector, llm_connector, single_flight=SingleFlight()
+        )
+
+        async def run() -> List[List[Any]]:
+            results = await asyncio.gather(
+                *(tts.query(question) for question in QUESTIONS * 3)
+            )
+            await data_connector.aclose()
+            return list(results)
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [[(25,)]] * 6)
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual((llm_connector.calls, data_connector.executions), (1, 1))
+
+    def test_writes_are_not_shared(self) -> None:
+        question = "Add the Polka genre."
+        write = "INSERT INTO genres (Name) VALUES ('Polka') RETURNING Name"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = f"{temp_dir}/test.db"
+            with sqlite3.connect(database) as conn:
+                conn.execute("CREATE TABLE genres (GenreId INTEGER, Name TEXT)")
+            data_connector = SlowSQLiteConnector(database=database)
+            tts = AsyncTextToSQL(
+                data_connector,
+                FakeLLMConnector({question: write}),
+                single_flight=SingleFlight(),
+            )
+
+            async def run() -> List[List[Any]]:
+                results = await asyncio.gather(*(tts.query(question) for _ in range(3)))
+                await data_connector.aclose()
+                return list(results)
+
+            self.assertEqual(asyncio.run(run()), [[("Polka",)]] * 3)
+            self.assertEqual(data_connector.executions, 3)
@@ -0,0 +1,71 @@
+import unittest
+
+from ai_text_to_sql import TextToSQL
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.sql_template_cache import (
+    SQLTemplateCache,
+    create_template,
+    render_sql,
+)
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTION = "Top 2 Rock tracks"
+SQL = (
+    "SELECT t.Name FROM tracks t JOIN genres g ON g.GenreId = t.GenreId "
+    "WHERE g.Name = 'Rock' ORDER BY t.Milliseconds DESC LIMIT 2"
+)
+
+
+class TestSQLTemplateCache(unittest.TestCase):
+    def test_create_template(self) -> None:
+        template = create_template(QUESTION, SQL)
+        assert template is not None
+        self.assertTrue(
+            template.sql.endswith("g.Name = :p1 ORDER BY t.Milliseconds DESC LIMIT :p0")
+        )
+        self.assertEqual(template.numeric, [True, False])
+
+        # Questions without values, or made of values only, have no template.
+        self.assertIsNone(create_template("List the genres", "SELECT Name FROM genres"))
+        self.assertIsNone(
+            create_template("Rock", "SELECT * FROM genres WHERE Name = 'Rock'")
+        )
+        # A value that appears twice in the question is ambiguous.
+        self.assertIsNone(create_template("Top 5 of 5", "SELECT 5"))
+
+    def test_match(self) -> None:
+        cache = SQLTemplateCache()
+        self.assertTrue(cache.add(QUESTION, SQL))
+
+        match = cache.match("top 10  Jazz tracks?")
+        assert match is not None
+        self.assertEqual(match[1], {"p0": 10, "p1": "Jazz"})
+        self.assertIn("g.Name = 'Jazz'", render_sql(*match))
+
+        self.assertIsNone(cache.match("Top 10 Jazz albums"))
+        self.assertIsNone(cache.match("Top 10 Heavy Metal tracks"))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_render_sql(self) -> None:
+        self.assertEqual(
+            render_sql(
+                "SELECT ':p0' FROM t WHERE a = :p0 AND b < :p1",
+                {"p0": "O'Brien", "p1": 3},
+            ),
+            "SELECT ':p0' FROM t WHERE a = 'O''Brien' AND b < 3",
+        )
+
+    def test_text_to_sql(self) -> None:
+        llm_connector = FakeLLMConnector({QUESTION: SQL})
+        text_to_sql = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            llm_connector,
+            template_cache=SQLTemplateCache(),
+        )
+
+        self.assertEqual(len(text_to_sql.query(QUESTION)), 2)
+        # The question is answered from the template, with bound parameters.
+        jazz_tracks = text_to_sql.query_df("Top 3 Jazz tracks")
+        self.assertEqual(len(jazz_tracks), 3)
+        self.assertEqual(len(llm_connector.prompts), 1)
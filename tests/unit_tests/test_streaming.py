@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Text, Union
+
+from ai_text_to_sql import AsyncTextToSQL, TextToSQL
+from ai_text_to_sql.answer_cache import InMemoryAnswerCache
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.llm_connectors.llm_connector import SQLStatementBuffer
+from ai_text_to_sql.llm_connectors.openai_connector import OpenAIConnector
+
+from .fake_llm_connector import FakeLLMConnector
+
+QUESTION = "How many genres are there?"
+TOKENS = [" SELECT", " COUNT(*)", " FROM", " genres", ";", "\nSELECT", " 1"]
+
+
+class StreamingConnector(FakeLLMConnector):
+    """
+    A fake LLM connector that streams its answer token by token, and records how many
+    tokens were consumed.
+    """
+
+    def __init__(self, tokens: List[Text]) -> None:
+        super().__init__({})
+        self.tokens = tokens
+        self.consumed = 0
+
+    def stream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Iterator[Text]:
+        statement = SQLStatementBuffer()
+        for token in self.tokens:
+            self.consumed += 1
+            text = statement.feed(token)
+            if text:
+                yield text
+            if statement.complete:
+                return
+
+    async def astream_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> AsyncIterator[Text]:
+        for text in self.stream_answer(prompt, messages):
+            yield text
+
+
+class FakeStream:
+    """
+    A fake stream of chat completion chunks, as returned by the OpenAI client.
+    """
+
+    def __init__(self, tokens: List[Text]) -> None:
+        self.chunks = iter(
+            SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=token))],
+                usage=None,
+            )
+            for token in tokens
+        )
+        self.closed = False
+
+    def __iter__(self) -> "FakeStream":
+        return self
+
+    def __next__(self) -> Any:
+        return next(self.chunks)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestSQLStatementBuffer(unittest.TestCase):
+    def test_feed(self) -> None:
+        statement = SQLStatementBuffer()
+        chunks = ["SELECT 'a;b', \"c;\" ", "FROM t -", "- d;\n", "WHERE 1; SELECT 2"]
+
+        self.assertEqual(
+            [statement.feed(chunk) for chunk in chunks],
+            ["SELECT 'a;b', \"c;\" ", "FROM t -", "- d;\n", "WHERE 1"],
+        )
+        self.assertTrue(statement.complete)
+        self.assertEqual(statement.feed(" more"), "")
+
+    def test_incomplete(self) -> None:
+        statement = SQLStatementBuffer()
+        statement.feed("SELECT /* ; */ 1")
+
+        self.assertFalse(statement.complete)
+        self.assertEqual(statement.text, "SELECT /* ; */ 1")
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data_connector = SQLiteConnector(database="tests/data/chinook.db")
+
+    def test_openai_stream_answer(self) -> None:
+        llm_connector = OpenAIConnector(api_key="test")
+        stream = FakeStream(TOKENS)
+        llm_connector.client = SimpleNamespace(  # type: ignore[assignment]
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(create=lambda **kwargs: stream)
+            )
+        )
+
+        self.assertEqual(
+            "".join(llm_connector.stream_answer(QUESTION)),
+            " SELECT COUNT(*) FROM genres",
+        )
+        self.assertTrue(stream.closed)
+        self.assertEqual(next(stream.chunks).choices[0].delta.content, "\nSELECT")
+
+    def test_convert_text_to_sql_stream(self) -> None:
+        llm_connector = StreamingConnector(TOKENS)
+        answer_cache = InMemoryAnswerCache()
+        tts = TextToSQL(self.data_connector, llm_connector, answer_cache=answer_cache)
+
+        chunks = list(tts.convert_text_to_sql_stream(QUESTION))
+        self.assertEqual(chunks, ["SELECT", " COUNT(*)", " FROM", " genres"])
+        self.assertEqual(llm_connector.consumed, 5)
+
+        self.assertEqual(
+            list(tts.convert_text_to_sql_stream(QUESTION)),
+            ["SELECT COUNT(*) FROM genres"],
+        )
+        self.assertEqual(llm_connector.consumed, 5)
+
+    def test_default_stream_answer(self) -> None:
+        llm_connector = FakeLLMConnector({QUESTION: "SELECT COUNT(*) FROM genres"})
+        tts = TextToSQL(self.data_connector, llm_connector)
+
+        self.assertEqual(
+            list(tts.convert_text_to_sql_stream(QUESTION)),
+            ["SELECT COUNT(*) FROM genres"],
+        )
+        self.assertIsNotNone(llm_connector.get_last_usage())
+
+    def test_async_convert_text_to_sql_stream(self) -> None:
+        tts = AsyncTextToSQL(self.data_connector, StreamingConnector(TOKENS))
+
+        async def run() -> List[Text]:
+            chunks = [chunk async for chunk in tts.convert_text_to_sql_stream(QUESTION)]
+            await self.data_connector.aclose()
+            return chunks
+
+        self.assertEqual(
+            "".join(asyncio.run(run())),
+            "SELECT COUNT(*) FROM genres",
+        )
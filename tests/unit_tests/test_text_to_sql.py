@@ -0,0 +1,135 @@
+import unittest
+from typing import Dict, List, Optional, Text, Union
+
+from ai_text_to_sql import TextToSQL, TextToSQLChat
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.example_store import ExampleStore
+
+from .fake_llm_connector import FakeLLMConnector
+
+ANSWERS = {
+    "How many genres are there?": "SELECT COUNT(*) FROM genres",
+    "How many artists are there?": "SELECT COUNT(*) FROM artists",
+    "Which query is broken?": "SELECT * FROM missing_table",
+}
+
+
+class MessageRecordingConnector(FakeLLMConnector):
+    """
+    A fake LLM connector that records the messages of each call.
+    """
+
+    def __init__(self, answers: Dict[Text, Text]) -> None:
+        super().__init__(answers)
+        self.messages: List[Optional[List[Dict]]] = []
+
+    def get_answer(
+        self, prompt: Union[Text, None] = None, messages: Union[List[Dict], None] = None
+    ) -> Text:
+        self.messages.append(list(messages) if messages else None)
+        return super().get_answer(prompt, messages)
+
+
+class TestBatchConversion(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data_connector = SQLiteConnector(database="tests/data/chinook.db")
+        self.tts = TextToSQL(self.data_connector, FakeLLMConnector(ANSWERS))
+
+    def test_convert_many(self) -> None:
+        texts = list(ANSWERS) + ["Unknown question"]
+        results = self.tts.convert_many(texts, max_workers=2)
+
+        self.assertEqual([result.text for result in results], texts)
+        self.assertEqual(
+            [result.result for result in results[:3]], list(ANSWERS.values())
+        )
+        self.assertIsInstance(results[3].error, KeyError)
+        # The schema is reflected once for the whole batch.
+        self.assertEqual(self.data_connector.schema_cache_misses, 1)
+        self.assertEqual(self.data_connector.schema_cache_hits, 0)
+
+    def test_query_many(self) -> None:
+        results = self.tts.query_many(list(ANSWERS), ordered=False)
+
+        results = sorted(results, key=lambda result: result.index)
+        self.assertEqual(results[0].result[0][0], 25)
+        self.assertEqual(results[1].result[0][0], 275)
+        self.assertIsNone(results[2].result)
+        self.assertIsNotNone(results[2].error)
+
+    def test_query_many_records_answers(self) -> None:
+        example_store = ExampleStore()
+        tts = TextToSQL(
+            self.data_connector, FakeLLMConnector(ANSWERS), example_store=example_store
+        )
+        tts.query_many(list(ANSWERS))
+
+        # Only the queries that executed successfully are recorded, as by query().
+        self.assertEqual(len(example_store), 2)
+
+
+class TestChatQueries(unittest.TestCase):
+    def test_query_uses_history(self) -> None:
+        llm_connector = MessageRecordingConnector(ANSWERS)
+        chat = TextToSQLChat(
+            SQLiteConnector(database="tests/data/chinook.db"), llm_connector
+        )
+        self.assertEqual(chat.query("How many genres are there?"), [(25,)])
+        self.assertEqual(chat.query_df("How many artists are there?").iloc[0, 0], 275)
+
+        # The second question is sent with the first exchange.
+        messages = llm_connector.messages[-1]
+        assert messages is not None
+        self.assertEqual(
+            [message["content"] for message in messages[1:]],
+            [
+                "How many genres are there?",
+                "SELECT COUNT(*) FROM genres",
+                "How many artists are there?",
+            ],
+        )
+        self.assertEqual(len(chat.memory.memory), 4)
+
+
+class TestQueryDataFrame(unittest.TestCase):
+    def test_query_df(self) -> None:
+        question = "Get me the first 3 genres."
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            FakeLLMConnector(
+                {question: "SELECT GenreId, Name FROM genres ORDER BY GenreId LIMIT 3"}
+            ),
+        )
+
+        df = tts.query_df(question)
+        self.assertEqual(list(df.columns), ["GenreId", "Name"])
+        self.assertEqual(df["Name"].tolist(), ["Rock", "Jazz", "Metal"])
+        self.assertEqual(df["GenreId"].dtype, "int64")
+
+
+class TestStreamingQueries(unittest.TestCase):
+    def test_query_df_chunks(self) -> None:
+        question = "Get me all the tracks."
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            FakeLLMConnector({question: "SELECT TrackId, Name FROM tracks"}),
+        )
+
+        chunks = list(tts.query_df_chunks(question, chunksize=1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 1000, 503])
+        self.assertEqual(list(chunks[0].columns), ["TrackId", "Name"])
+        self.assertEqual(chunks[-1]["TrackId"].iloc[-1], 3503)
+
+    def test_query_df_chunks_empty_result(self) -> None:
+        question = "Get me the tracks without a name."
+        tts = TextToSQL(
+            SQLiteConnector(database="tests/data/chinook.db"),
+            FakeLLMConnector(
+                {question: "SELECT TrackId, Name FROM tracks WHERE Name IS NULL"}
+            ),
+        )
+
+        chunks = list(tts.query_df_chunks(question))
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].empty)
+        self.assertEqual(list(chunks[0].columns), ["TrackId", "Name"])
@@ -0,0 +1,82 @@
+import sqlite3
+import tempfile
+import unittest
+
+from ai_text_to_sql import TextToSQLRouter
+from ai_text_to_sql.data_connectors.sqlite_connector import SQLiteConnector
+from ai_text_to_sql.exceptions import NoRelevantDatabaseException
+
+from .fake_llm_connector import FakeLLMConnector
+
+GENRE_QUESTION = "How many genres are there?"
+PATIENT_QUESTION = "Which patients have a diagnosis of flu?"
+SHARED_QUESTION = "List the names of the patients and of the genres."
+
+ANSWERS = {
+    GENRE_QUESTION: "SELECT COUNT(*) FROM genres",
+    PATIENT_QUESTION: "SELECT Name FROM patients WHERE Diagnosis = 'flu'",
+    SHARED_QUESTION: "SELECT Name FROM patients",
+}
+
+
+class TestTextToSQLRouter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database = f"{self.temp_dir.name}/clinic.db"
+        with sqlite3.connect(database) as conn:
+            conn.execute(
+                "CREATE TABLE patients (PatientId INTEGER, Name TEXT, Diagnosis TEXT)"
+            )
+            conn.execute("INSERT INTO patients VALUES (1, 'Ada', 'flu')")
+            conn.execute("CREATE TABLE doctors (DoctorId INTEGER, Name TEXT)")
+
+        self.data_connectors = {
+            "chinook": SQLiteConnector(database="tests/data/chinook.db"),
+            "clinic": SQLiteConnector(database=database),
+        }
+        self.router = TextToSQLRouter(
+            self.data_connectors,
+            FakeLLMConnector(ANSWERS),
+            max_active_databases=1,
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_route(self) -> None:
+        self.assertEqual(self.router.route(GENRE_QUESTION), ["chinook"])
+        self.assertEqual(self.router.route(PATIENT_QUESTION), ["clinic"])
+
+        with self.assertRaises(NoRelevantDatabaseException):
+            self.router.route("zzz")
+
+    def test_route_to_several_databases(self) -> None:
+        self.router.max_databases = 2
+        self.router.min_score_ratio = 0
+        self.assertEqual(
+            sorted(self.router.route(SHARED_QUESTION)), ["chinook", "clinic"]
+        )
+
+    def test_query(self) -> None:
+        self.assertEqual(self.router.query(GENRE_QUESTION), {"chinook": [(25,)]})
+        self.assertEqual(self.router.query(PATIENT_QUESTION), {"clinic": [("Ada",)]})
+
+    def test_least_recently_used_database_is_released(self) -> None:
+        self.router.build_index()
+        self.assertEqual(
+            [
+                connector.get_schema_cache_info()["age"]
+                for connector in self.data_connectors.values()
+            ],
+            [None, None],
+        )
+
+        self.router.query(GENRE_QUESTION)
+        self.router.query(PATIENT_QUESTION)
+        self.assertEqual(self.router.get_active_databases(), ["clinic"])
+        self.assertIsNone(
+            self.data_connectors["chinook"].get_schema_cache_info()["age"]
+        )
+        self.assertIsNotNone(
+            self.data_connectors["clinic"].get_schema_cache_info()["age"]
+        )